@@ -0,0 +1,74 @@
+import asyncio
+import base64
+from typing import Any, Awaitable, Callable, Optional
+
+from helpers import PCM24K_BYTES_PER_MS, base64_decoded_length, openai_audio_append
+
+
+class AudioCoalescer:
+    """Joins consecutive ACS audio payloads into fewer ``input_audio_buffer.append`` events.
+
+    ACS streams one small frame every 20 ms. Frames are buffered until ``max_ms`` of
+    audio has accumulated, or ``max_delay_ms`` has passed since the first buffered
+    frame, and then sent as one event through ``send``. The bridge also calls
+    ``flush()`` before any control event and when the model reports end of speech.
+
+    Base64 payloads without padding are concatenated as text; if a frame other than
+    the last one carries padding the audio is decoded and re-encoded instead.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[Any]], spawn: Callable[[Any], Any], max_ms: float = 80, max_delay_ms: Optional[float] = None):
+        self._send = send
+        self._spawn = spawn
+        self.max_bytes = int(max_ms * PCM24K_BYTES_PER_MS)
+        self.max_delay = (max_delay_ms if max_delay_ms is not None else max_ms) / 1000
+
+        self._parts: list[str] = []
+        self._bytes = 0
+        self._padded = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.frames_in = 0
+        self.frames_out = 0
+
+    async def add(self, audio: str):
+        if not audio:
+            return
+        if self._parts and self._parts[-1].endswith("="):
+            self._padded = True
+        self._parts.append(audio)
+        self._bytes += base64_decoded_length(audio)
+        self.frames_in += 1
+
+        if self._bytes >= self.max_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        if self._parts:
+            self._spawn(self.flush())
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._parts:
+            return
+
+        if len(self._parts) == 1:
+            audio = self._parts[0]
+        elif self._padded:
+            audio = base64.b64encode(b"".join(base64.b64decode(part) for part in self._parts)).decode("ascii")
+        else:
+            audio = "".join(self._parts)
+        self._parts = []
+        self._bytes = 0
+        self._padded = False
+
+        self.frames_out += 1
+        await self._send(openai_audio_append(audio))
+
+    def stats(self) -> dict[str, Any]:
+        return {"frames_in": self.frames_in, "frames_out": self.frames_out, "buffered_bytes": self._bytes}
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# What to do with a new audio frame when a direction already holds max_audio frames
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # discard the oldest queued audio frame (default, keeps latency bounded)
+OVERFLOW_DROP_NEWEST = "drop_newest"  # discard the incoming frame
+OVERFLOW_BLOCK = "block"              # wait for the writer, i.e. backpressure onto the reader
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK)
+
+
+class _Entry:
+    __slots__ = ("frame", "is_audio", "tag", "enqueued_at")
+
+    def __init__(self, frame: str, is_audio: bool, tag: Any = None):
+        self.frame = frame
+        self.is_audio = is_audio
+        self.tag = tag
+        self.enqueued_at = time.monotonic()
+
+
+class BridgeQueue:
+    """One direction of the bridge: a bounded queue in front of a WebSocket with its own writer task.
+
+    Readers hand frames over and go back to reading, so a slow peer no longer stalls
+    the other direction. Frames are written in the order they were queued. Audio
+    frames are droppable under ``overflow``; control frames are never dropped, a
+    reader waits instead once ``max_control`` of them are queued.
+
+    It exposes ``send_str``/``send_json`` like the socket it wraps, so code that
+    sends control events doesn't need to know about the queue.
+
+    ``on_audio_sent(tag)`` is called after each tagged audio frame has actually been
+    written, e.g. to account for audio that reached the caller.
+    """
+
+    def __init__(self, name: str, ws: Any, max_audio: int = 100, max_control: int = 1000, overflow: str = OVERFLOW_DROP_OLDEST,
+                 on_audio_sent: Optional[Callable[[Any], None]] = None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}")
+        self.name = name
+        self.ws = ws
+        self.max_audio = max_audio
+        self.max_control = max_control
+        self.overflow = overflow
+        self.on_audio_sent = on_audio_sent
+
+        self._entries: deque[_Entry] = deque()
+        self._audio_count = 0
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._closed = False
+
+        self.sent = 0
+        self.dropped_audio = 0
+        self.max_depth = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _append(self, entry: _Entry):
+        self._entries.append(entry)
+        if entry.is_audio:
+            self._audio_count += 1
+        if len(self._entries) > self.max_depth:
+            self.max_depth = len(self._entries)
+        self._ready.set()
+
+    async def _wait_for_space(self, full):
+        while full() and not self._closed:
+            self._space.clear()
+            await self._space.wait()
+
+    def _drop_oldest_audio(self):
+        for i, entry in enumerate(self._entries):
+            if entry.is_audio:
+                del self._entries[i]
+                self._audio_count -= 1
+                self.dropped_audio += 1
+                return
+
+    async def send_audio(self, frame: str, tag: Any = None):
+        """Queue an audio frame, applying the overflow policy when the queue is full."""
+        if self._closed:
+            return
+        if self._audio_count >= self.max_audio:
+            if self.overflow == OVERFLOW_DROP_NEWEST:
+                self.dropped_audio += 1
+                return
+            if self.overflow == OVERFLOW_DROP_OLDEST:
+                self._drop_oldest_audio()
+            else:
+                await self._wait_for_space(lambda: self._audio_count >= self.max_audio)
+        self._append(_Entry(frame, True, tag))
+
+    async def send_str(self, frame: str):
+        """Queue a control frame; never dropped."""
+        if self._closed:
+            return
+        if len(self._entries) - self._audio_count >= self.max_control:
+            await self._wait_for_space(lambda: len(self._entries) - self._audio_count >= self.max_control)
+        self._append(_Entry(frame, False))
+
+    async def send_json(self, data: Any):
+        # Serialised now, so later changes to ``data`` don't affect what is sent
+        await self.send_str(json.dumps(data))
+
+    def clear_audio(self) -> int:
+        """Discard all queued audio frames (e.g. on barge-in) and return how many were removed."""
+        if not self._audio_count:
+            return 0
+        removed = self._audio_count
+        self._entries = deque(entry for entry in self._entries if not entry.is_audio)
+        self._audio_count = 0
+        self._space.set()
+        return removed
+
+    async def run(self):
+        """Writer task: send queued frames in order until closed."""
+        try:
+            while True:
+                while not self._entries:
+                    if self._closed:
+                        return
+                    self._ready.clear()
+                    await self._ready.wait()
+                entry = self._entries.popleft()
+                if entry.is_audio:
+                    self._audio_count -= 1
+                self._space.set()
+
+                waited = time.monotonic() - entry.enqueued_at
+                self._wait_total += waited
+                if waited > self._wait_max:
+                    self._wait_max = waited
+
+                await self.ws.send_str(entry.frame)
+                self.sent += 1
+                if entry.tag is not None and self.on_audio_sent is not None:
+                    self.on_audio_sent(entry.tag)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The peer is gone; its reader will notice and end the call
+            logger.warning("Bridge queue %s: send failed, dropping further frames: %s", self.name, e)
+        finally:
+            self.close()
+
+    def close(self):
+        self._closed = True
+        self._entries.clear()
+        self._audio_count = 0
+        self._ready.set()
+        self._space.set()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "depth": len(self._entries),
+            "audio_depth": self._audio_count,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped_audio": self.dropped_audio,
+            "wait_ms_avg": round(self._wait_total / self.sent * 1000, 3) if self.sent else 0.0,
+            "wait_ms_max": round(self._wait_max * 1000, 3),
+        }
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+from aiohttp import ClientWebSocketResponse
+
+logger = logging.getLogger(__name__)
+
+REALTIME_PATH = "/openai/v1/realtime"
+
+
+class PooledConnection:
+    """An open Realtime WebSocket, possibly already configured with session.update.
+
+    While it sits in the pool a drain task reads it, so the server's pings are
+    answered and a socket the service closed is noticed. What it read (e.g.
+    session.created/updated) is kept in ``pending`` for the call to process first.
+    """
+
+    def __init__(self, ws: ClientWebSocketResponse, session_configured: bool):
+        self.ws = ws
+        self.session_configured = session_configured
+        self.opened_at = time.monotonic()
+        self.pending: list[aiohttp.WSMessage] = []
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def start_draining(self):
+        self._drain_task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        while True:
+            msg = await self.ws.receive()
+            if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                return
+            self.pending.append(msg)
+
+    async def stop_draining(self):
+        # Cancelling receive() leaves unread frames in the socket's queue for the next reader
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            await asyncio.gather(self._drain_task, return_exceptions=True)
+            self._drain_task = None
+
+
+class RealtimeConnectionPool:
+    """Keeps realtime WebSockets ready so an inbound call doesn't wait on TLS + upgrade.
+
+    All connections share one long-lived ``aiohttp.ClientSession`` (keep-alive, DNS
+    cache). With ``size > 0`` the pool holds that many already-opened sockets, each
+    optionally primed with the session.update built by ``session_update_factory``; a
+    background task tops the pool back up after every acquire. Idle sockets are read
+    while they wait (see PooledConnection) and discarded after ``max_idle_seconds``
+    since the service may drop them.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        params: dict[str, str],
+        headers_factory: Callable[[], Awaitable[dict[str, str]]],
+        size: int = 0,
+        session_update_factory: Optional[Callable[[], dict[str, Any]]] = None,
+        max_idle_seconds: float = 60.0,
+    ):
+        self.endpoint = endpoint
+        self.params = params
+        self.headers_factory = headers_factory
+        self.size = size
+        self.session_update_factory = session_update_factory
+        self.max_idle_seconds = max_idle_seconds
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._idle: deque[PooledConnection] = deque()
+        self._refill_needed = asyncio.Event()
+        self._refill_task: Optional[asyncio.Task] = None
+        # Stale sockets being closed in the background; referenced so they finish closing
+        self._closing: set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.opened = 0
+        self.discarded = 0
+        self.open_failures = 0
+
+    def _client_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(keepalive_timeout=300, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(base_url=self.endpoint, connector=connector)
+        return self._session
+
+    async def start(self):
+        self._client_session()
+        if self.size > 0 and self._refill_task is None:
+            self._refill_task = asyncio.create_task(self._refill_loop())
+            self._refill_needed.set()
+
+    async def _open(self, extra_headers: Optional[dict[str, str]] = None, preconfigure: bool = False) -> PooledConnection:
+        headers = dict(extra_headers or {})
+        headers.update(await self.headers_factory())
+        ws = await self._client_session().ws_connect(REALTIME_PATH, headers=headers, params=self.params)
+        self.opened += 1
+        session_configured = False
+        if preconfigure and self.session_update_factory is not None:
+            await ws.send_json(self.session_update_factory())
+            session_configured = True
+        return PooledConnection(ws, session_configured)
+
+    def _is_usable(self, conn: PooledConnection) -> bool:
+        return not conn.ws.closed and time.monotonic() - conn.opened_at < self.max_idle_seconds
+
+    def _discard(self, conn: PooledConnection):
+        self.discarded += 1
+
+        async def close():
+            await conn.stop_draining()
+            await conn.ws.close()
+
+        task = asyncio.create_task(close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def acquire(self, extra_headers: Optional[dict[str, str]] = None) -> PooledConnection:
+        """Hand out a pooled socket if one is ready, otherwise open one now."""
+        while self._idle:
+            conn = self._idle.popleft()
+            if self._is_usable(conn):
+                await conn.stop_draining()
+                self.hits += 1
+                self._refill_needed.set()
+                return conn
+            self._discard(conn)
+
+        self.misses += 1
+        if self.size > 0:
+            self._refill_needed.set()
+        return await self._open(extra_headers)
+
+    async def _refill_loop(self):
+        backoff = 1.0
+        while True:
+            try:
+                await asyncio.wait_for(self._refill_needed.wait(), timeout=self.max_idle_seconds / 2)
+            except asyncio.TimeoutError:
+                pass
+            self._refill_needed.clear()
+
+            # Drop sockets that went stale while waiting, then top up
+            for conn in list(self._idle):
+                if not self._is_usable(conn):
+                    self._idle.remove(conn)
+                    self._discard(conn)
+
+            while len(self._idle) < self.size:
+                try:
+                    conn = await self._open(preconfigure=True)
+                    conn.start_draining()
+                    self._idle.append(conn)
+                    backoff = 1.0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.open_failures += 1
+                    logger.warning("Realtime pool: failed to open connection: %s", e)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+
+    async def close(self):
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            await asyncio.gather(self._refill_task, return_exceptions=True)
+            self._refill_task = None
+        while self._idle:
+            self._discard(self._idle.popleft())
+        await asyncio.gather(*self._closing, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "opened": self.opened,
+            "discarded": self.discarded,
+            "open_failures": self.open_failures,
+        }
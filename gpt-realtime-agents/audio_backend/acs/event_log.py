@@ -0,0 +1,142 @@
+"""Leveled, rate-limited logging of the ACS bridge's Realtime events.
+
+Every log call in the bridge names the Realtime event type it is about and the
+level of the message. Whether it is emitted is decided here, before any string is
+formatted: per-type thresholds, a per-call, per-type rate limit, and full tracing
+for selected call ids. Output goes through the standard logging module (logger
+``acs.events``), whose own level still applies: e.g. DEBUG events only appear if
+the app's logging configuration lets DEBUG through for that logger.
+"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+
+# Events that can arrive every few ms during a call; limited unless overridden (messages/second)
+DEFAULT_RATE_LIMITS = {
+    "response.output_audio.delta": 1.0,
+    "response.output_audio_transcript.delta": 1.0,
+    "input_audio_buffer.append": 1.0,
+}
+
+
+def _parse_level(name: str) -> int:
+    level = logging.getLevelName(name.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level '{name}'")
+    return level
+
+
+def _parse_pairs(raw: str) -> dict[str, str]:
+    # "type=value,type=value"
+    pairs = {}
+    for part in raw.split(","):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            pairs[key.strip()] = value.strip()
+    return pairs
+
+
+class _RateLimiter:
+    """Token bucket allowing ``per_second`` messages with bursts of the same size (at least one)."""
+
+    __slots__ = ("per_second", "burst", "tokens", "updated_at", "suppressed")
+
+    def __init__(self, per_second: float):
+        self.per_second = per_second
+        self.burst = max(per_second, 1.0)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.suppressed = 0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.per_second)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.suppressed += 1
+        return False
+
+
+class EventLog:
+    """Leveled, sampled logging for RTMiddleTier events.
+
+    ``level`` is the default threshold, ``levels`` overrides it per event type,
+    ``rate_limits`` caps messages per second per event type and call, so a noisy
+    call can't use up the budget of the others (suppressed messages are counted and
+    reported with the next one that gets through), and sessions whose call id is
+    in ``trace_call_ids`` log everything, unthrottled. Limiters are kept for the
+    ``max_limiters`` most recently logged (call, type) pairs. ``rate_limits``
+    defaults to ``DEFAULT_RATE_LIMITS``.
+    """
+
+    def __init__(
+        self,
+        level: int = logging.INFO,
+        levels: Optional[dict[str, int]] = None,
+        rate_limits: Optional[dict[str, float]] = None,
+        trace_call_ids: Optional[Iterable[str]] = None,
+        logger: Optional[logging.Logger] = None,
+        max_limiters: int = 10000,
+    ):
+        self.level = level
+        self.levels = dict(levels or {})
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.max_limiters = max_limiters
+        self._limiters: OrderedDict[tuple[str, str], _RateLimiter] = OrderedDict()
+        self.trace_call_ids = frozenset(trace_call_ids or ())
+        self.logger = logger or logging.getLogger("acs.events")
+
+    @classmethod
+    def from_env(cls) -> "EventLog":
+        """Build from environment variables.
+
+        RTMT_LOG_LEVEL        default threshold (default INFO)
+        RTMT_LOG_LEVELS       per-type thresholds, e.g. "session.update=DEBUG,response.done=WARNING"
+        RTMT_LOG_RATE_LIMITS  max messages per second per type and call, e.g. "rate_limits.updated=0.2",
+                              on top of DEFAULT_RATE_LIMITS
+        RTMT_LOG_TRACE_CALLS  comma-separated call connection ids to log in full
+        """
+        level = _parse_level(os.getenv("RTMT_LOG_LEVEL", "INFO"))
+        levels = {k: _parse_level(v) for k, v in _parse_pairs(os.getenv("RTMT_LOG_LEVELS", "")).items()}
+        rate_limits = {**DEFAULT_RATE_LIMITS, **{k: float(v) for k, v in _parse_pairs(os.getenv("RTMT_LOG_RATE_LIMITS", "")).items()}}
+        trace = [c.strip() for c in os.getenv("RTMT_LOG_TRACE_CALLS", "").split(",") if c.strip()]
+        return cls(level, levels, rate_limits, trace)
+
+    def is_traced(self, call_id: str) -> bool:
+        return call_id in self.trace_call_ids
+
+    def _limiter(self, call_id: str, event_type: str) -> Optional[_RateLimiter]:
+        rate = self.rate_limits.get(event_type)
+        if rate is None:
+            return None
+        key = (call_id, event_type)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters[key] = _RateLimiter(rate)
+            if len(self._limiters) > self.max_limiters:
+                self._limiters.popitem(last=False)
+        else:
+            self._limiters.move_to_end(key)
+        return limiter
+
+    def log(self, rt_session: Any, event_type: str, level: int, msg: str, *args: Any) -> None:
+        """Log ``msg % args`` for ``event_type``; formatting only happens if it is emitted."""
+        traced = rt_session is not None and rt_session.trace
+        call_id = rt_session.call_id if rt_session is not None else "-"
+        if not traced:
+            if level < self.levels.get(event_type, self.level):
+                return
+            limiter = self._limiter(call_id, event_type)
+            if limiter is not None:
+                if not limiter.allow():
+                    return
+                if limiter.suppressed:
+                    msg = f"{msg} (+%d suppressed)"
+                    args = (*args, limiter.suppressed)
+                    limiter.suppressed = 0
+        self.logger.log(level, "[%s] %s: " + msg, call_id, event_type, *args)
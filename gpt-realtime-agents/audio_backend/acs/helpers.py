@@ -62,6 +62,100 @@ def transform_acs_to_openai_format(msg_data: Any, model: Optional[str], tools: d
 
     return oai_message
 
+# =============================================================================
+# Audio fast path
+# =============================================================================
+# Audio frames make up almost all of the traffic in both directions (one every ~20 ms
+# per call). Instead of json.loads -> new dict -> json.dumps, the base64 payload is
+# sliced straight out of the raw frame text and wrapped in a prebuilt envelope. Any
+# frame that doesn't look exactly as expected returns None and takes the general path.
+
+_OPENAI_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+_OPENAI_APPEND_SUFFIX = '"}'
+_ACS_AUDIO_PREFIX = '{"kind":"AudioData","audioData":{"data":"'
+_ACS_AUDIO_SUFFIX = '"}}'
+
+# PCM16 mono at 24 kHz, the format used on both sides of the bridge
+PCM24K_BYTES_PER_MS = 48
+_JSON_WHITESPACE = " \t\r\n"
+
+
+def _find_string_field(text: str, key: str, start: int = 0) -> Optional[tuple[int, int]]:
+    """Return (start, end) of the first string value of ``"key"`` in ``text`` at or after ``start``.
+
+    Only plain strings are accepted; values containing escapes return None so the
+    caller falls back to real JSON parsing.
+    """
+    idx = text.find(key, start)
+    if idx < 0:
+        return None
+    i = idx + len(key)
+    n = len(text)
+    while i < n and text[i] in _JSON_WHITESPACE:
+        i += 1
+    if i >= n or text[i] != ":":
+        return None
+    i += 1
+    while i < n and text[i] in _JSON_WHITESPACE:
+        i += 1
+    if i >= n or text[i] != '"':
+        return None
+    end = text.find('"', i + 1)
+    if end < 0 or text.find("\\", i + 1, end) >= 0:
+        return None
+    return i + 1, end
+
+
+def acs_audio_span(text: str) -> Optional[tuple[int, int]]:
+    """Span of the base64 audio in a raw ACS ``AudioData`` frame, or None for any other frame."""
+    kind = _find_string_field(text, '"kind"')
+    if kind is None or text[kind[0]:kind[1]] != "AudioData":
+        return None
+    audio_data = text.find('"audioData"')
+    if audio_data < 0:
+        return None
+    return _find_string_field(text, '"data"', audio_data + len('"audioData"'))
+
+
+def openai_audio_append(audio: str) -> str:
+    """Serialise ``input_audio_buffer.append`` for base64 audio that needs no escaping."""
+    return "".join((_OPENAI_APPEND_PREFIX, audio, _OPENAI_APPEND_SUFFIX))
+
+
+def acs_audio_to_openai(text: str) -> Optional[str]:
+    """Rewrap a raw ACS ``AudioData`` frame as ``input_audio_buffer.append`` without parsing it."""
+    data = acs_audio_span(text)
+    if data is None:
+        return None
+    return openai_audio_append(text[data[0]:data[1]])
+
+
+def openai_audio_delta_span(text: str) -> Optional[tuple[int, int]]:
+    """Locate the base64 payload of a raw ``response.output_audio.delta`` event, or None."""
+    event_type = _find_string_field(text, '"type"')
+    if event_type is None or text[event_type[0]:event_type[1]] != "response.output_audio.delta":
+        return None
+    return _find_string_field(text, '"delta"')
+
+
+def openai_audio_delta_item(text: str) -> Optional[tuple[str, tuple[int, int]]]:
+    """Like ``openai_audio_delta_span`` but also return the event's ``item_id`` ("" if absent)."""
+    delta = openai_audio_delta_span(text)
+    if delta is None:
+        return None
+    item = _find_string_field(text, '"item_id"')
+    return (text[item[0]:item[1]] if item is not None else ""), delta
+
+
+def acs_audio_data(audio: str) -> str:
+    """Serialise an ACS ``AudioData`` frame for base64 audio that needs no escaping."""
+    return "".join((_ACS_AUDIO_PREFIX, audio, _ACS_AUDIO_SUFFIX))
+
+
+def base64_decoded_length(audio: str) -> int:
+    return len(audio) * 3 // 4 - audio[-2:].count("=")
+
+
 def transform_openai_to_acs_format(msg_data: Any) -> Optional[Any]:
     """
     Transforms websocket message data from the OpenAI Realtime API format into the Azure Communication Services (ACS) format.
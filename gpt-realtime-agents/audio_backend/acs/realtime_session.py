@@ -0,0 +1,113 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Optional
+
+from tools import RTToolCall
+from helpers import PCM24K_BYTES_PER_MS
+
+
+class PlaybackTracker:
+    """How much of the model's output audio has reached the caller, per output item.
+
+    Fed by the to-client BridgeQueue as frames are actually written to ACS. ACS plays
+    audio in real time after buffering some of it, so the amount heard is bounded both
+    by what was sent and by the time since the item's first frame went out, less that
+    buffering.
+    """
+
+    def __init__(self):
+        self.item_id: Optional[str] = None
+        self.bytes_sent = 0
+        self.first_sent_at = 0.0
+        # Latest item whose audio was queued, possibly not sent yet
+        self.queued_item_id: Optional[str] = None
+        # Latest message item the model started, possibly without any audio yet
+        self.output_item_id: Optional[str] = None
+        # Items truncated on barge-in; their remaining deltas are dropped
+        self.truncated_items: set[str] = set()
+
+    def on_audio_sent(self, tag: tuple[str, int]):
+        item_id, nbytes = tag
+        if item_id != self.item_id:
+            self.item_id = item_id
+            self.bytes_sent = 0
+            self.first_sent_at = time.monotonic()
+        self.bytes_sent += nbytes
+
+    def sent_ms(self) -> int:
+        return self.bytes_sent // PCM24K_BYTES_PER_MS
+
+    def heard_ms(self, buffer_ms: float = 0) -> int:
+        """Estimated ms of the current item the caller has heard, given ``buffer_ms`` of ACS playback buffering."""
+        elapsed_ms = (time.monotonic() - self.first_sent_at) * 1000 - buffer_ms
+        return max(min(self.sent_ms(), int(elapsed_ms)), 0)
+
+
+class RealtimeSession:
+    """Per-connection state of one bridged call.
+
+    A single RTMiddleTier serves every /api/realtime-acs WebSocket in the process, so
+    anything that changes during a call (pending tool calls, background tasks, the
+    voice, counters) lives here instead of on the middle tier.
+    """
+
+    def __init__(self, call_id: Optional[str], is_acs_audio_stream: bool, selected_voice: str):
+        self.call_id = call_id or uuid.uuid4().hex
+        self.is_acs_audio_stream = is_acs_audio_stream
+        self.selected_voice = selected_voice
+        self.started_at = time.monotonic()
+        # Set when the realtime socket came from the pool already primed with session.update
+        self.session_preconfigured = False
+        # Log every event of this call regardless of levels and sampling (EventLog trace list)
+        self.trace = False
+
+        # Function calls announced by the model, keyed by call_id
+        self.tools_pending: dict[str, RTToolCall] = {}
+        # Tool call tasks in flight, grouped by the response that requested them
+        self.tool_tasks: dict[str, list[asyncio.Task]] = {}
+        # Every background task owned by this call, cancelled when it hangs up
+        self.background_tasks: set[asyncio.Task] = set()
+        # Outgoing BridgeQueues by direction, set up once the realtime socket is connected
+        self.queues: dict[str, Any] = {}
+        # AudioCoalescer for the ACS -> model direction, when enabled
+        self.coalescer: Any = None
+        self.playback = PlaybackTracker()
+        # Between response.created and response.done; a barge-in then also cancels the response
+        self.response_active = False
+
+        self.messages_from_client = 0
+        self.messages_from_server = 0
+        self.tool_calls = 0
+        self.tool_output_bytes = 0
+        self.tool_errors = 0
+        self.barge_ins = 0
+
+    def spawn(self, coro: Any) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    async def cancel_background_tasks(self):
+        for task in list(self.background_tasks):
+            task.cancel()
+        if self.background_tasks:
+            await asyncio.gather(*self.background_tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "call_id": self.call_id,
+            "duration_s": round(time.monotonic() - self.started_at, 3),
+            "voice": self.selected_voice,
+            "messages_from_client": self.messages_from_client,
+            "messages_from_server": self.messages_from_server,
+            "tool_calls": self.tool_calls,
+            "tool_errors": self.tool_errors,
+            "tool_output_bytes": self.tool_output_bytes,
+            "barge_ins": self.barge_ins,
+            "tools_pending": len(self.tools_pending),
+            "background_tasks": len(self.background_tasks),
+            "queues": {name: queue.stats() for name, queue in self.queues.items()},
+            "coalescer": self.coalescer.stats() if self.coalescer is not None else None,
+        }
@@ -1,33 +1,43 @@
 import sys
 from pathlib import Path
-print(f"Sys importing {str(Path(__file__).parent )}")
 sys.path.insert(0, str(Path(__file__).parent ))
 
-from unittest import case
 import aiohttp
 import asyncio
 import json
-from typing import Any, Optional
+from logging import DEBUG, INFO, WARNING
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 from aiohttp import ClientWebSocketResponse, web
-from azure.identity import DefaultAzureCredential, AzureDeveloperCliCredential, get_bearer_token_provider
+from azure.identity import DefaultAzureCredential, AzureDeveloperCliCredential
 from azure.core.credentials import AzureKeyCredential
 from tools import *
-from helpers import transform_acs_to_openai_format, transform_openai_to_acs_format
-from rich.console import Console
-console = Console()
+from helpers import (transform_acs_to_openai_format, transform_openai_to_acs_format,
+                     acs_audio_span, acs_audio_to_openai, acs_audio_data, base64_decoded_length,
+                     openai_audio_delta_item, openai_audio_delta_span)
+from realtime_session import RealtimeSession
+from connection_pool import RealtimeConnectionPool
+from token_cache import AsyncTokenCache
+from simulation import current_session
+from tool_runtime import invoke_tool, model_output, output_encoder, result_cache, tool_policy
+from event_log import EventLog
+from bridge_queue import BridgeQueue, OVERFLOW_DROP_OLDEST
+from audio_coalescer import AudioCoalescer
 
 
 
 class RTMiddleTier:
+    """Bridges client WebSockets (ACS or web) to the Azure OpenAI Realtime API.
+
+    One instance serves every connection in the process. It only holds configuration
+    and the tool table, which becomes read-only once the first call connects; all
+    per-call state lives in a RealtimeSession.
+    """
     endpoint: str
     deployment: str
     key: Optional[str] = None
     selected_voice: str = "alloy"
 
-    # Tools are server-side only for now, though the case could be made for client-side tools
-    # in addition to server-side tools that are invisible to the client
-    tools: dict[str, Tool] = {}
-
     # Server-enforced configuration, if set, these will override the client's configuration
     # Typically at least the model name and system message will be set by the server
     model: Optional[str] = None
@@ -36,19 +46,198 @@ class RTMiddleTier:
     max_tokens: Optional[int] = None
     disable_audio: Optional[bool] = None
 
-    _tools_pending: dict[str, RTToolCall] = {}
-    _token_provider = None
+    # Per-direction send queues (see BridgeQueue): audio frames held before dropping, and the overflow policy
+    queue_max_audio: int = 100
+    queue_max_control: int = 1000
+    queue_overflow: str = OVERFLOW_DROP_OLDEST
+
+    # Coalesce ACS audio frames into appends of up to this many ms of audio (0 disables), see AudioCoalescer
+    audio_coalesce_ms: float = 0
+    audio_coalesce_max_delay_ms: Optional[float] = None
+
+    # Audio ACS holds before playing it; on barge-in the caller is assumed not to have heard that much of what was sent
+    acs_playback_buffer_ms: float = 200
 
-    def __init__(self, endpoint: str, deployment: str, credentials: AzureKeyCredential | AzureDeveloperCliCredential | DefaultAzureCredential):
+    _token_cache: Optional[AsyncTokenCache] = None
+
+    def __init__(self, endpoint: str, deployment: str, credentials: AzureKeyCredential | AsyncTokenCache | AzureDeveloperCliCredential | DefaultAzureCredential):
         self.endpoint = endpoint
         self.deployment = deployment
+
+        # Tools are server-side only for now, though the case could be made for client-side tools
+        # in addition to server-side tools that are invisible to the client.
+        # Mutable while registering at startup, frozen into a read-only mapping by freeze_tools()
+        self.tools: dict[str, Tool] | Mapping[str, Tool] = {}
+        self._tool_schemas: list[Any] = []
+        self._tools_frozen = False
+
+        # Calls currently bridged by this instance, keyed by call id
+        self.active_sessions: dict[str, RealtimeSession] = {}
+
+        # Replaced with EventLog.from_env() at startup by the host application
+        self.events = EventLog()
+
+        # Shared ClientSession plus optionally pre-opened realtime sockets, created by start()
+        self._connections: Optional[RealtimeConnectionPool] = None
+
         if isinstance(credentials, AzureKeyCredential):
             self.key = credentials.key
+        elif isinstance(credentials, AsyncTokenCache):
+            self._token_cache = credentials
         else:
-            self._token_provider = get_bearer_token_provider(credentials, "https://cognitiveservices.azure.com/.default")
-            self._token_provider() # Warm up during startup so we have a token cached when the first request arrives
-
-    async def _process_message_to_client(self, message: Any, client_ws: web.WebSocketResponse, server_ws: ClientWebSocketResponse, is_acs_audio_stream: bool):
+            # Warmed up and refreshed in the background by start()
+            self._token_cache = AsyncTokenCache(credentials)
+
+    def freeze_tools(self):
+        """Make the tool table immutable; it is shared by every concurrent call."""
+        if self._tools_frozen:
+            return
+        self.tools = MappingProxyType(dict(self.tools))
+        self._tool_schemas = [tool.schema for tool in self.tools.values()]
+        self._tools_frozen = True
+
+    async def start(self, pool_size: int = 0, presend_session_update: bool = True, max_idle_seconds: float = 60.0):
+        """Open the shared ClientSession and start pre-warming realtime connections.
+
+        Call after the tools are registered: pooled sockets are primed with a
+        session.update carrying the current tool schemas and instructions.
+        """
+        self.freeze_tools()
+        if self._token_cache is not None:
+            await self._token_cache.start()
+        if self._connections is not None:
+            await self._connections.close()
+        self._connections = RealtimeConnectionPool(
+            self.endpoint,
+            self._realtime_params(),
+            self._auth_headers,
+            size=pool_size,
+            session_update_factory=self._session_update_event if presend_session_update else None,
+            max_idle_seconds=max_idle_seconds,
+        )
+        await self._connections.start()
+
+    async def close(self):
+        if self._connections is not None:
+            await self._connections.close()
+            self._connections = None
+
+    def connection_stats(self) -> dict[str, Any]:
+        return self._connections.stats() if self._connections is not None else {}
+
+    def _realtime_params(self) -> dict[str, str]:
+        return { "model": self.deployment }
+
+    async def _auth_headers(self) -> dict[str, str]:
+        # Setup authentication headers for the OpenAI Realtime API WebSocket connection
+        if self.key is not None:
+            return { "api-key": self.key }
+        if self._token_cache is not None:
+            return { "Authorization": f"Bearer {await self._token_cache.get_token()}" }
+        raise ValueError("No token provider available")
+
+    def _apply_session_config(self, session: dict[str, Any]) -> dict[str, Any]:
+        # session["voice"] = self.selected_voice
+        # if self.temperature is not None:
+        #     session["temperature"] = self.temperature
+        # if self.max_tokens is not None:
+        #     session["max_response_output_tokens"] = self.max_tokens
+        # if self.disable_audio is not None:
+        #     session["disable_audio"] = self.disable_audio
+        session["instructions"] = self.system_message
+        session["tool_choice"] = "auto" if len(self.tools) > 0 else "none"
+        session["tools"] = self._tool_schemas
+        session["type"] = "realtime"
+        return session
+
+    def _session_update_event(self) -> dict[str, Any]:
+        return { "type": "session.update", "session": self._apply_session_config({}) }
+
+    async def _execute_tool_call(self, item: dict, server_ws: BridgeQueue, rt_session: RealtimeSession):
+        # Runs as a background task so a slow tool never blocks relaying other server events (audio, barge-in)
+        tool = self.tools.get(item["name"])
+        rt_session.tool_calls += 1
+        current_session.set(rt_session.call_id)  # Task-local: simulated tools draw from this call's RNG
+        try:
+            if tool is None:
+                raise KeyError(f"Unknown tool '{item['name']}'")
+            args = item["arguments"]
+            self.events.log(rt_session, "function_call", INFO, "executing %s (call_id: %s) with args: %s", item["name"], item["call_id"], args)
+            policy = tool_policy(item["name"], tool.policy)
+            results = result_cache(item["name"], tool.cache)
+            result = await invoke_tool(item["name"], item["call_id"], json.loads(args), tool.target, policy, results=results)
+            # Phone callers have no visual channel: the model only gets the compact view
+            output = model_output(result, tool.model_view)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            rt_session.tool_errors += 1
+            self.events.log(rt_session, "function_call", WARNING, "%s failed (call_id: %s): %s", item["name"], item["call_id"], e)
+            output = {"error": f"{item['name']} failed: {e}"}
+        # Unknown tool names come from the model; they share one encoder instead of adding one each
+        encoder = output_encoder(item["name"], tool.output) if tool is not None else output_encoder("<unknown>")
+        truncated = encoder.truncated
+        encoded = encoder.encode(output)
+        size = len(encoded.encode("utf-8"))
+        rt_session.tool_output_bytes += size
+        self.events.log(rt_session, "function_call_output", INFO, "sending %d bytes to model (call_id: %s)%s", size, item["call_id"],
+                        ", truncated to fit the byte budget" if encoder.truncated != truncated else "")
+        self.events.log(rt_session, "function_call_output", DEBUG, "output (call_id: %s): %s", item["call_id"], encoded)
+        await server_ws.send_json({
+            "type": "conversation.item.create",
+            "item": {
+                "type": "function_call_output",
+                "call_id": item["call_id"],
+                "output": encoded
+            }
+        })
+
+    async def _request_response_after_tools(self, tool_tasks: list[asyncio.Task], server_ws: BridgeQueue, rt_session: RealtimeSession):
+        # Every function_call_output of the response must be sent before asking the model to continue
+        await asyncio.gather(*tool_tasks, return_exceptions=True)
+        self.events.log(rt_session, "response.create", INFO, "%d function calls completed, requesting new response from model", len(tool_tasks))
+        await server_ws.send_json({
+            "type": "response.create"
+        })
+
+    async def _barge_in(self, client_ws: BridgeQueue, server_ws: BridgeQueue, rt_session: RealtimeSession):
+        # The caller started talking over the model. Audio still queued for ACS is discarded here (StopAudio,
+        # sent by the caller of this method, flushes what ACS has buffered), the model is told how much of its
+        # answer was actually heard, and generation of the rest is cancelled.
+        rt_session.barge_ins += 1
+        discarded = client_ws.clear_audio()
+        playback = rt_session.playback
+
+        truncate: list[tuple[str, int]] = []
+        if playback.item_id is not None and playback.item_id not in playback.truncated_items:
+            heard_ms = playback.heard_ms(self.acs_playback_buffer_ms)
+            # Interrupted if it is still being generated, or some of it was not played yet (here or in ACS)
+            generating = rt_session.response_active and playback.item_id == playback.output_item_id
+            if generating or discarded or heard_ms < playback.sent_ms():
+                truncate.append((playback.item_id, heard_ms))
+        if playback.queued_item_id not in (None, playback.item_id) and playback.queued_item_id not in playback.truncated_items:
+            # Queued but none of it reached ACS
+            truncate.append((playback.queued_item_id, 0))
+        if (rt_session.response_active and playback.output_item_id not in (None, playback.item_id, playback.queued_item_id)
+                and playback.output_item_id not in playback.truncated_items):
+            # Started but no audio yet: nothing to truncate, just never play it
+            playback.truncated_items.add(playback.output_item_id)
+
+        for item_id, audio_end_ms in truncate:
+            playback.truncated_items.add(item_id)
+            await server_ws.send_json({
+                "type": "conversation.item.truncate",
+                "item_id": item_id,
+                "content_index": 0,
+                "audio_end_ms": audio_end_ms,
+            })
+        if rt_session.response_active:
+            await server_ws.send_json({ "type": "response.cancel" })
+
+        self.events.log(rt_session, "barge_in", INFO, "discarded %d queued frames, truncated %s, cancelled response: %s",
+                        discarded, truncate, rt_session.response_active)
+
+    async def _process_message_to_client(self, message: Any, client_ws: BridgeQueue, server_ws: BridgeQueue, rt_session: RealtimeSession):
         # This method basically follows a 3-step process:
         # 1. Check if we need to react to the message (e.g. a function call needs to me made)
         # 2. Check if we need to transform the message to a different format (e.g. when we use Azure Communication Services)
@@ -57,7 +246,7 @@ class RTMiddleTier:
         if message is not None:
             match message["type"]:
                 case "error":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] error:", message)
+                    self.events.log(rt_session, "error", WARNING, "from model: %s", message)
 
                 case "session.created":
                     session = message["session"]
@@ -77,20 +266,22 @@ class RTMiddleTier:
                     })
 
                 case "response.output_item.added":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.output_item.added")
+                    self.events.log(rt_session, "response.output_item.added", DEBUG, "from model")
                     if "item" in message and message["item"]["type"] == "function_call":
                         message = None
+                    elif "item" in message and message["item"]["type"] == "message":
+                        rt_session.playback.output_item_id = message["item"].get("id")
 
                 case "conversation.item.added":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] conversation.item.created")
+                    self.events.log(rt_session, "conversation.item.added", DEBUG, "from model")
                     if "item" in message and message["item"]["type"] == "function_call":
                         item = message["item"]
-                        console.log(f"[SERVER EVENT] conversation.item.created::Function call initiated: {item.get('name', 'unknown')} (call_id: {item.get('call_id', 'unknown')})")
-                        if item["call_id"] not in self._tools_pending:
-                            self._tools_pending[item["call_id"]] = RTToolCall(item["call_id"], message["previous_item_id"])
+                        self.events.log(rt_session, "conversation.item.added", DEBUG, "function call announced: %s (call_id: %s)", item.get("name", "unknown"), item.get("call_id", "unknown"))
+                        if item["call_id"] not in rt_session.tools_pending:
+                            rt_session.tools_pending[item["call_id"]] = RTToolCall(item["call_id"], message["previous_item_id"])
                         message = None
                     elif "item" in message and message["item"]["type"] == "function_call_output":
-                        console.log(f"[SERVER EVENT] Function call output received (call_id: {message['item'].get('call_id', 'unknown')})")
+                        self.events.log(rt_session, "conversation.item.added", DEBUG, "function call output received (call_id: %s)", message["item"].get("call_id", "unknown"))
                         message = None
 
                 case "response.function_call_arguments.delta":
@@ -98,39 +289,18 @@ class RTMiddleTier:
                     message = None
 
                 case "response.function_call_arguments.done":
-                    console.log("[SERVER EVENT] Function call arguments complete", message)
+                    self.events.log(rt_session, "response.function_call_arguments.done", DEBUG, "from model: %s", message)
                     message = None
 
                 case "response.output_item.done":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.output_item.done")
+                    self.events.log(rt_session, "response.output_item.done", DEBUG, "from model")
                     if "item" in message and message["item"]["type"] == "function_call":
                         item = message["item"]
-                        console.log(f"[SERVER EVENT] Function call initiated: {item.get('name', 'unknown')} (call_id: {item.get('call_id', 'unknown')})")
-                        tool_call = self._tools_pending[message["item"]["call_id"]]
-                        tool = self.tools[item["name"]]
-                        args = item["arguments"]
-                        console.log(f"[SERVER EVENT] Executing function: {item['name']} with args: {args}")
-                        result = await tool.target(json.loads(args))
-                        console.log(result)
-
-                        console.log({
-                            "type": "conversation.item.create",
-                            "item": {
-                                "type": "function_call_output",
-                                "call_id": item["call_id"],
-                                "output": str(result)
-                            }
-                        })
-
-                        console.log(f"[CLIENT EVENT] Sending function_call_output to server (call_id: {item['call_id']})")
-                        await server_ws.send_json({
-                            "type": "conversation.item.create",
-                            "item": {
-                                "type": "function_call_output",
-                                "call_id": item["call_id"],
-                                "output": str(result)
-                            }
-                        })
+                        self.events.log(rt_session, "response.output_item.done", INFO, "function call requested: %s (call_id: %s)", item.get("name", "unknown"), item.get("call_id", "unknown"))
+                        # Don't await the tool here: calls of one response run in parallel and the
+                        # event loop keeps relaying audio while they execute
+                        task = rt_session.spawn(self._execute_tool_call(item, server_ws, rt_session))
+                        rt_session.tool_tasks.setdefault(message.get("response_id", ""), []).append(task)
 
                         # if result.destination == ToolResultDirection.TO_CLIENT:
                         #     # Only send extra messages to clients that are not ACS audio streams
@@ -149,13 +319,15 @@ class RTMiddleTier:
                         message = None
 
                 case "response.done":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.done")
-                    if len(self._tools_pending) > 0:
-                        console.log(f"[CLIENT EVENT] Function calls completed ({len(self._tools_pending)} tools), requesting new response from model")
-                        self._tools_pending.clear() # Any chance tool calls could be interleaved across different outstanding responses?
-                        await server_ws.send_json({
-                            "type": "response.create"
-                        })
+                    self.events.log(rt_session, "response.done", DEBUG, "from model")
+                    rt_session.response_active = False
+                    response_tasks = rt_session.tool_tasks.pop(message.get("response", {}).get("id", ""), None)
+                    if response_tasks is None and "" in rt_session.tool_tasks:
+                        response_tasks = rt_session.tool_tasks.pop("")
+                    if response_tasks:
+                        rt_session.tools_pending.clear()
+                        # response.create goes out once all of this response's tool calls have finished
+                        rt_session.spawn(self._request_response_after_tools(response_tasks, server_ws, rt_session))
 
                     if "response" in message:
                         replace = False
@@ -167,199 +339,254 @@ class RTMiddleTier:
                         if replace:
                             message = json.loads(json.dumps(message)) # TODO: This is a hack to make the message a dict again. Find out, what 'replace' does
 
-                # This happens when OpenAI detects, that the user starts speaking and won't continue to speak and send audio.
-                # In this case, we don't want to send the unplayed audio buffer to the client anymore.
-                # For the web app, we pass this message to the client, so it can clear the audio buffer.
-                # For Azure Communication Services, we don't need to do anything here. The transform_openai_to_acs_format function
-                # will handle this message and clear the audio buffer.
+                # The caller started speaking, possibly over the model's answer (barge-in).
+                # For the web app, we pass this message to the client, so it can clear its audio buffer.
+                # For Azure Communication Services, _barge_in drops the audio still queued for ACS,
+                # truncates the interrupted item at what the caller heard and cancels the active
+                # response; the message itself then becomes a StopAudio for ACS in
+                # transform_openai_to_acs_format, which flushes what ACS has buffered.
                 case "input_audio_buffer.speech_started":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] input_audio_buffer.speech_started")
-
-                    # TODO: Add Truncation
-                    # if message["item_id"]:
-                    #     await server_ws.send_json({
-                    #         "type": "conversation.item.truncate",
-                    #         "item_id": message['item_id'],
-                    #         "audio_end_ms": ??? # Set this to let the model know, how much audio has been played (https://platform.openai.com/docs/api-reference/realtime-client-events/conversation/item/truncate)
-                    #     })
-                    pass
+                    self.events.log(rt_session, "input_audio_buffer.speech_started", INFO, "from model")
+                    if rt_session.is_acs_audio_stream:
+                        await self._barge_in(client_ws, server_ws, rt_session)
 
                 case "input_audio_buffer.speech_stopped":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] input_audio_buffer.speech_stopped")
+                    # End of the caller's turn: don't hold back the tail of their audio
+                    if rt_session.coalescer is not None:
+                        await rt_session.coalescer.flush()
+                    self.events.log(rt_session, "input_audio_buffer.speech_stopped", DEBUG, "from model")
 
                 case "input_audio_buffer.committed":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] input_audio_buffer.committed")
+                    self.events.log(rt_session, "input_audio_buffer.committed", DEBUG, "from model")
 
                 case "input_audio_buffer.cleared":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] input_audio_buffer.cleared")
+                    self.events.log(rt_session, "input_audio_buffer.cleared", DEBUG, "from model")
 
                 case "conversation.item.input_audio_transcription.completed":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] conversation.item.input_audio_transcription.completed:", message.get("transcript", ""))
+                    self.events.log(rt_session, "conversation.item.input_audio_transcription.completed", INFO, "%s", message.get("transcript", ""))
 
                 case "conversation.item.input_audio_transcription.failed":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] conversation.item.input_audio_transcription.failed:", message)
+                    self.events.log(rt_session, "conversation.item.input_audio_transcription.failed", WARNING, "%s", message)
 
                 case "conversation.item.added":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] conversation.item.added")
+                    self.events.log(rt_session, "conversation.item.added", DEBUG, "from model")
 
                 case "conversation.item.done":
-                    console.log(f"[RECEIVED FROM SERVER  - MODEL] conversation.item.done {message}")
+                    self.events.log(rt_session, "conversation.item.done", DEBUG, "from model: %s", message)
                     
                 case "response.created":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.created")
+                    self.events.log(rt_session, "response.created", DEBUG, "from model")
+                    rt_session.response_active = True
 
                 case "response.output_item.added":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.output_item.added")
+                    self.events.log(rt_session, "response.output_item.added", DEBUG, "from model")
 
                 case "response.content_part.added":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.content_part.added")
+                    self.events.log(rt_session, "response.content_part.added", DEBUG, "from model")
 
                 case "response.output_audio_transcript.delta":
                     # console.log("[RECEIVED FROM SERVER  - MODEL] response.output_audio_transcript.delta:", message.get("delta", ""))
                     pass
 
                 case "response.output_audio_transcript.done":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.output_audio_transcript.done:", message.get("transcript", ""))
+                    self.events.log(rt_session, "response.output_audio_transcript.done", INFO, "%s", message.get("transcript", ""))
 
                 case "response.output_audio.delta":
                     # console.log("[RECEIVED FROM SERVER  - MODEL] response.output_audio.delta")
                     pass
 
                 case "response.output_audio.done":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.output_audio.done")
+                    self.events.log(rt_session, "response.output_audio.done", DEBUG, "from model")
 
                 case "response.output_text.delta":
                     pass
                     # console.log("[RECEIVED FROM SERVER  - MODEL] response.output_text.delta:", message.get("delta", ""))
 
                 case "response.content_part.done":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.content_part.done", message.get("transcript", ""))
+                    self.events.log(rt_session, "response.content_part.done", DEBUG, "from model")
 
                 case "response.output_audio.delta":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.output_audio.delta")
+                    self.events.log(rt_session, "response.output_audio.delta", DEBUG, "from model")
 
                 case "response.output_text.done":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] response.output_text.done:", message.get("text", ""))
+                    self.events.log(rt_session, "response.output_text.done", INFO, "%s", message.get("text", ""))
 
                 case "rate_limits.updated":
-                    console.log("[RECEIVED FROM SERVER  - MODEL] rate_limits.updated")
+                    self.events.log(rt_session, "rate_limits.updated", DEBUG, "from model")
 
                 case _:
-                    print("_process_message_to_client::Unhandled message type:", message)
+                    self.events.log(rt_session, message["type"], INFO, "unhandled event from model: %s", message)
 
         # Transform the message to the Azure Communication Services format,
         # if it comes from the OpenAI realtime stream.
-        if is_acs_audio_stream and message is not None:
+        if rt_session.is_acs_audio_stream and message is not None:
             message = transform_openai_to_acs_format(message)
 
         if message is not None:
             await client_ws.send_str(json.dumps(message))
 
-    async def _process_message_to_server(self, data: Any, ws: web.WebSocketResponse, server_ws: ClientWebSocketResponse, is_acs_audio_stream: bool):
+    async def _process_message_to_server(self, data: Any, ws: BridgeQueue, server_ws: BridgeQueue, rt_session: RealtimeSession):
         # If the message comes from the Azure Communication Services audio stream, transform it to the OpenAI Realtime API format first
-        if (is_acs_audio_stream):
-            data = transform_acs_to_openai_format(data, self.model, self.tools, self.system_message, self.temperature, self.max_tokens, self.disable_audio, self.selected_voice)
+        if (rt_session.is_acs_audio_stream):
+            data = transform_acs_to_openai_format(data, self.model, self.tools, self.system_message, self.temperature, self.max_tokens, self.disable_audio, rt_session.selected_voice)
 
         if data is not None:
             match data["type"]:
                 case "session.update":
-                    session = data.get("session", {})
-                    # session["voice"] = self.selected_voice
-                    # if self.system_message is not None:
-                    #     session["instructions"] = self.system_message
-                    # if self.temperature is not None:
-                    #     session["temperature"] = self.temperature
-                    # if self.max_tokens is not None:
-                    #     session["max_response_output_tokens"] = self.max_tokens
-                    # if self.disable_audio is not None:
-                    #     session["disable_audio"] = self.disable_audio
-                    session["instructions"] = self.system_message
-                    session["tool_choice"] = "auto" if len(self.tools) > 0 else "none"
-                    session["tools"] = [tool.schema for tool in self.tools.values()]
-                    session["type"] = "realtime"
-                    data["session"] = session
-                    console.log("[RECEIVED FROM CLIENT - ACS] session.update", data)
+                    if rt_session.is_acs_audio_stream and rt_session.session_preconfigured:
+                        # The pooled connection was already sent this exact configuration
+                        rt_session.session_preconfigured = False
+                        self.events.log(rt_session, "session.update", DEBUG, "from client, already applied by connection pool")
+                        return
+                    data["session"] = self._apply_session_config(data.get("session", {}))
+                    self.events.log(rt_session, "session.update", DEBUG, "from client: %s", data)
 
                 case "input_audio_buffer.commit":
-                    console.log("[RECEIVED FROM CLIENT - ACS] input_audio_buffer.commit")
+                    self.events.log(rt_session, "input_audio_buffer.commit", DEBUG, "from client")
 
                 case "input_audio_buffer.clear":
-                    console.log("[RECEIVED FROM CLIENT - ACS] input_audio_buffer.clear")
+                    self.events.log(rt_session, "input_audio_buffer.clear", DEBUG, "from client")
 
                 case "conversation.item.create":
-                    console.log("[RECEIVED FROM CLIENT - ACS] conversation.item.create")
+                    self.events.log(rt_session, "conversation.item.create", DEBUG, "from client")
 
                 case "conversation.item.truncate":
-                    console.log("[RECEIVED FROM CLIENT - ACS] conversation.item.truncate")
+                    self.events.log(rt_session, "conversation.item.truncate", DEBUG, "from client")
 
                 case "conversation.item.added":
-                    console.log("[RECEIVED FROM CLIENT - ACS] conversation.item.added")
+                    self.events.log(rt_session, "conversation.item.added", DEBUG, "from client")
 
                 case "conversation.item.done":
-                    console.log("[RECEIVED FROM CLIENT - ACS] conversation.item.done")
+                    self.events.log(rt_session, "conversation.item.done", DEBUG, "from client")
 
                 case "conversation.item.delete":
-                    console.log("[RECEIVED FROM CLIENT - ACS] conversation.item.delete")
+                    self.events.log(rt_session, "conversation.item.delete", DEBUG, "from client")
 
                 case "response.create":
-                    console.log("[RECEIVED FROM CLIENT - ACS] response.create")
+                    self.events.log(rt_session, "response.create", DEBUG, "from client")
 
                 case "response.cancel":
-                    console.log("[RECEIVED FROM CLIENT - ACS] response.cancel")
+                    self.events.log(rt_session, "response.cancel", DEBUG, "from client")
 
                 case _:
                     if data["type"] != "input_audio_buffer.append": 
-                        console.log(f"[RECEIVED FROM CLIENT - ACS] Unhandled: {data['type']}")
+                        self.events.log(rt_session, data["type"], INFO, "unhandled event from client")
 
             await server_ws.send_str(json.dumps(data))
 
     async def forward_messages(self, ws: web.WebSocketResponse, is_acs_audio_stream: bool):
-        async with aiohttp.ClientSession(base_url=self.endpoint) as session:
-            params = { "api-version": "2024-10-01-preview", "deployment": self.deployment }
-            params = { "api-version": "2025-04-01-preview", "deployment": self.deployment }
-            params = { "model": self.deployment }
-
-            headers = {}
-            if "x-ms-client-request-id" in ws.headers:
-                headers["x-ms-client-request-id"] = ws.headers["x-ms-client-request-id"]
-
-            # Setup authentication headers for the OpenAI Realtime API WebSocket connection
-            if self.key is not None:
-                headers = { "api-key": self.key }
-            else:
-                if self._token_provider is not None:
-                    headers = { "Authorization": f"Bearer {self._token_provider()}" } # NOTE: no async version of token provider, maybe refresh token on a timer?
-                else:
-                    raise ValueError("No token provider available")
-
-            console.log("Connecting to OpenAI Realtime API WebSocket...")
-            console.log(f"Headers: {headers}")
-            console.log(f"Params: {params}")
-            console.log(f"Endpoint: {self.endpoint}/openai/v1/realtime")
-
-            
-            # Connect to the OpenAI Realtime API WebSocket
-            async with session.ws_connect("/openai/v1/realtime", headers=headers, params=params) as target_ws:
-                async def from_client_to_server():
-                    # Messages from Azure Communication Services or the Web Frontend are forwarded to the OpenAI Realtime API
-                    async for msg in ws:
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            data = json.loads(msg.data)
-                            await self._process_message_to_server(data, ws, target_ws, is_acs_audio_stream)
+        self.freeze_tools()
+        rt_session = RealtimeSession(ws.headers.get("x-ms-call-connection-id"), is_acs_audio_stream, self.selected_voice)
+        rt_session.trace = self.events.is_traced(rt_session.call_id)
+        self.active_sessions[rt_session.call_id] = rt_session
+        try:
+            await self._forward_messages(ws, rt_session)
+        finally:
+            # The call hung up: abandon any tool calls still running for it
+            await rt_session.cancel_background_tasks()
+            self.active_sessions.pop(rt_session.call_id, None)
+
+    async def _forward_messages(self, ws: web.WebSocketResponse, rt_session: RealtimeSession):
+        if self._connections is None:
+            await self.start()
+
+        headers = {}
+        if "x-ms-client-request-id" in ws.headers:
+            headers["x-ms-client-request-id"] = ws.headers["x-ms-client-request-id"]
+
+        # Take a pre-opened OpenAI Realtime API WebSocket from the pool, or connect now
+        conn = await self._connections.acquire(headers)
+        rt_session.session_preconfigured = conn.session_configured
+        self.events.log(rt_session, "bridge.connected", INFO, "connected to %s/openai/v1/realtime, pool: %s", self.endpoint, self._connections.stats())
+
+        target_ws = conn.ws
+        # Readers only enqueue; each direction has its own writer so a slow peer can't stall the other side
+        to_server = BridgeQueue("to_server", target_ws, self.queue_max_audio, self.queue_max_control, self.queue_overflow)
+        to_client = BridgeQueue("to_client", ws, self.queue_max_audio, self.queue_max_control, self.queue_overflow,
+                                on_audio_sent=rt_session.playback.on_audio_sent)
+        rt_session.queues = { "to_server": to_server, "to_client": to_client }
+        writers = [rt_session.spawn(to_server.run()), rt_session.spawn(to_client.run())]
+        if rt_session.is_acs_audio_stream and self.audio_coalesce_ms > 0:
+            rt_session.coalescer = AudioCoalescer(to_server.send_audio, rt_session.spawn, self.audio_coalesce_ms, self.audio_coalesce_max_delay_ms)
+        try:
+            async def client_text_to_server(text: str):
+                rt_session.messages_from_client += 1
+                # Fast path: ACS audio frames are rewrapped without parsing the JSON
+                if rt_session.is_acs_audio_stream:
+                    coalescer = rt_session.coalescer
+                    if coalescer is not None:
+                        audio = acs_audio_span(text)
+                        if audio is not None:
+                            await coalescer.add(text[audio[0]:audio[1]])
+                            return
+                        # Buffered audio goes out before any control event
+                        await coalescer.flush()
+                    else:
+                        audio_event = acs_audio_to_openai(text)
+                        if audio_event is not None:
+                            await to_server.send_audio(audio_event)
+                            return
+                data = json.loads(text)
+                await self._process_message_to_server(data, to_client, to_server, rt_session)
+
+            async def from_client_to_server():
+                # Messages from Azure Communication Services or the Web Frontend are forwarded to the OpenAI Realtime API
+                iter_frames = getattr(ws, "iter_frames", None)
+                if iter_frames is not None:
+                    # Adapters that expose raw payloads skip the per-frame message objects
+                    async for frame in iter_frames():
+                        if isinstance(frame, str):
+                            await client_text_to_server(frame)
                         else:
-                            print("Error: unexpected message type:", msg.type)
-
-                async def from_server_to_client():
-                    # Messages from the OpenAI Realtime API are forwarded to the Azure Communication Services or the Web Frontend
-                    async for msg in target_ws:
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            data = json.loads(msg.data)
-                            await self._process_message_to_client(data, ws, target_ws, is_acs_audio_stream)
-                        else:
-                            print("Error: unexpected message type:", msg.type)
-
-                try:
-                    await asyncio.gather(from_client_to_server(), from_server_to_client())
-                except ConnectionResetError:
-                    # Ignore the errors resulting from the client disconnecting the socket
-                    pass
+                            self.events.log(rt_session, "bridge.unexpected_frame", WARNING, "unexpected binary frame (%d bytes)", len(frame))
+                    return
+
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        await client_text_to_server(msg.data)
+                    else:
+                        self.events.log(rt_session, "bridge.unexpected_frame", WARNING, "unexpected message type: %s", msg.type)
+
+            async def server_messages():
+                # A pooled socket may already have read a few events (session.created/updated) while idle
+                for msg in conn.pending:
+                    yield msg
+                conn.pending.clear()
+                async for msg in target_ws:
+                    yield msg
+
+            async def from_server_to_client():
+                # Messages from the OpenAI Realtime API are forwarded to the Azure Communication Services or the Web Frontend
+                async for msg in server_messages():
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        rt_session.messages_from_server += 1
+                        # Fast path: audio deltas are rewrapped for ACS (or relayed untouched to
+                        # web clients) without parsing the JSON
+                        if rt_session.is_acs_audio_stream:
+                            delta = openai_audio_delta_item(msg.data)
+                            if delta is not None:
+                                item_id, (start, end) = delta
+                                if item_id in rt_session.playback.truncated_items:
+                                    # The caller interrupted this item; don't play the rest of it
+                                    continue
+                                audio = msg.data[start:end]
+                                rt_session.playback.queued_item_id = item_id
+                                await to_client.send_audio(acs_audio_data(audio), (item_id, base64_decoded_length(audio)))
+                                continue
+                        elif openai_audio_delta_span(msg.data) is not None:
+                            await to_client.send_audio(msg.data)
+                            continue
+                        data = json.loads(msg.data)
+                        await self._process_message_to_client(data, to_client, to_server, rt_session)
+                    else:
+                        self.events.log(rt_session, "bridge.unexpected_frame", WARNING, "unexpected message type: %s", msg.type)
+
+            try:
+                await asyncio.gather(from_client_to_server(), from_server_to_client())
+            except ConnectionResetError:
+                # Ignore the errors resulting from the client disconnecting the socket
+                pass
+        finally:
+            for writer in writers:
+                writer.cancel()
+            await target_ws.close()
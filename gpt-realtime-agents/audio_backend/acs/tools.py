@@ -6,7 +6,7 @@ sys.path.insert(0, str(Path(__file__).parent ))
 import json
 from typing import Any
 from enum import Enum
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 
 class ToolResultDirection(Enum):
     TO_SERVER = 1
@@ -28,10 +28,19 @@ class ToolResult:
 class Tool:
     target: Callable[..., ToolResult]
     schema: Any
+    policy: Optional[dict]
+    cache: Optional[dict]
+    model_view: Optional[Callable[[dict], dict]]
+    output: Optional[dict]
 
-    def __init__(self, target: Any, schema: Any):
+    def __init__(self, target: Any, schema: Any, policy: Optional[dict] = None, cache: Optional[dict] = None,
+                 model_view: Optional[Callable[[dict], dict]] = None, output: Optional[dict] = None):
         self.target = target
         self.schema = schema
+        self.policy = policy  # Execution bounds, see tool_runtime.ToolPolicy
+        self.cache = cache  # Result memoization, see tool_runtime.ResultCache
+        self.model_view = model_view  # What the model gets back, see tool_runtime.model_output
+        self.output = output  # Encoding and byte budget, see tool_runtime.OutputEncoder
 
 class RTToolCall:
     tool_call_id: str
@@ -54,12 +63,20 @@ def register_tools_from_registry(rtmt: Any, tools_registry: dict) -> None:
         TOOLS_REGISTRY = {
             "tool_name": {
                 "definition": {...},  # OpenAI function definition
-                "executor": function_reference
+                "executor": function_reference,
+                "policy": {...},  # Optional: timeout_seconds, max_concurrency, on_full, max_queue
+                "cache": {...},  # Optional: ttl_seconds, max_entries
+                "model_view": function_reference,  # Optional: result -> compact output for the model
+                "output": {...}  # Optional: max_bytes, abbreviate
             }
         }
     """
     for tool_name, tool_config in tools_registry.items():
         rtmt.tools[tool_name] = Tool(
             target=tool_config["executor"],
-            schema=tool_config["definition"]
+            schema=tool_config["definition"],
+            policy=tool_config.get("policy"),
+            cache=tool_config.get("cache"),
+            model_view=tool_config.get("model_view"),
+            output=tool_config.get("output")
         )
@@ -15,36 +15,37 @@ import json
 import logging
 import sys
 import random
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Awaitable, Callable, Dict, List
 
 import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, Response
 from pydantic import BaseModel, Field
 
 try:
-    from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
+    from azure.identity.aio import DefaultAzureCredential
 except ModuleNotFoundError as exc:  # pragma: no cover - module provided via dependencies
     raise RuntimeError(
         "azure-identity must be installed to run the backend service"
     ) from exc
 
 from dotenv import load_dotenv
-import inspect
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.json import JSON as RichJSON
 
 
 sys.path.insert(0, str(Path(__file__).parent ))
 
 
 from tools_registry import *
+from token_cache import shared_token_cache
+from session_pool import EphemeralSession, EphemeralSessionPool, create_http_client
+from debug_sink import create_debug_sink
+from tool_runtime import invoke_tool, model_output, result_cache, tool_policy
+from tool_manifest import ToolManifest
 
 
 
@@ -116,8 +117,21 @@ if os.getenv("DEBUG", "").lower() in ("true", "1", "yes"):
 
 
 
-credential = DefaultAzureCredential(exclude_interactive_browser_credential=False)
-token_provider = get_bearer_token_provider(credential, "https://cognitiveservices.azure.com/.default")
+# Shared with the ACS bridge; refreshed in the background so requests read it from memory
+token_cache = shared_token_cache()
+
+# One keep-alive (HTTP/2 when available) client for all calls to Azure OpenAI
+http_client = create_http_client()
+
+SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "0"))
+SESSION_POOL_MIN_TTL_SECONDS = float(os.getenv("SESSION_POOL_MIN_TTL_SECONDS", "15"))
+SESSION_POOL_IDLE_SECONDS = float(os.getenv("SESSION_POOL_IDLE_SECONDS", "600"))
+
+# Tool call records are rendered/written by a background task, never on the request path
+debug_sink = create_debug_sink()
+
+# /api/tools is served from pre-encoded bytes, rebuilt only when TOOLS_REGISTRY changes
+tool_manifest = ToolManifest(TOOLS_REGISTRY)
 
 
 class SessionRequest(BaseModel):
@@ -144,7 +158,8 @@ class FunctionCallRequest(BaseModel):
 
 class FunctionCallResponse(BaseModel):
     call_id: str
-    output: Dict[str, Any]
+    output: Dict[str, Any] = Field(..., description="Full result for the UI, including its _visual block")
+    model_output: Dict[str, Any] = Field(..., description="Compact result to send back to the model as function_call_output")
 
 
 ToolExecutor = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]] | Dict[str, Any]]
@@ -157,7 +172,7 @@ async def _get_auth_headers() -> Dict[str, str]:
         return headers
 
     # Prefer managed identity / Azure AD tokens when available
-    token = await token_provider()
+    token = await token_cache.get_token()
     headers["Authorization"] = f"Bearer {token}"
     return headers
 
@@ -179,12 +194,40 @@ def _parse_arguments(arguments: Dict[str, Any] | str) -> Dict[str, Any]:
 
 
 @app.get("/api/tools")
-async def list_tools() -> Dict[str, Any]:
-    """Return tool definitions for the frontend to register with the realtime session."""
-    return {
-        "tools": [tool["definition"] for tool in TOOLS_REGISTRY.values()],
-        "tool_choice": "auto",
-    }
+async def list_tools(request: Request) -> Response:
+    """Return tool definitions for the frontend to register with the realtime session.
+
+    The body is pre-serialized (gzip/brotli when accepted) with an ETag, so a
+    revalidation with ``If-None-Match`` is answered with an empty 304.
+    """
+    status, body, headers = tool_manifest.respond(request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
+    return Response(content=body, status_code=status, media_type="application/json", headers=headers)
+
+
+async def _mint_session(deployment: str, voice: str) -> EphemeralSession:
+    payload = {"model": deployment, "voice": voice}
+    headers = await _get_auth_headers()
+
+    response = await http_client.post(REALTIME_SESSION_URL, headers=headers, json=payload)
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as exc:  # pragma: no cover - network specific
+        logger.exception("Failed to create realtime session: %s", exc)
+        raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
+
+    session = EphemeralSession.from_response(response.json())
+    if session is None:
+        raise HTTPException(status_code=500, detail="Malformed session response from Azure")
+    return session
+
+
+session_pool = EphemeralSessionPool(
+    _mint_session,
+    size=SESSION_POOL_SIZE,
+    min_ttl_seconds=SESSION_POOL_MIN_TTL_SECONDS,
+    prewarm=[(DEFAULT_DEPLOYMENT, DEFAULT_VOICE)],
+    idle_seconds=SESSION_POOL_IDLE_SECONDS,
+)
 
 
 @app.post("/api/session", response_model=SessionResponse)
@@ -193,26 +236,12 @@ async def create_session(request: SessionRequest) -> SessionResponse:
     deployment = request.deployment or DEFAULT_DEPLOYMENT
     voice = request.voice or DEFAULT_VOICE
 
-    payload = {"model": deployment, "voice": voice}
-    headers = await _get_auth_headers()
-
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.post(REALTIME_SESSION_URL, headers=headers, json=payload)
-        try:
-            response.raise_for_status()
-        except httpx.HTTPStatusError as exc:  # pragma: no cover - network specific
-            logger.exception("Failed to create realtime session: %s", exc)
-            raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
-
-    data = response.json()
-    ephemeral_key = data.get("client_secret", {}).get("value")
-    session_id = data.get("id")
-    if not ephemeral_key or not session_id:
-        raise HTTPException(status_code=500, detail="Malformed session response from Azure")
+    # Served from pre-minted sessions when SESSION_POOL_SIZE > 0, minted on demand otherwise
+    session = await session_pool.acquire(deployment, voice)
 
     return SessionResponse(
-        session_id=session_id,
-        ephemeral_key=ephemeral_key,
+        session_id=session.session_id,
+        ephemeral_key=session.ephemeral_key,
         webrtc_url=WEBRTC_URL,
         deployment=deployment,
         voice=voice,
@@ -221,8 +250,10 @@ async def create_session(request: SessionRequest) -> SessionResponse:
 
 @app.post("/api/function-call", response_model=FunctionCallResponse)
 async def execute_function(request: FunctionCallRequest) -> FunctionCallResponse:
-    """Execute a tool requested by the model, return its structured output, and
-    display a rich debug pane (if 'rich' is installed) with name, arguments, and result.
+    """Execute a tool requested by the model and return its structured output.
+
+    The call (name, arguments, result, timing) is handed to the debug sink, which
+    renders or writes it in the background.
     """
     tool = TOOLS_REGISTRY.get(request.name)
     if not tool:
@@ -231,51 +262,22 @@ async def execute_function(request: FunctionCallRequest) -> FunctionCallResponse
     arguments = _parse_arguments(request.arguments)
     executor: ToolExecutor = tool["executor"]
 
-    result = executor(arguments)
-    if inspect.isawaitable(result):
-        result = await result
+    started = time.perf_counter()
+    # Runs once per call_id within the tool's deadline and concurrency limits; retried or
+    # duplicated deliveries get the same result, an overloaded tool a "temporarily unavailable" output,
+    # and tools with a "cache" answer repeated arguments from memory
+    result = await invoke_tool(
+        request.name, request.call_id, arguments, executor,
+        tool_policy(request.name, tool.get("policy")),
+        results=result_cache(request.name, tool.get("cache")),
+    )
 
     if not isinstance(result, dict):
         raise HTTPException(status_code=500, detail="Function executor must return a dict")
 
-    # Rich debug output (best-effort; falls back silently if rich not available)
-    try:
-
-        console = Console()
-
-        table = Table.grid(padding=(0, 1))
-        table.add_column(justify="right", style="bold cyan")
-        table.add_column(style="white")
-
-        table.add_row("Function:", request.name)
-        table.add_row("Call ID:", request.call_id)
-
-        # Arguments block
-        try:
-            args_json = RichJSON.from_data(arguments)
-        except Exception:
-            args_json = str(arguments)
+    debug_sink.submit(request.name, request.call_id, arguments, result, (time.perf_counter() - started) * 1000)
 
-        # Result block
-        try:
-            result_json = RichJSON.from_data(result)
-        except Exception:
-            result_json = str(result)
-
-        console.print(
-            Panel.fit(
-                table,
-                title="Function Call",
-                border_style="magenta",
-            )
-        )
-        console.print(Panel(args_json, title="Arguments", border_style="cyan"))
-        console.print(Panel(result_json, title="Result", border_style="green"))
-    except Exception as e:
-        # Swallow any rich / rendering errors to avoid impacting API behavior
-        console.print(f"Exception: {e}")
-
-    return FunctionCallResponse(call_id=request.call_id, output=result)
+    return FunctionCallResponse(call_id=request.call_id, output=result, model_output=model_output(result, tool.get("model_view")))
 
 
 @app.get("/healthz")
@@ -290,18 +292,32 @@ async def runtime_config() -> PlainTextResponse:
     return PlainTextResponse(content=script, media_type="application/javascript")
 
 
+@app.on_event("startup")
+async def startup_event() -> None:
+    if not AZURE_API_KEY:
+        await token_cache.start()
+    await session_pool.start()
+    await debug_sink.start()
+    tool_manifest.encoded()  # Serialize and compress before the first request
+
+
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
-    await credential.close()
+    await session_pool.close()
+    await debug_sink.close()
+    await http_client.aclose()
+    await token_cache.close()
 
 
 # ============================================================================
 # ACS Phone Integration (WebSocket only: Phone ↔ ACS ↔ AI Model)
 # ============================================================================
 try:
-    from backend_acs import router as acs_router, startup_event as acs_startup
+    from backend_acs import router as acs_router, startup_event as acs_startup, shutdown_event as acs_shutdown, stats_providers
     app.include_router(acs_router)
+    stats_providers["session_pool"] = session_pool.stats
     app.on_event("startup")(acs_startup)
+    app.on_event("shutdown")(acs_shutdown)
     logger.info("✅ ACS Phone integration routes mounted at /acs-phone/*")
 except ImportError as e:
     logger.warning("⚠️  ACS Phone integration not available: %s", e)
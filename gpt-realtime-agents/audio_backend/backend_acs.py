@@ -12,7 +12,7 @@ import logging
 import aiohttp
 import asyncio
 from pathlib import Path
-from typing import Optional, Any
+from typing import Any, Callable, Optional
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Request
 from fastapi.responses import JSONResponse
@@ -27,11 +27,15 @@ sys.path.insert(0, str(Path(__file__).parent ))
 
 from acs.acs import AcsCaller
 from acs.rtmt import RTMiddleTier
+from acs.event_log import EventLog
+from acs.bridge_queue import OVERFLOW_POLICIES
 from acs.callback_server import EventHandler
 from acs.helpers import load_prompt_from_markdown
 from acs.tools import *
 
 from tools_registry import *
+from token_cache import shared_token_cache
+from tool_runtime import IDEMPOTENCY_CACHE, output_stats, policy_stats, result_cache_stats
 
 
 load_dotenv()
@@ -50,13 +54,36 @@ acs_connection_string = os.environ.get("AZURE_ACS_CONN_KEY")
 acs_callback_path = os.environ.get("CALLBACK_EVENTS_URI")
 acs_media_streaming_websocket_host = os.environ.get("CALLBACK_URI_HOST")
 
-llm_credential = AzureKeyCredential(llm_key) if llm_key else None
+# Pre-opened realtime connections kept ready for inbound calls (0 disables pooling)
+realtime_pool_size = int(os.environ.get("REALTIME_POOL_SIZE", "0"))
+realtime_pool_presend_session = os.environ.get("REALTIME_POOL_PRESEND_SESSION", "true").lower() == "true"
+realtime_pool_max_idle_seconds = float(os.environ.get("REALTIME_POOL_MAX_IDLE_SECONDS", "60"))
+
+# Per-direction bridge send queues: audio frames buffered per call and what happens when full
+bridge_queue_max_audio = int(os.environ.get("BRIDGE_QUEUE_MAX_AUDIO", "100"))
+bridge_queue_max_control = int(os.environ.get("BRIDGE_QUEUE_MAX_CONTROL", "1000"))
+bridge_queue_overflow = os.environ.get("BRIDGE_QUEUE_OVERFLOW", "drop_oldest").strip().lower()
+# Checked here so a typo stops the app at startup instead of failing every call as it connects
+if bridge_queue_overflow not in OVERFLOW_POLICIES:
+    raise ValueError(f"Unknown BRIDGE_QUEUE_OVERFLOW '{bridge_queue_overflow}', expected one of {OVERFLOW_POLICIES}")
+
+# Coalesce caller audio into larger appends (ms of audio per append, 0 disables)
+acs_audio_coalesce_ms = float(os.environ.get("ACS_AUDIO_COALESCE_MS", "0"))
+
+# Audio ACS buffers before playing it, used to estimate what a caller heard when they barge in
+acs_playback_buffer_ms = float(os.environ.get("ACS_PLAYBACK_BUFFER_MS", "200"))
+
+# Without a key the bridge authenticates with the same Azure AD token cache as backend.py
+llm_credential = AzureKeyCredential(llm_key) if llm_key else shared_token_cache()
 
 # Global instances (initialized on startup)
 caller: Optional[AcsCaller] = None
 rtmt: Optional[RTMiddleTier] = None
 event_handler: Optional[EventHandler] = None
 
+# Extra sections of /api/realtime-acs/stats registered by the host app (name -> stats callable)
+stats_providers: dict[str, Callable[[], Any]] = {}
+
 
 class PhoneCallRequest(BaseModel):
     """Request model for initiating outbound calls"""
@@ -66,6 +93,17 @@ class PhoneCallRequest(BaseModel):
 # ============================================================================
 # FastAPI WebSocket Adapter for RTMiddleTier
 # ============================================================================
+class WSMessage:
+    """aiohttp-compatible message (.type, .data, .extra) produced by the adapter."""
+
+    __slots__ = ("type", "data", "extra")
+
+    def __init__(self, type: aiohttp.WSMsgType, data: Any, extra: Any = None):
+        self.type = type
+        self.data = data
+        self.extra = extra
+
+
 class FastAPIWebSocketAdapter:
     """
     Adapter to make FastAPI WebSocket compatible with aiohttp WebSocketResponse API.
@@ -76,7 +114,8 @@ class FastAPIWebSocketAdapter:
     
     def __init__(self, websocket: WebSocket):
         self.websocket = websocket
-        self.headers = {}  # FastAPI WebSocket doesn't expose headers the same way
+        # Case-insensitive mapping like aiohttp's, so RTMiddleTier can read the ACS call connection id
+        self.headers = websocket.headers
         self._closed = False
     
     async def send_str(self, data: str):
@@ -97,44 +136,54 @@ class FastAPIWebSocketAdapter:
                 console.log(f"[ADAPTER] Error sending JSON: {e}")
                 self._closed = True
     
+    async def _receive_frame(self) -> str | memoryview | None:
+        """Next text (str) or binary (memoryview) payload, None once the socket is closed."""
+        while True:
+            try:
+                raw_message = await self.websocket.receive()
+            except WebSocketDisconnect:
+                self._closed = True
+                return None
+            except Exception as e:
+                console.log(f"[ADAPTER] Error receiving message: {e}")
+                self._closed = True
+                return None
+
+            if raw_message.get("type") == "websocket.disconnect":
+                self._closed = True
+                return None
+            text = raw_message.get("text")
+            if text is not None:
+                return text
+            data = raw_message.get("bytes")
+            if data is not None:
+                # Hand out the received buffer without copying it
+                return memoryview(data)
+            # Unknown message type, keep receiving
+
+    async def iter_frames(self):
+        """Native passthrough: yield raw frame payloads without wrapping them in WSMessage.
+
+        RTMiddleTier uses this instead of the aiohttp-style iterator when available.
+        """
+        while True:
+            frame = await self._receive_frame()
+            if frame is None:
+                return
+            yield frame
+
     def __aiter__(self):
         """Return self as async iterator"""
         return self
-    
-    async def __anext__(self):
-        """Async iterator for receiving messages - mimics aiohttp.WSMsgType"""
-        try:
-            # Receive message from FastAPI WebSocket
-            raw_message = await self.websocket.receive()
-            
-            # Handle different message types
-            if "text" in raw_message:
-                # Create an aiohttp-compatible message object with .type and .data attributes
-                ws_message = type('WSMessage', (), {
-                    'type': aiohttp.WSMsgType.TEXT,
-                    'data': raw_message["text"]
-                })()
-                return ws_message
-            elif "bytes" in raw_message:
-                ws_message = type('WSMessage', (), {
-                    'type': aiohttp.WSMsgType.BINARY,
-                    'data': raw_message["bytes"]
-                })()
-                return ws_message
-            elif raw_message.get("type") == "websocket.disconnect":
-                self._closed = True
-                raise StopAsyncIteration
-            else:
-                # Unknown message type, continue iteration
-                return await self.__anext__()
-                
-        except WebSocketDisconnect:
-            self._closed = True
-            raise StopAsyncIteration
-        except Exception as e:
-            console.log(f"[ADAPTER] Error receiving message: {e}")
-            self._closed = True
+
+    async def __anext__(self) -> "WSMessage":
+        """Async iterator for receiving messages - mimics aiohttp's WSMessage"""
+        frame = await self._receive_frame()
+        if frame is None:
             raise StopAsyncIteration
+        if isinstance(frame, str):
+            return WSMessage(aiohttp.WSMsgType.TEXT, frame)
+        return WSMessage(aiohttp.WSMsgType.BINARY, frame)
 
 
 # ============================================================================
@@ -182,6 +231,12 @@ async def initialize_acs_components():
     if llm_endpoint_ws and llm_deployment and llm_credential:
         rtmt = RTMiddleTier(llm_endpoint_ws, llm_deployment, llm_credential)
         rtmt.system_message = system_prompt
+        rtmt.events = EventLog.from_env()
+        rtmt.queue_max_audio = bridge_queue_max_audio
+        rtmt.queue_max_control = bridge_queue_max_control
+        rtmt.queue_overflow = bridge_queue_overflow
+        rtmt.audio_coalesce_ms = acs_audio_coalesce_ms
+        rtmt.acs_playback_buffer_ms = acs_playback_buffer_ms
         
         # Add example tool (can be customized)
         _weather_tool_schema = {
@@ -215,8 +270,15 @@ async def initialize_acs_components():
 
         # Register all tools at once
         register_tools_from_registry(rtmt, TOOLS_REGISTRY)
+        # Tool table is shared by all concurrent calls from here on
+        rtmt.freeze_tools()
+        await rtmt.start(
+            pool_size=realtime_pool_size,
+            presend_session_update=realtime_pool_presend_session,
+            max_idle_seconds=realtime_pool_max_idle_seconds,
+        )
         
-        console.log("[ACS INIT] ✅ RTMiddleTier (WebSocket) initialized")
+        console.log(f"[ACS INIT] ✅ RTMiddleTier (WebSocket) initialized, realtime pool size: {realtime_pool_size}")
     else:
         console.log("[ACS INIT] ⚠️  RTMiddleTier not configured (missing Azure OpenAI settings)")
     
@@ -266,6 +328,22 @@ async def acs_get_source_phone_number():
     return {"phoneNumber": phone_number}
 
 
+@router.get("/api/realtime-acs/stats")
+async def acs_bridge_stats():
+    """Per-call bridge statistics (queue depth, time in queue, drops), connection pool and tool counters"""
+    if not rtmt:
+        return JSONResponse(content={"error": "RTMiddleTier not initialized"}, status_code=503)
+    return {
+        "calls": {call_id: session.stats() for call_id, session in rtmt.active_sessions.items()},
+        "connection_pool": rtmt.connection_stats(),
+        "tool_calls": IDEMPOTENCY_CACHE.stats(),
+        "tool_policies": policy_stats(),
+        "tool_result_caches": result_cache_stats(),
+        "tool_outputs": output_stats(),
+        **{name: provider() for name, provider in stats_providers.items()},
+    }
+
+
 # ============================================================================
 # Route: ACS WebSocket Bridge (PSTN to AI)
 # ============================================================================
@@ -461,3 +539,9 @@ async def acs_callbacks_handler(request: Request):
 async def startup_event():
     """Initialize ACS components on startup"""
     await initialize_acs_components()
+
+
+async def shutdown_event():
+    """Close pooled realtime connections and the shared HTTP session"""
+    if rtmt:
+        await rtmt.close()
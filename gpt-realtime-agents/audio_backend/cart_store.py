@@ -0,0 +1,238 @@
+"""Session-scoped shopping cart storage.
+
+Carts used to live in an unbounded module-level dict that was never evicted and
+could not be seen by other uvicorn workers. ``CartStore`` is the interface the
+cart tools use; two backends are provided:
+
+- ``MemoryCartStore``: per-process LRU with a sliding TTL and a hard cap on sessions.
+- ``SqliteCartStore``: a local SQLite database in WAL mode, so several worker
+  processes on the same host share carts. Expired and excess sessions are purged
+  periodically.
+
+Carts are plain JSON-serialisable dicts. The backend is picked with
+``CART_STORE_BACKEND`` (``memory`` or ``sqlite``); see ``create_cart_store``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CartMutator = Callable[[Dict[str, Any]], T]
+
+# Defaults shared by both backends and create_cart_store
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_TTL_SECONDS = 3600.0
+
+
+def new_cart() -> Dict[str, Any]:
+    # Lines are keyed by cart item id; totals are maintained by the cart tools on every change
+    return {
+        "items": {},
+        "totals": {"upfront": 0, "monthly": 0},
+        "next_id": 0,
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+class CartStore(ABC):
+    """Interface for cart backends.
+
+    ``update`` is the only way to change a cart: it loads (or creates) the cart,
+    applies ``mutate`` to it in place and persists the result atomically with
+    respect to other callers of the same store.
+    """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cart for ``session_id`` (treat as read-only), or None.
+
+        Reading a cart counts as activity and extends its TTL.
+        """
+
+    @abstractmethod
+    def update(self, session_id: str, mutate: CartMutator, create: bool = True) -> Optional[T]:
+        """Apply ``mutate`` to the session's cart and return its result.
+
+        If the session has no cart and ``create`` is False, nothing happens and
+        None is returned.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Drop the session's cart, if any."""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryCartStore(CartStore):
+    """In-process LRU cart store with a sliding TTL.
+
+    Entries are kept in least-recently-used order; since every access also
+    refreshes the TTL, expired carts are always at the front and can be evicted
+    in amortised O(1).
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._carts: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _evict(self, now: float) -> None:
+        while self._carts:
+            session_id, (expires_at, _) = next(iter(self._carts.items()))
+            if expires_at > now and len(self._carts) <= self.max_sessions:
+                break
+            del self._carts[session_id]
+
+    def _touch(self, session_id: str, cart: Dict[str, Any], now: float) -> None:
+        self._carts[session_id] = (now + self.ttl_seconds, cart)
+        self._carts.move_to_end(session_id)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        self._evict(now)
+        entry = self._carts.get(session_id)
+        if entry is None:
+            return None
+        self._touch(session_id, entry[1], now)
+        return entry[1]
+
+    def update(self, session_id: str, mutate: CartMutator, create: bool = True) -> Optional[T]:
+        cart = self.get(session_id)
+        if cart is None:
+            if not create:
+                return None
+            cart = new_cart()
+        result = mutate(cart)
+        now = time.monotonic()
+        self._touch(session_id, cart, now)
+        self._evict(now)
+        return result
+
+    def delete(self, session_id: str) -> None:
+        self._carts.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._carts)
+
+
+class SqliteCartStore(CartStore):
+    """Cart store backed by a local SQLite database shared between worker processes.
+
+    WAL mode lets readers proceed while another process writes; updates run in a
+    ``BEGIN IMMEDIATE`` transaction so concurrent read-modify-write cycles from
+    different workers serialise instead of losing items.
+
+    Calls are synchronous and the async cart tools make them on the event loop.
+    On a local disk they complete in well under a millisecond, but while another
+    worker holds the write lock ``get`` and ``update`` (both write, ``get`` to slide
+    the TTL) block the loop for up to the 5 s busy timeout. Keep the database on
+    local storage, not on a network share. Needs SQLite 3.35+ (``RETURNING``).
+    """
+
+    # Purge expired/excess sessions once every this many writes
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str, max_sessions: int = DEFAULT_MAX_SESSIONS, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._writes = 0
+
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS carts ("
+            " session_id TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS carts_expires_at ON carts (expires_at)")
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        # Slide the TTL on reads too, like MemoryCartStore
+        row = self._conn.execute(
+            "UPDATE carts SET expires_at = ? WHERE session_id = ? AND expires_at > ? RETURNING data",
+            (now + self.ttl_seconds, session_id, now),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, session_id: str, mutate: CartMutator, create: bool = True) -> Optional[T]:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT data FROM carts WHERE session_id = ? AND expires_at > ?",
+                (session_id, now),
+            ).fetchone()
+            if row is None and not create:
+                self._conn.execute("ROLLBACK")
+                return None
+            cart = json.loads(row[0]) if row else new_cart()
+            result = mutate(cart)
+            self._conn.execute(
+                "INSERT INTO carts (session_id, data, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+                (session_id, json.dumps(cart), now + self.ttl_seconds),
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge()
+        return result
+
+    def delete(self, session_id: str) -> None:
+        self._conn.execute("DELETE FROM carts WHERE session_id = ?", (session_id,))
+
+    def purge(self) -> None:
+        """Drop expired carts, then the least recently used ones above ``max_sessions``."""
+        self._conn.execute("DELETE FROM carts WHERE expires_at <= ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM carts WHERE session_id IN ("
+            " SELECT session_id FROM carts ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def create_cart_store() -> CartStore:
+    """Build the cart store configured through environment variables.
+
+    CART_STORE_BACKEND       memory (default) | sqlite
+    CART_STORE_MAX_SESSIONS  maximum number of live carts (default DEFAULT_MAX_SESSIONS)
+    CART_STORE_TTL_SECONDS   idle time before a cart is evicted (default DEFAULT_TTL_SECONDS)
+    CART_STORE_SQLITE_PATH   database file for the sqlite backend
+    """
+    backend = os.getenv("CART_STORE_BACKEND", "memory").strip().lower()
+    max_sessions = int(os.getenv("CART_STORE_MAX_SESSIONS", str(DEFAULT_MAX_SESSIONS)))
+    ttl_seconds = float(os.getenv("CART_STORE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS)))
+
+    if backend == "sqlite":
+        path = os.getenv("CART_STORE_SQLITE_PATH") or os.path.join(tempfile.gettempdir(), "contoso-carts.sqlite3")
+        logger.info("Cart store: sqlite (%s)", path)
+        return SqliteCartStore(path, max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+
+    if backend != "memory":
+        logger.warning("Unknown CART_STORE_BACKEND '%s', using in-memory cart store", backend)
+    return MemoryCartStore(max_sessions=max_sessions, ttl_seconds=ttl_seconds)
@@ -0,0 +1,160 @@
+"""Indexed in-memory product catalog used by the sales tools.
+
+The tool executors in ``tools_registry`` used to resolve devices, plans and
+accessories with linear scans over the mock lists on every call. ``Catalog``
+builds the lookup structures once when the data is loaded so each executor can
+resolve ids in O(1) and price ranges in O(log n), independent of catalog size.
+
+Device order is preserved everywhere: every index stores devices in the order
+they appear in the source list, so results (and tie-breaks) match the original
+list-scan behaviour exactly.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from device_scoring import build_device_columns, score_devices_python
+
+
+class Catalog:
+    """Read-only indexes over devices, plans and accessories."""
+
+    def __init__(
+        self,
+        devices: List[Dict[str, Any]],
+        plans: List[Dict[str, Any]],
+        accessories: Dict[str, List[Dict[str, Any]]],
+    ):
+        self.version = 0
+        self._build(devices, plans, accessories)
+
+    def reload(
+        self,
+        devices: List[Dict[str, Any]],
+        plans: List[Dict[str, Any]],
+        accessories: Dict[str, List[Dict[str, Any]]],
+    ) -> None:
+        """Rebuild every index from new source data and bump ``version``."""
+        self._build(devices, plans, accessories)
+        self.version += 1
+
+    def _build(
+        self,
+        devices: List[Dict[str, Any]],
+        plans: List[Dict[str, Any]],
+        accessories: Dict[str, List[Dict[str, Any]]],
+    ) -> None:
+        self.devices = devices
+        self.plans = plans
+        self.accessories = accessories
+
+        # Position of each device in the source list, used to keep original ordering
+        self._device_position: Dict[str, int] = {}
+        self._devices_by_id: Dict[str, Dict[str, Any]] = {}
+        self._devices_by_brand: Dict[str, List[Dict[str, Any]]] = {}
+        self._devices_by_use_case: Dict[str, List[Dict[str, Any]]] = {}
+
+        for position, device in enumerate(devices):
+            device_id = device["id"]
+            if device_id in self._devices_by_id:
+                continue  # First occurrence wins, like next(...) over the list did
+            self._device_position[device_id] = position
+            self._devices_by_id[device_id] = device
+            self._devices_by_brand.setdefault(device["brand"].lower(), []).append(device)
+            for use_case in device.get("attributes", {}).get("use_cases", []):
+                self._devices_by_use_case.setdefault(use_case, []).append(device)
+
+        # Devices sorted by (monthly price, position) so range queries are stable
+        self._devices_by_price = sorted(
+            self._devices_by_id.values(),
+            key=lambda d: (d["price_monthly"], self._device_position[d["id"]]),
+        )
+        self._device_prices = [d["price_monthly"] for d in self._devices_by_price]
+
+        # Columnar scoring inputs (None for small catalogs or without NumPy)
+        self._device_columns = build_device_columns(devices)
+
+        self._plans_by_id: Dict[str, Dict[str, Any]] = {}
+        for plan in plans:
+            self._plans_by_id.setdefault(plan["id"], plan)
+        self._plans_by_price = sorted(plans, key=lambda p: p["price_monthly"])
+
+        # Accessories are listed per device; flatten them once into an id index
+        self._accessories_by_id: Dict[str, Dict[str, Any]] = {}
+        for acc_list in accessories.values():
+            for accessory in acc_list:
+                self._accessories_by_id.setdefault(accessory["id"], accessory)
+
+    # ------------------------------------------------------------------
+    # Point lookups
+    # ------------------------------------------------------------------
+    def device(self, device_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self._devices_by_id.get(device_id)
+
+    def plan(self, plan_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self._plans_by_id.get(plan_id)
+
+    def accessory(self, accessory_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self._accessories_by_id.get(accessory_id)
+
+    def device_position(self, device_id: str) -> int:
+        return self._device_position[device_id]
+
+    def devices_by_ids(self, device_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Resolve ids to devices, returned in catalog order and de-duplicated."""
+        found = {device_id: self._devices_by_id[device_id] for device_id in device_ids if device_id in self._devices_by_id}
+        return sorted(found.values(), key=lambda d: self._device_position[d["id"]])
+
+    def accessories_for_device(self, device_id: Optional[str]) -> List[Dict[str, Any]]:
+        return self.accessories.get(device_id, self.accessories["default"])
+
+    # ------------------------------------------------------------------
+    # Secondary indexes
+    # ------------------------------------------------------------------
+    def devices_by_brand(self, brand: str) -> List[Dict[str, Any]]:
+        return self._devices_by_brand.get(brand.lower(), [])
+
+    def devices_with_use_case(self, use_case: str) -> List[Dict[str, Any]]:
+        return self._devices_by_use_case.get(use_case, [])
+
+    def devices_by_price(
+        self,
+        min_monthly: Optional[float] = None,
+        max_monthly: Optional[float] = None,
+        min_inclusive: bool = True,
+        max_inclusive: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Devices whose monthly price falls in the range, sorted by price then catalog order."""
+        lo = 0
+        hi = len(self._device_prices)
+        if min_monthly is not None:
+            bisect_min = bisect_left if min_inclusive else bisect_right
+            lo = bisect_min(self._device_prices, min_monthly)
+        if max_monthly is not None:
+            bisect_max = bisect_right if max_inclusive else bisect_left
+            hi = bisect_max(self._device_prices, max_monthly)
+        return self._devices_by_price[lo:hi]
+
+    def plans_by_price(self) -> List[Dict[str, Any]]:
+        return self._plans_by_price
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+    def top_scored_devices(
+        self,
+        battery_pref: Optional[str],
+        camera_pref: Optional[str],
+        price_max: float,
+        brand: Optional[str],
+        use_case: Optional[str],
+        limit: int = 5,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Rank devices for a search; returns (number of matches, top ``limit`` devices)."""
+        if self._device_columns is not None:
+            return self._device_columns.score(battery_pref, camera_pref, price_max, brand, use_case, limit)
+
+        # Narrow the candidates up front when a brand is requested (non-matching brands are skipped anyway)
+        candidates = self.devices_by_brand(brand) if brand else self.devices
+        return score_devices_python(candidates, battery_pref, camera_pref, price_max, brand, use_case, limit)
@@ -0,0 +1,212 @@
+"""Off-request-path debug output for tool calls.
+
+``/api/function-call`` used to render Rich panels synchronously before replying,
+which often took longer than the tool itself. Handlers now call
+``DebugSink.submit``, which only appends a record to a bounded queue; a background
+task hands batches to a writer in a worker thread. When the queue is full the
+record is dropped (and counted) rather than slowing the request down.
+
+Configured with environment variables, see ``create_debug_sink``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolCallRecord:
+    __slots__ = ("name", "call_id", "arguments", "result", "duration_ms", "timestamp")
+
+    def __init__(self, name: str, call_id: str, arguments: Any, result: Any, duration_ms: float):
+        self.name = name
+        self.call_id = call_id
+        self.arguments = arguments
+        self.result = result
+        self.duration_ms = duration_ms
+        self.timestamp = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ts": self.timestamp,
+            "name": self.name,
+            "call_id": self.call_id,
+            "duration_ms": round(self.duration_ms, 3),
+            "arguments": self.arguments,
+            "result": self.result,
+        }
+
+
+class DebugWriter(ABC):
+    """Consumes batches of records; always called from a worker thread."""
+
+    @abstractmethod
+    def write(self, records: List[ToolCallRecord]) -> None:
+        """Output one batch of records."""
+
+    def close(self) -> None:
+        pass
+
+
+class RichWriter(DebugWriter):
+    """The panels execute_function used to print: call summary, arguments, result."""
+
+    def __init__(self):
+        from rich.console import Console
+
+        self.console = Console()
+
+    def write(self, records: List[ToolCallRecord]) -> None:
+        from rich.json import JSON as RichJSON
+        from rich.panel import Panel
+        from rich.table import Table
+
+        for record in records:
+            table = Table.grid(padding=(0, 1))
+            table.add_column(justify="right", style="bold cyan")
+            table.add_column(style="white")
+
+            table.add_row("Function:", record.name)
+            table.add_row("Call ID:", record.call_id)
+            table.add_row("Duration:", f"{record.duration_ms:.1f} ms")
+
+            try:
+                args_json = RichJSON.from_data(record.arguments)
+            except Exception:
+                args_json = str(record.arguments)
+
+            try:
+                result_json = RichJSON.from_data(record.result)
+            except Exception:
+                result_json = str(record.result)
+
+            self.console.print(Panel.fit(table, title="Function Call", border_style="magenta"))
+            self.console.print(Panel(args_json, title="Arguments", border_style="cyan"))
+            self.console.print(Panel(result_json, title="Result", border_style="green"))
+
+
+class JsonlWriter(DebugWriter):
+    """One JSON object per line, appended to ``path``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, records: List[ToolCallRecord]) -> None:
+        for record in records:
+            self._file.write(json.dumps(record.to_dict(), default=str, separators=(",", ":")))
+            self._file.write("\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class DebugSink:
+    """Bounded queue of tool call records drained by a background task.
+
+    ``sample_rate`` (0..1) keeps only a fraction of the records. ``submit`` never
+    blocks: records that don't fit in the queue are dropped.
+    """
+
+    BATCH_SIZE = 64
+
+    def __init__(self, writer: Optional[DebugWriter], max_queue: int = 1000, sample_rate: float = 1.0):
+        self.writer = writer
+        self.sample_rate = sample_rate
+        self._queue: asyncio.Queue[ToolCallRecord] = asyncio.Queue(maxsize=max_queue)
+        self._consumer: Optional[asyncio.Task] = None
+
+        self.submitted = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.writer is not None
+
+    def submit(self, name: str, call_id: str, arguments: Any, result: Any, duration_ms: float) -> None:
+        if self.writer is None:
+            return
+        self.submitted += 1
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+        try:
+            self._queue.put_nowait(ToolCallRecord(name, call_id, arguments, result, duration_ms))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def start(self) -> None:
+        if self.writer is not None and self._consumer is None:
+            self._consumer = asyncio.create_task(self._consume())
+
+    async def _consume(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await asyncio.to_thread(self.writer.write, batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.write_errors += 1
+                logger.warning("Debug sink writer failed: %s", e)
+
+    async def close(self, drain_timeout: float = 2.0) -> None:
+        if self._consumer is not None:
+            deadline = time.monotonic() + drain_timeout
+            while not self._queue.empty() and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            self._consumer.cancel()
+            await asyncio.gather(self._consumer, return_exceptions=True)
+            self._consumer = None
+        if self.writer is not None:
+            self.writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "submitted": self.submitted,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "written": self.written,
+            "write_errors": self.write_errors,
+        }
+
+
+def create_debug_sink() -> DebugSink:
+    """Build the debug sink configured through environment variables.
+
+    DEBUG_SINK              rich (default) | jsonl | none
+    DEBUG_SINK_PATH         output file for jsonl (default tool_calls.jsonl)
+    DEBUG_SINK_SAMPLE_RATE  fraction of calls to record, 0..1 (default 1)
+    DEBUG_SINK_QUEUE_SIZE   records buffered before new ones are dropped (default 1000)
+    """
+    kind = os.getenv("DEBUG_SINK", "rich").strip().lower()
+    sample_rate = float(os.getenv("DEBUG_SINK_SAMPLE_RATE", "1"))
+    max_queue = int(os.getenv("DEBUG_SINK_QUEUE_SIZE", "1000"))
+
+    writer: Optional[DebugWriter]
+    if kind in ("none", "off", ""):
+        writer = None
+    elif kind == "jsonl":
+        writer = JsonlWriter(os.getenv("DEBUG_SINK_PATH", "tool_calls.jsonl"))
+    else:
+        if kind != "rich":
+            logger.warning("Unknown DEBUG_SINK '%s', using rich", kind)
+        try:
+            writer = RichWriter()
+        except ModuleNotFoundError:
+            writer = None
+
+    return DebugSink(writer, max_queue=max_queue, sample_rate=sample_rate)
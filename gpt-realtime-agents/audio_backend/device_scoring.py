@@ -0,0 +1,189 @@
+"""Scoring engine behind ``search_devices_by_attributes``.
+
+Two paths produce identical rankings:
+- ``DeviceColumns`` keeps the scoring inputs as NumPy arrays and scores the whole
+  catalog in one vectorized pass, then selects the top-k with a partial sort.
+- ``score_devices_python`` is the original per-device loop, used for small catalogs
+  (where NumPy's fixed overhead dominates) and when NumPy is not installed.
+
+Ties are always broken by catalog order, exactly like the stable ``list.sort`` the
+tool used originally.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - optional, the Python path is used instead
+    np = None
+
+QUALITY_LEVELS = {"good": 1, "very_good": 2, "excellent": 3}
+
+# Below this many devices the plain loop is faster than setting up array operations
+VECTORIZE_MIN_DEVICES = 64
+
+
+def score_devices_python(
+    devices: List[Dict[str, Any]],
+    battery_pref: Optional[str],
+    camera_pref: Optional[str],
+    price_max: float,
+    brand: Optional[str],
+    use_case: Optional[str],
+    limit: int,
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """Score ``devices`` one by one; returns (number of matches, top ``limit`` devices)."""
+    scored_devices = []
+    for device in devices:
+        attrs = device["attributes"]
+        score = 0
+
+        # Hard price filter - don't show devices over budget
+        if device["price_monthly"] > price_max:
+            continue
+
+        # Brand match - strong preference (exact match gets big boost)
+        if brand:
+            if device["brand"].lower() == brand.lower():
+                score += 50  # Exact brand match
+            else:
+                continue  # Skip non-matching brands if brand specified
+
+        # Battery scoring (not exclusion)
+        if battery_pref:
+            required_level = QUALITY_LEVELS.get(battery_pref, 0)
+            device_level = QUALITY_LEVELS.get(attrs.get("battery_life", "good"), 0)
+            # Give points based on how close/better the device is
+            if device_level >= required_level:
+                score += 20 + (device_level - required_level) * 5  # Bonus for exceeding
+            else:
+                score += device_level * 5  # Partial credit
+
+        # Camera scoring (not exclusion)
+        if camera_pref:
+            required_level = QUALITY_LEVELS.get(camera_pref, 0)
+            device_level = QUALITY_LEVELS.get(attrs.get("camera_quality", "good"), 0)
+            if device_level >= required_level:
+                score += 20 + (device_level - required_level) * 5
+            else:
+                score += device_level * 5
+
+        # Use case match
+        if use_case and use_case in attrs.get("use_cases", []):
+            score += 15
+
+        # Rating contribution
+        score += (device.get("rating", 0) * 5)
+
+        # Price value - cheaper is better (within budget)
+        price_score = max(0, (price_max - device["price_monthly"]) / 5)
+        score += price_score
+
+        scored_devices.append({"device": device, "score": score})
+
+    # Sort by score descending
+    scored_devices.sort(key=lambda x: -x["score"])
+
+    return len(scored_devices), [item["device"] for item in scored_devices[:limit]]
+
+
+class DeviceColumns:
+    """Column-oriented copy of the scoring inputs for a device list."""
+
+    def __init__(self, devices: List[Dict[str, Any]]):
+        self.devices = devices
+        count = len(devices)
+
+        self.price = np.fromiter((d["price_monthly"] for d in devices), dtype=np.float64, count=count)
+        self.rating = np.fromiter((d.get("rating", 0) for d in devices), dtype=np.float64, count=count)
+        self.battery = np.fromiter(
+            (QUALITY_LEVELS.get(d["attributes"].get("battery_life", "good"), 0) for d in devices),
+            dtype=np.int64,
+            count=count,
+        )
+        self.camera = np.fromiter(
+            (QUALITY_LEVELS.get(d["attributes"].get("camera_quality", "good"), 0) for d in devices),
+            dtype=np.int64,
+            count=count,
+        )
+
+        self.brand_codes: Dict[str, int] = {}
+        self.brand = np.fromiter(
+            (self.brand_codes.setdefault(d["brand"].lower(), len(self.brand_codes)) for d in devices),
+            dtype=np.int32,
+            count=count,
+        )
+
+        # Use cases are packed into a bitmask, 64 use cases per uint64 word
+        self.use_case_bits: Dict[str, int] = {}
+        for device in devices:
+            for name in device["attributes"].get("use_cases", []):
+                self.use_case_bits.setdefault(name, len(self.use_case_bits))
+        words = max(1, (len(self.use_case_bits) + 63) // 64)
+        self.use_cases = np.zeros((count, words), dtype=np.uint64)
+        for row, device in enumerate(devices):
+            for name in device["attributes"].get("use_cases", []):
+                bit = self.use_case_bits[name]
+                self.use_cases[row, bit // 64] |= np.uint64(1 << (bit % 64))
+
+    def _quality_score(self, levels: "np.ndarray", preference: str) -> "np.ndarray":
+        required_level = QUALITY_LEVELS.get(preference, 0)
+        return np.where(levels >= required_level, 20 + (levels - required_level) * 5, levels * 5)
+
+    def score(
+        self,
+        battery_pref: Optional[str],
+        camera_pref: Optional[str],
+        price_max: float,
+        brand: Optional[str],
+        use_case: Optional[str],
+        limit: int,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Vectorized equivalent of ``score_devices_python`` over all devices."""
+        mask = self.price <= price_max
+        points = np.zeros(len(self.devices), dtype=np.int64)
+
+        if brand:
+            code = self.brand_codes.get(brand.lower())
+            if code is None:
+                return 0, []
+            mask &= self.brand == code
+            points += 50
+
+        if battery_pref:
+            points += self._quality_score(self.battery, battery_pref)
+        if camera_pref:
+            points += self._quality_score(self.camera, camera_pref)
+
+        if use_case and use_case in self.use_case_bits:
+            bit = self.use_case_bits[use_case]
+            has_use_case = (self.use_cases[:, bit // 64] >> np.uint64(bit % 64)) & np.uint64(1)
+            points += has_use_case.astype(np.int64) * 15
+
+        # Same order of additions as the Python path so float results are bit-identical
+        scores = points.astype(np.float64) + self.rating * 5
+        scores += np.maximum(0, (price_max - self.price) / 5)
+
+        matches = np.flatnonzero(mask)
+        if matches.size == 0 or limit <= 0:
+            return int(matches.size), []
+
+        neg_scores = -scores[matches]
+        if matches.size > limit:
+            # Keep everything scoring at least the k-th best; includes ties at the boundary
+            kth = np.partition(neg_scores, limit - 1)[limit - 1]
+            keep = np.flatnonzero(neg_scores <= kth)
+        else:
+            keep = np.arange(matches.size)
+
+        # Stable sort of candidates (already in catalog order) reproduces list.sort tie-breaks
+        ranked = keep[np.argsort(neg_scores[keep], kind="stable")][:limit]
+        return int(matches.size), [self.devices[i] for i in matches[ranked]]
+
+
+def build_device_columns(devices: List[Dict[str, Any]]) -> Optional[DeviceColumns]:
+    """Columns for the vectorized path, or None when it would not pay off."""
+    if np is None or len(devices) < VECTORIZE_MIN_DEVICES:
+        return None
+    return DeviceColumns(devices)
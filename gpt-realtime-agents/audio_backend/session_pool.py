@@ -0,0 +1,193 @@
+"""Pre-minted ephemeral Realtime sessions for POST /api/session.
+
+Minting an ephemeral key is a round trip to ``AZURE_GPT_REALTIME_URL`` that the
+browser waits on before it can start WebRTC. ``EphemeralSessionPool`` keeps a few
+sessions per (deployment, voice) minted ahead of time and hands them out
+immediately. Each session is tracked against its expiry: keys closer to expiry
+than ``min_ttl_seconds`` are never handed out and are replaced in the background.
+A (deployment, voice) nobody acquired for ``idle_seconds`` stops being refilled,
+so an idle server doesn't keep minting sessions.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str]  # (deployment, voice)
+
+# Lifetime assumed when the service doesn't report client_secret.expires_at
+DEFAULT_KEY_LIFETIME_SECONDS = 60
+
+
+def create_http_client(timeout: float = 15.0) -> httpx.AsyncClient:
+    """App-lifetime client for Azure OpenAI calls; HTTP/2 when ``h2`` is installed."""
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ModuleNotFoundError:
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=timeout,
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=120),
+    )
+
+
+class EphemeralSession:
+    def __init__(self, session_id: str, ephemeral_key: str, expires_at: float):
+        self.session_id = session_id
+        self.ephemeral_key = ephemeral_key
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_response(cls, data: Dict[str, Any]) -> Optional["EphemeralSession"]:
+        client_secret = data.get("client_secret") or {}
+        ephemeral_key = client_secret.get("value")
+        session_id = data.get("id")
+        if not ephemeral_key or not session_id:
+            return None
+        expires_at = client_secret.get("expires_at") or time.time() + DEFAULT_KEY_LIFETIME_SECONDS
+        return cls(session_id, ephemeral_key, float(expires_at))
+
+    def ttl(self) -> float:
+        return self.expires_at - time.time()
+
+
+MintSession = Callable[[str, str], Awaitable[EphemeralSession]]
+
+
+class EphemeralSessionPool:
+    """Keeps up to ``size`` unexpired sessions ready per (deployment, voice).
+
+    ``mint`` performs the actual request. With ``size == 0`` the pool is a
+    pass-through. Keys are pooled once requested (up to ``max_keys`` of them);
+    ``prewarm`` keys are filled at start(). A key is dropped from the pool once
+    ``idle_seconds`` pass without an ``acquire`` for it, and pooled again on the next one.
+    """
+
+    def __init__(
+        self,
+        mint: MintSession,
+        size: int = 0,
+        min_ttl_seconds: float = 15,
+        max_keys: int = 8,
+        prewarm: Optional[list[SessionKey]] = None,
+        idle_seconds: float = 600,
+    ):
+        self.mint = mint
+        self.size = size
+        self.min_ttl_seconds = min_ttl_seconds
+        self.max_keys = max_keys
+        self.prewarm = prewarm or []
+        self.idle_seconds = idle_seconds
+
+        self._ready: Dict[SessionKey, Deque[EphemeralSession]] = {}
+        self._refill_tasks: Dict[SessionKey, asyncio.Task] = {}
+        # time.monotonic() of the last acquire (or prewarm) per pooled key
+        self._last_used: Dict[SessionKey, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.minted = 0
+        self.expired = 0
+        self.mint_failures = 0
+        self.idle_stops = 0
+
+    async def start(self) -> None:
+        for key in self.prewarm:
+            self._schedule_refill(key)
+
+    def _take_fresh(self, key: SessionKey) -> Optional[EphemeralSession]:
+        ready = self._ready.get(key)
+        while ready:
+            session = ready.popleft()
+            if session.ttl() > self.min_ttl_seconds:
+                return session
+            self.expired += 1
+        return None
+
+    async def acquire(self, deployment: str, voice: str) -> EphemeralSession:
+        key = (deployment, voice)
+        session = self._take_fresh(key)
+        if session is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._schedule_refill(key)
+        if session is None:
+            session = await self.mint(deployment, voice)
+            self.minted += 1
+        return session
+
+    def _schedule_refill(self, key: SessionKey) -> None:
+        if self.size <= 0:
+            return
+        if key not in self._ready:
+            if len(self._ready) >= self.max_keys:
+                return
+            self._ready[key] = deque()
+        self._last_used[key] = time.monotonic()
+        task = self._refill_tasks.get(key)
+        if task is None or task.done():
+            self._refill_tasks[key] = asyncio.create_task(self._refill(key))
+
+    async def _refill(self, key: SessionKey) -> None:
+        """Keep ``size`` fresh sessions for ``key``, replacing them as they near expiry."""
+        ready = self._ready[key]
+        backoff = 1.0
+        while True:
+            if time.monotonic() - self._last_used[key] > self.idle_seconds:
+                # Unused for a while: let the ready sessions expire instead of minting more
+                logger.info("Session pool: no requests for %s in %.0fs, stopped refilling", key, self.idle_seconds)
+                self.idle_stops += 1
+                del self._ready[key], self._last_used[key]
+                return
+            while ready and ready[0].ttl() <= self.min_ttl_seconds:
+                ready.popleft()
+                self.expired += 1
+            if len(ready) < self.size:
+                try:
+                    session = await self.mint(*key)
+                    self.minted += 1
+                    if session.ttl() <= self.min_ttl_seconds:
+                        raise ValueError(f"session expires in {session.ttl():.0f}s, below min_ttl_seconds")
+                    ready.append(session)
+                    backoff = 1.0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.mint_failures += 1
+                    logger.warning("Session pool: failed to mint session for %s: %s", key, e)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+                continue
+            # Full: wake up when the oldest session stops being usable, or the key goes idle
+            idle_in = self._last_used[key] + self.idle_seconds - time.monotonic()
+            await asyncio.sleep(max(min(ready[0].ttl() - self.min_ttl_seconds, idle_in), 0.5))
+
+    async def close(self) -> None:
+        for task in self._refill_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._refill_tasks.values(), return_exceptions=True)
+        self._refill_tasks.clear()
+        self._ready.clear()
+        self._last_used.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "ready": {f"{deployment}/{voice}": len(q) for (deployment, voice), q in self._ready.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "minted": self.minted,
+            "expired": self.expired,
+            "mint_failures": self.mint_failures,
+            "idle_stops": self.idle_stops,
+        }
@@ -0,0 +1,204 @@
+"""Simulated latency and randomness for the mocked back-office tools.
+
+Credit checks, payments, identity checks and the other mocked back-office calls
+in ``tools_registry`` take their delay and their random outcomes from the active
+``SimulationProfile`` instead of hard-coded ``asyncio.sleep``/``random`` calls:
+
+- each tool's latency is zero, fixed, uniform or lognormal (``Latency``)
+- with a seed, every session gets its own seeded RNGs (one for outcomes, one
+  for delays), so a session's tool results and delays depend only on the seed,
+  the session and its call order, not on how concurrent calls interleave
+
+Profiles: ``realistic`` (the fixed delays the mocks always had, default),
+``fast`` (no delays, for benchmarks and tests) and ``staging`` (lognormal around
+the realistic delays, to model tail latency).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import math
+import os
+import random
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Delays (seconds) the mocked back-office tools have always simulated
+DEFAULT_LATENCIES = {
+    "check_upgrade_eligibility": 0.5,
+    "get_customer_usage": 0.5,
+    "run_credit_check": 2.0,
+    "verify_identity": 1.5,
+    "check_trade_in_value": 1.0,
+    "process_payment": 2.0,
+}
+
+# Session the current tool call belongs to (set by the bridge around each call);
+# tools without one fall back to a ``session_id`` argument, then to "default"
+current_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("simulation_session", default=None)
+
+
+class Latency:
+    """A latency distribution in seconds.
+
+    Spec strings: ``"0"``/``"zero"``, ``"1.5"``/``"fixed:1.5"``, ``"uniform:0.5:2"``
+    (bounds) and ``"lognormal:2:0.5"`` (median, sigma).
+    """
+
+    __slots__ = ("kind", "a", "b")
+
+    KINDS = ("zero", "fixed", "uniform", "lognormal")
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}', expected one of {self.KINDS}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        parts = [part.strip() for part in spec.strip().split(":")]
+        kind = parts[0].lower()
+        try:
+            if kind == "zero":
+                return cls("zero")
+            if kind not in cls.KINDS:
+                return cls("fixed", float(kind))
+            values = [float(value) for value in parts[1:]]
+        except ValueError:
+            values = None
+        if kind == "fixed" and values and len(values) == 1:
+            return cls("fixed", values[0])
+        if kind in ("uniform", "lognormal") and values and len(values) == 2:
+            return cls(kind, values[0], values[1])
+        raise ValueError(f"Invalid latency spec '{spec}'")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        return 0.0
+
+    def __repr__(self) -> str:
+        if self.kind == "zero":
+            return "zero"
+        if self.kind == "fixed":
+            return f"fixed:{self.a:g}"
+        return f"{self.kind}:{self.a:g}:{self.b:g}"
+
+
+ZERO = Latency("zero")
+
+
+class SimulationProfile:
+    """Per-tool latency and the RNGs the mocked tools draw their outcomes from.
+
+    ``latencies`` maps tool names to ``Latency``; tools not listed use ``default``
+    (zero unless given). ``scale`` multiplies every sampled delay. Without a
+    ``seed`` all sessions share one unseeded RNG, as the module-level ``random``
+    calls did; with a seed each session gets its own outcome and latency RNGs
+    seeded from ``(seed, session)``, kept for the ``max_sessions`` most recently
+    used sessions.
+    """
+
+    def __init__(
+        self,
+        latencies: Optional[Dict[str, Latency]] = None,
+        default: Latency = ZERO,
+        scale: float = 1.0,
+        seed: Optional[int] = None,
+        max_sessions: int = 10000,
+        name: str = "custom",
+    ):
+        self.latencies = dict(latencies or {})
+        self.default = default
+        self.scale = scale
+        self.seed = seed
+        self.max_sessions = max_sessions
+        self.name = name
+
+        self._shared_rng = random.Random()
+        # Delays come from their own RNG so changing a latency never changes tool outcomes
+        self._latency_rng = random.Random()
+        # (outcome RNG, latency RNG) per session when seeded
+        self._session_rngs: OrderedDict[str, Tuple[random.Random, random.Random]] = OrderedDict()
+
+    @classmethod
+    def realistic(cls, seed: Optional[int] = None) -> "SimulationProfile":
+        return cls({tool: Latency("fixed", seconds) for tool, seconds in DEFAULT_LATENCIES.items()}, seed=seed, name="realistic")
+
+    @classmethod
+    def fast(cls, seed: Optional[int] = 0) -> "SimulationProfile":
+        return cls(seed=seed, name="fast")
+
+    @classmethod
+    def staging(cls, seed: Optional[int] = None, sigma: float = 0.5) -> "SimulationProfile":
+        return cls({tool: Latency("lognormal", seconds, sigma) for tool, seconds in DEFAULT_LATENCIES.items()}, seed=seed, name="staging")
+
+    @classmethod
+    def from_env(cls) -> "SimulationProfile":
+        """Build from environment variables.
+
+        TOOL_SIMULATION: realistic (default) | fast | staging
+        TOOL_SIMULATION_LATENCY: per-tool overrides, e.g. "run_credit_check=lognormal:2:0.8,verify_identity=0"
+        TOOL_SIMULATION_SCALE: multiplier applied to every delay
+        TOOL_SIMULATION_SEED: seed for deterministic per-session outcomes
+        """
+        seed_raw = os.getenv("TOOL_SIMULATION_SEED", "").strip()
+        seed = int(seed_raw) if seed_raw else None
+
+        name = os.getenv("TOOL_SIMULATION", "realistic").strip().lower()
+        factories = {"realistic": cls.realistic, "fast": cls.fast, "staging": cls.staging}
+        if name not in factories:
+            raise ValueError(f"Unknown TOOL_SIMULATION '{name}', expected one of {sorted(factories)}")
+        profile = factories[name](seed=seed)
+
+        for part in os.getenv("TOOL_SIMULATION_LATENCY", "").split(","):
+            if "=" in part:
+                tool, spec = part.split("=", 1)
+                profile.latencies[tool.strip()] = Latency.parse(spec)
+        profile.scale = float(os.getenv("TOOL_SIMULATION_SCALE", "1"))
+        return profile
+
+    def _session_rng_pair(self, arguments: Optional[Dict[str, Any]]) -> Tuple[random.Random, random.Random]:
+        session = current_session.get() or (arguments or {}).get("session_id") or "default"
+        rngs = self._session_rngs.get(session)
+        if rngs is None:
+            rngs = self._session_rngs[session] = (
+                random.Random(f"{self.seed}:{session}"),
+                random.Random(f"{self.seed}:{session}:latency"),
+            )
+            if len(self._session_rngs) > self.max_sessions:
+                self._session_rngs.popitem(last=False)
+        else:
+            self._session_rngs.move_to_end(session)
+        return rngs
+
+    def rng(self, arguments: Optional[Dict[str, Any]] = None) -> random.Random:
+        """RNG for the session of the current tool call."""
+        if self.seed is None:
+            return self._shared_rng
+        return self._session_rng_pair(arguments)[0]
+
+    def latency(self, tool: str, arguments: Optional[Dict[str, Any]] = None) -> float:
+        """Sample a delay in seconds for one call of ``tool`` in the current session."""
+        rng = self._latency_rng if self.seed is None else self._session_rng_pair(arguments)[1]
+        return max(self.latencies.get(tool, self.default).sample(rng) * self.scale, 0.0)
+
+    async def delay(self, tool: str, arguments: Optional[Dict[str, Any]] = None):
+        seconds = self.latency(tool, arguments)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "profile": self.name,
+            "seed": self.seed,
+            "scale": self.scale,
+            "default": repr(self.default),
+            "latencies": {tool: repr(latency) for tool, latency in sorted(self.latencies.items())},
+        }
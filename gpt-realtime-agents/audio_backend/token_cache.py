@@ -0,0 +1,124 @@
+"""Process-wide Azure AD token cache for the Azure OpenAI endpoints.
+
+Every realtime session request and ACS bridge used to ask the credential for a
+token on the request path; a cold cache meant a network round trip (and, with the
+synchronous provider in the ACS bridge, a blocked event loop). ``AsyncTokenCache``
+keeps the current token in memory and refreshes it in a background task well
+before it expires, so reading it is normally instant.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+
+class AsyncTokenCache:
+    """Caches a bearer token and refreshes it ahead of expiry.
+
+    ``credential`` is normally an ``azure.identity.aio`` credential; a synchronous
+    credential also works, its ``get_token`` then runs in a worker thread.
+    """
+
+    def __init__(
+        self,
+        credential: Any,
+        scope: str = COGNITIVE_SERVICES_SCOPE,
+        refresh_margin_seconds: float = 300,
+        retry_seconds: float = 10,
+    ):
+        self.credential = credential
+        self.scope = scope
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.retry_seconds = retry_seconds
+
+        self._token: Optional[str] = None
+        self._expires_on = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._is_async = inspect.iscoroutinefunction(getattr(credential, "get_token", None))
+
+    def peek(self) -> Optional[str]:
+        """Return the cached token if it is still valid, without awaiting."""
+        if self._token is not None and time.time() < self._expires_on:
+            return self._token
+        return None
+
+    async def get_token(self) -> str:
+        token = self.peek()
+        if token is not None:
+            return token
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            token = self.peek()
+            if token is not None:
+                return token
+            return await self._refresh()
+
+    async def _refresh(self) -> str:
+        if self._is_async:
+            access_token = await self.credential.get_token(self.scope)
+        else:
+            access_token = await asyncio.to_thread(self.credential.get_token, self.scope)
+        self._token = access_token.token
+        self._expires_on = float(access_token.expires_on)
+        logger.debug("Token refreshed, expires in %.0fs", self._expires_on - time.time())
+        return self._token
+
+    async def _refresh_loop(self):
+        while True:
+            # Refresh at the margin, or halfway through tokens shorter-lived than the margin
+            remaining = self._expires_on - time.time()
+            delay = max(remaining - self.refresh_margin_seconds, remaining / 2)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                async with self._lock:
+                    await self._refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the current token while it lasts; get_token() refreshes on demand after that
+                logger.warning("Background token refresh failed: %s", e)
+                await asyncio.sleep(self.retry_seconds)
+
+    async def start(self):
+        """Fetch the first token and start refreshing in the background. Idempotent."""
+        if self._refresh_task is not None:
+            return
+        try:
+            await self.get_token()
+        except Exception as e:
+            logger.warning("Initial token fetch failed, will retry in the background: %s", e)
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+        close = getattr(self.credential, "close", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+
+
+_shared_token_cache: Optional[AsyncTokenCache] = None
+
+
+def shared_token_cache() -> AsyncTokenCache:
+    """Token cache shared by the session endpoint and the ACS bridge."""
+    global _shared_token_cache
+    if _shared_token_cache is None:
+        from azure.identity.aio import DefaultAzureCredential
+
+        credential = DefaultAzureCredential(exclude_interactive_browser_credential=False)
+        _shared_token_cache = AsyncTokenCache(credential)
+    return _shared_token_cache
@@ -0,0 +1,111 @@
+"""Pre-encoded ``GET /api/tools`` payload.
+
+The tool manifest only changes when TOOLS_REGISTRY does, so it is serialized
+once into compact JSON bytes plus gzip (and brotli, when installed) variants
+with a content-hash ETag. Requests pick a variant by ``Accept-Encoding`` and a
+matching ``If-None-Match`` gets a 304 without a body.
+
+The registry is fingerprinted by tool names and the identity of their
+definition dicts; registering, removing or replacing a tool triggers a rebuild,
+editing a definition dict in place does not.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import brotli
+except ModuleNotFoundError:  # pragma: no cover - optional, gzip is served instead
+    brotli = None
+
+CACHE_CONTROL = "public, no-cache"  # CDNs may store it but must revalidate (cheap 304s)
+
+
+class EncodedManifest:
+    __slots__ = ("etag", "bodies")
+
+    def __init__(self, payload: Dict[str, Any]):
+        identity = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.etag = hashlib.sha256(identity).hexdigest()[:32]
+        self.bodies: Dict[str, bytes] = {"identity": identity, "gzip": gzip.compress(identity, 9, mtime=0)}
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(identity, quality=11)
+
+    def etag_for(self, encoding: str) -> str:
+        # Each encoding is a different representation and needs its own strong ETag
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set[str]:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(if_none_match: Optional[str], manifest: EncodedManifest) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        # Weak comparison, and any encoding of the same content counts (CDNs may re-encode)
+        tag = tag.removeprefix("W/").strip('"')
+        if tag.split("-", 1)[0] == manifest.etag:
+            return True
+    return False
+
+
+class ToolManifest:
+    """The encoded ``/api/tools`` response for a tools registry, rebuilt when the registry changes."""
+
+    def __init__(self, registry: Dict[str, Dict[str, Any]], tool_choice: str = "auto"):
+        self.registry = registry
+        self.tool_choice = tool_choice
+        self._fingerprint: Optional[Tuple[Any, ...]] = None
+        self._encoded: Optional[EncodedManifest] = None
+        self.builds = 0
+
+    def _current_fingerprint(self) -> Tuple[Any, ...]:
+        return tuple((name, id(tool["definition"])) for name, tool in self.registry.items())
+
+    def encoded(self) -> EncodedManifest:
+        fingerprint = self._current_fingerprint()
+        if self._encoded is None or fingerprint != self._fingerprint:
+            self._encoded = EncodedManifest({
+                "tools": [tool["definition"] for tool in self.registry.values()],
+                "tool_choice": self.tool_choice,
+            })
+            self._fingerprint = fingerprint
+            self.builds += 1
+        return self._encoded
+
+    def respond(self, accept_encoding: Optional[str], if_none_match: Optional[str]) -> Tuple[int, Optional[bytes], Dict[str, str]]:
+        """(status, body, headers) for a request with the given headers."""
+        manifest = self.encoded()
+        accepted = _accepted_encodings(accept_encoding)
+        encoding = next((name for name in ("br", "gzip") if name in accepted and name in manifest.bodies), "identity")
+
+        headers = {
+            "ETag": manifest.etag_for(encoding),
+            "Vary": "Accept-Encoding",
+            "Cache-Control": CACHE_CONTROL,
+        }
+        if _etag_matches(if_none_match, manifest):
+            return 304, None, headers
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return 200, manifest.bodies[encoding], headers
@@ -0,0 +1,517 @@
+"""Execution of tool calls shared by the browser endpoint and the ACS bridge.
+
+Both paths can deliver the same function call more than once: the browser
+retries ``/api/function-call`` and the bridge can see a call again after a
+reconnect. ``invoke_tool`` runs each call at most once per ``call_id``:
+
+- a completed result is kept for ``ttl_seconds`` and returned to duplicates
+- a duplicate arriving while the call is still running awaits the same task
+- failures are not kept, so a retry after an error runs the tool again
+
+Each execution is bounded by the tool's ``ToolPolicy`` (deadline, max in flight,
+queue or reject when full). A call that misses its deadline or is turned away
+returns a structured "temporarily unavailable" output instead of an exception,
+so the model can tell the customer and the conversation keeps moving.
+
+Tools whose output depends only on their arguments and the catalog can declare
+a ``"cache"``: results are then memoized per canonical arguments (``ResultCache``)
+until they expire or the catalog is reloaded.
+
+A result is the UI view (with its ``_visual`` block); ``model_output`` derives
+the smaller view that is sent back to the Realtime model, and the tool's
+``OutputEncoder`` turns that into the compact JSON string that is sent, within
+the tool's byte budget.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ToolExecutor = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]] | Dict[str, Any]]
+
+
+def canonical_arguments(arguments: Dict[str, Any]) -> str:
+    """Arguments as a stable string: same content, same string, whatever the key order."""
+    return json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ToolUnavailable(Exception):
+    """A call refused by its tool's policy: ``reason`` is "timeout" or "busy"."""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name} is temporarily unavailable ({reason})")
+        self.name = name
+        self.reason = reason
+
+    def output(self) -> Dict[str, Any]:
+        return {
+            "error": "temporarily_unavailable",
+            "tool": self.name,
+            "reason": self.reason,
+            "retryable": True,
+            "message": "This service is temporarily unavailable. Let the customer know, offer to try again in a moment, and carry on with anything else they need.",
+        }
+
+
+ON_FULL_QUEUE = "queue"    # wait for a free slot (within the deadline)
+ON_FULL_REJECT = "reject"  # answer "busy" right away
+
+
+class ToolPolicy:
+    """Execution bounds for one tool, declared as ``"policy"`` next to its TOOLS_REGISTRY entry.
+
+    ``timeout_seconds`` covers waiting for a slot plus running the executor.
+    ``max_concurrency`` caps calls in flight; when all slots are taken new calls
+    queue or are rejected according to ``on_full``, and at most ``max_queue`` may
+    wait. ``None`` means unbounded.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None, max_concurrency: Optional[int] = None,
+                 on_full: str = ON_FULL_QUEUE, max_queue: Optional[int] = None):
+        if on_full not in (ON_FULL_QUEUE, ON_FULL_REJECT):
+            raise ValueError(f"Unknown on_full '{on_full}', expected '{ON_FULL_QUEUE}' or '{ON_FULL_REJECT}'")
+        self.timeout_seconds = timeout_seconds
+        self.max_concurrency = max_concurrency
+        self.on_full = on_full
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        # Calls admitted and not finished (running or queued), counted before they reach the semaphore
+        self._admitted = 0
+
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ToolPolicy":
+        config = dict(config or {})
+        config.setdefault("timeout_seconds", DEFAULT_TIMEOUT_SECONDS)
+        return cls(**config)
+
+    async def _run(self, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if self._semaphore is not None:
+            self.queued += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.queued -= 1
+        self.in_flight += 1
+        try:
+            return await call()
+        finally:
+            self.in_flight -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def _admit(self) -> bool:
+        if self.max_concurrency is None or self._admitted < self.max_concurrency:
+            return True
+        if self.on_full == ON_FULL_REJECT:
+            return False
+        return self.max_queue is None or self._admitted - self.max_concurrency < self.max_queue
+
+    async def run(self, name: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if not self._admit():
+            self.rejected += 1
+            logger.warning("Tool %s rejected: %d calls running or queued (max_concurrency %d)", name, self._admitted, self.max_concurrency)
+            raise ToolUnavailable(name, "busy")
+        self._admitted += 1
+        try:
+            result = await asyncio.wait_for(self._run(call), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning("Tool %s timed out after %ss", name, self.timeout_seconds)
+            raise ToolUnavailable(name, "timeout")
+        finally:
+            self._admitted -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "timeout_seconds": self.timeout_seconds,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
+
+
+# Deadline for tools that don't declare one (0 disables)
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("TOOL_DEFAULT_TIMEOUT_SECONDS", "10")) or None
+
+# One policy instance per tool, so the browser and the ACS bridge share its slots
+_POLICIES: Dict[str, ToolPolicy] = {}
+
+
+def tool_policy(name: str, config: Optional[Dict[str, Any]] = None) -> ToolPolicy:
+    """The policy of tool ``name``, created from its registry ``"policy"`` config on first use."""
+    policy = _POLICIES.get(name)
+    if policy is None:
+        policy = _POLICIES[name] = ToolPolicy.from_config(config)
+    return policy
+
+
+def policy_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: policy.stats() for name, policy in sorted(_POLICIES.items())}
+
+
+class ResultCache:
+    """LRU cache of one tool's results keyed by its canonical arguments.
+
+    Declared as ``"cache": {"ttl_seconds": ..., "max_entries": ...}`` next to a
+    TOOLS_REGISTRY entry. Cached results are shared between callers and must be
+    treated as read-only.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        # Bumped by clear(); results computed before an invalidation are not stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, result: Dict[str, Any], generation: int):
+        if generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+_RESULT_CACHES: Dict[str, ResultCache] = {}
+
+
+def result_cache(name: str, config: Optional[Dict[str, Any]] = None) -> Optional[ResultCache]:
+    """The result cache of tool ``name``, created from its registry ``"cache"`` config; None if it has none."""
+    cache = _RESULT_CACHES.get(name)
+    if cache is None and config:
+        cache = _RESULT_CACHES[name] = ResultCache(**config)
+    return cache
+
+
+def invalidate_result_caches():
+    """Drop every cached tool result, e.g. after the catalog was reloaded."""
+    for cache in _RESULT_CACHES.values():
+        cache.clear()
+
+
+def result_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in sorted(_RESULT_CACHES.items())}
+
+
+class _Entry:
+    __slots__ = ("task", "completed_at", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.completed_at: Optional[float] = None
+        # Callers currently awaiting the task
+        self.waiters = 0
+
+
+class IdempotencyCache:
+    """Results of recent tool calls keyed by ``(call_id, name, arguments)``.
+
+    The arguments are part of the key so a reused call id with different arguments
+    is executed rather than answered with an unrelated result. A caller that is
+    cancelled (e.g. its phone call hung up) only cancels the tool call if no other
+    caller is still waiting for it. At most
+    ``max_entries`` calls are kept (oldest first out); ``ttl_seconds <= 0`` disables
+    the cache.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[str, str, str], _Entry] = OrderedDict()
+
+        self.executed = 0
+        self.hits = 0
+        self.joined = 0
+
+    @classmethod
+    def from_env(cls) -> "IdempotencyCache":
+        return cls(
+            ttl_seconds=float(os.getenv("TOOL_IDEMPOTENCY_TTL_SECONDS", "300")),
+            max_entries=int(os.getenv("TOOL_IDEMPOTENCY_MAX_ENTRIES", "10000")),
+        )
+
+    def _evict(self, now: float):
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            expired = entry.completed_at is not None and now - entry.completed_at > self.ttl_seconds
+            if not expired and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    async def run(self, call_id: Optional[str], name: str, arguments: Dict[str, Any], call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if not call_id or self.ttl_seconds <= 0:
+            self.executed += 1
+            return await call()
+
+        now = time.monotonic()
+        self._evict(now)
+        key = (call_id, name, canonical_arguments(arguments))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.completed_at is None:
+                self.joined += 1
+                logger.info("Tool call %s (%s) already running, waiting for its result", call_id, name)
+            else:
+                self.hits += 1
+                logger.info("Tool call %s (%s) already completed, returning its result", call_id, name)
+            return await self._wait(entry)
+
+        self.executed += 1
+        entry = _Entry(asyncio.ensure_future(call()))
+        self._entries[key] = entry
+        entry.task.add_done_callback(lambda task: self._on_done(key, entry, task))
+        return await self._wait(entry)
+
+    @staticmethod
+    async def _wait(entry: _Entry) -> Dict[str, Any]:
+        entry.waiters += 1
+        try:
+            # Shielded so a caller going away doesn't cancel the call for the others...
+            return await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            # ...unless it was the last one waiting
+            if entry.waiters == 1 and not entry.task.done():
+                entry.task.cancel()
+            raise
+        finally:
+            entry.waiters -= 1
+
+    def _on_done(self, key: Tuple[str, str, str], entry: _Entry, task: asyncio.Task):
+        if task.cancelled() or task.exception() is not None:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            return
+        entry.completed_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "executed": self.executed,
+            "hits": self.hits,
+            "joined": self.joined,
+        }
+
+
+# Shared by /api/function-call and the ACS bridge so a call is deduplicated across both
+IDEMPOTENCY_CACHE = IdempotencyCache.from_env()
+
+
+async def invoke_tool(name: str, call_id: Optional[str], arguments: Dict[str, Any], executor: ToolExecutor,
+                      policy: Optional[ToolPolicy] = None, cache: Optional[IdempotencyCache] = None,
+                      results: Optional[ResultCache] = None) -> Dict[str, Any]:
+    """Run ``executor(arguments)`` once per call id within ``policy`` and return its result.
+
+    With ``results`` an unexpired result for the same arguments is returned without
+    running the tool at all.
+    """
+    policy = policy or tool_policy(name)
+    results_key, generation = None, 0
+    if results is not None:
+        results_key = canonical_arguments(arguments)
+        cached = results.get(results_key)
+        if cached is not None:
+            return cached
+        generation = results.generation
+
+    async def execute() -> Dict[str, Any]:
+        result = executor(arguments)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    try:
+        # Inside the idempotent call, so joined duplicates don't take extra slots
+        result = await (cache or IDEMPOTENCY_CACHE).run(call_id, name, arguments, lambda: policy.run(name, execute))
+    except ToolUnavailable as exc:
+        # Not cached: a retry after a timeout or rejection runs the tool again
+        return exc.output()
+    if results is not None:
+        results.put(results_key, result, generation)
+    return result
+
+
+def model_output(result: Dict[str, Any], model_view: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """The part of a tool result the Realtime model needs.
+
+    Uses the tool's ``"model_view"`` from TOOLS_REGISTRY when it has one, otherwise
+    drops the UI-only ``_visual`` block. Error results are passed through as they are.
+    Never modifies ``result``, which may be a shared cached object.
+    """
+    if "error" in result:
+        return result
+    if model_view is not None:
+        return model_view(result)
+    if "_visual" not in result:
+        return result
+    return {key: value for key, value in result.items() if key != "_visual"}
+
+
+def _drop_nulls(value: Any, abbreviate: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {abbreviate.get(key, key): _drop_nulls(item, abbreviate) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [_drop_nulls(item, abbreviate) for item in value if item is not None]
+    return value
+
+
+def _longest(value: Any, kind: type, best: Tuple[int, Any] = (0, None)) -> Tuple[int, Any]:
+    """(size, container) of the largest list, or (length, (parent, key)) of the longest string."""
+    items = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    for key, item in items:
+        if kind is list and isinstance(item, list) and len(item) > best[0]:
+            best = (len(item), item)
+        elif kind is str and isinstance(item, str) and len(item) > best[0]:
+            best = (len(item), (value, key))
+        best = _longest(item, kind, best)
+    return best
+
+
+class OutputEncoder:
+    """Encodes one tool's outputs for ``function_call_output`` and counts the bytes sent.
+
+    Outputs become compact JSON (no whitespace, no null values). ``abbreviate``
+    renames keys (e.g. ``{"description": "desc"}``); only worth it when the tool
+    description tells the model what the short keys mean. An output larger than
+    ``max_bytes`` is shrunk until it fits: the longest lists lose their tail
+    items, then the longest strings are cut, and ``"_truncated": true`` tells the
+    model it got a partial result. If that is still too large, only a short note
+    (or, for tiny budgets, just ``{"_truncated":true}``) is sent; ``max_bytes`` is
+    raised to at least the size of the latter.
+    """
+
+    TRUNCATED_KEY = "_truncated"
+    TOO_LARGE = {TRUNCATED_KEY: True, "message": "The result was too large to return; ask for something narrower."}
+    MIN_BYTES = len('{"_truncated":true}')
+
+    def __init__(self, max_bytes: Optional[int] = None, abbreviate: Optional[Dict[str, str]] = None):
+        self.max_bytes = max(max_bytes, self.MIN_BYTES) if max_bytes else None
+        self.abbreviate = dict(abbreviate or {})
+        self.calls = 0
+        self.bytes_sent = 0
+        self.max_bytes_sent = 0
+        self.truncated = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None) -> "OutputEncoder":
+        config = dict(config or {})
+        config.setdefault("max_bytes", DEFAULT_OUTPUT_MAX_BYTES)
+        return cls(**config)
+
+    @staticmethod
+    def _dumps(value: Any) -> str:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    def encode(self, output: Dict[str, Any]) -> str:
+        value = _drop_nulls(output, self.abbreviate)
+        text = self._dumps(value)
+        size = len(text.encode("utf-8"))
+        if self.max_bytes is not None and size > self.max_bytes:
+            text = self._shrink(value if isinstance(value, dict) else {"result": value})
+            size = len(text.encode("utf-8"))
+            self.truncated += 1
+        self.calls += 1
+        self.bytes_sent += size
+        self.max_bytes_sent = max(self.max_bytes_sent, size)
+        return text
+
+    def _shrink(self, value: Dict[str, Any]) -> str:
+        # Works on a copy: the output may share lists and dicts with a cached result
+        value = json.loads(self._dumps(value))
+        value[self.TRUNCATED_KEY] = True
+        text = self._dumps(value)
+        for kind in (list, str):
+            while len(text.encode("utf-8")) > self.max_bytes:
+                length, target = _longest(value, kind)
+                if kind is list:
+                    if length == 0:
+                        break
+                    del target[max(length - max(length // 4, 1), 0):]
+                else:
+                    if length <= 16:
+                        break
+                    parent, key = target
+                    parent[key] = parent[key][:length // 2] + "…"
+                text = self._dumps(value)
+        if len(text.encode("utf-8")) > self.max_bytes:
+            text = self._dumps(self.TOO_LARGE)
+        if len(text.encode("utf-8")) > self.max_bytes:
+            text = self._dumps({self.TRUNCATED_KEY: True})
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_bytes": self.max_bytes,
+            "calls": self.calls,
+            "bytes_sent": self.bytes_sent,
+            "avg_bytes": round(self.bytes_sent / self.calls) if self.calls else 0,
+            "max_bytes_sent": self.max_bytes_sent,
+            "truncated": self.truncated,
+        }
+
+
+# Byte budget for a function_call_output of tools without an "output" config (optional, 0 disables)
+DEFAULT_OUTPUT_MAX_BYTES = int(os.getenv("TOOL_OUTPUT_MAX_BYTES", "8000"))
+
+_ENCODERS: Dict[str, OutputEncoder] = {}
+
+
+def output_encoder(name: str, config: Optional[Dict[str, Any]] = None) -> OutputEncoder:
+    """The output encoder of tool ``name``, created from its registry ``"output"`` config on first use."""
+    encoder = _ENCODERS.get(name)
+    if encoder is None:
+        encoder = _ENCODERS[name] = OutputEncoder.from_config(config)
+    return encoder
+
+
+def output_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: encoder.stats() for name, encoder in sorted(_ENCODERS.items())}
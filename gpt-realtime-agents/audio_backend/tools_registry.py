@@ -1,8 +1,12 @@
-import random
-import asyncio
+import heapq
 from datetime import datetime, timedelta
 from typing import Any, Dict, List
 
+from cart_store import create_cart_store
+from catalog import Catalog
+from simulation import SimulationProfile
+from tool_runtime import invalidate_result_caches
+
 # =============================================================================
 # MOCK DATA CATALOGS
 # =============================================================================
@@ -273,8 +277,28 @@ MOCK_ACCESSORIES = {
     ]
 }
 
-# Shopping cart (in-memory - will be lost on restart)
-SHOPPING_CART = {}
+# Indexed view over the catalogs above - executors resolve ids and ranges through this
+CATALOG = Catalog(MOCK_DEVICES, MOCK_PLANS, MOCK_ACCESSORIES)
+
+
+def reload_catalog(devices: List[Dict[str, Any]], plans: List[Dict[str, Any]], accessories: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Replace the catalog data (e.g. from a product feed) and rebuild its indexes."""
+    CATALOG.reload(devices, plans, accessories)
+    # Cached tool results were computed from the old data
+    invalidate_result_caches()
+
+
+# Shopping carts keyed by session_id - bounded, TTL-evicted, optionally shared via SQLite
+CART_STORE = create_cart_store()
+
+# Latency and random outcomes of the mocked back-office tools (see simulation.py)
+SIMULATION = SimulationProfile.from_env()
+
+
+def configure_simulation(profile: SimulationProfile) -> None:
+    """Switch the mocked tools to another simulation profile (e.g. ``SimulationProfile.fast()`` for benchmarks)."""
+    global SIMULATION
+    SIMULATION = profile
 
 # =============================================================================
 # CONTOSO SALES TOOLS
@@ -288,68 +312,14 @@ async def search_devices_by_attributes(arguments: Dict[str, Any]) -> Dict[str, A
     brand = arguments.get("brand")
     use_case = arguments.get("use_case")
 
-    quality_levels = {"good": 1, "very_good": 2, "excellent": 3}
-
-    # Score each device based on how well it matches criteria
-    scored_devices = []
-    for device in MOCK_DEVICES:
-        attrs = device["attributes"]
-        score = 0
-
-        # Hard price filter - don't show devices over budget
-        if device["price_monthly"] > price_max:
-            continue
-
-        # Brand match - strong preference (exact match gets big boost)
-        if brand:
-            if device["brand"].lower() == brand.lower():
-                score += 50  # Exact brand match
-            else:
-                continue  # Skip non-matching brands if brand specified
-
-        # Battery scoring (not exclusion)
-        if battery_pref:
-            required_level = quality_levels.get(battery_pref, 0)
-            device_level = quality_levels.get(attrs.get("battery_life", "good"), 0)
-            # Give points based on how close/better the device is
-            if device_level >= required_level:
-                score += 20 + (device_level - required_level) * 5  # Bonus for exceeding
-            else:
-                score += device_level * 5  # Partial credit
-
-        # Camera scoring (not exclusion)
-        if camera_pref:
-            required_level = quality_levels.get(camera_pref, 0)
-            device_level = quality_levels.get(attrs.get("camera_quality", "good"), 0)
-            if device_level >= required_level:
-                score += 20 + (device_level - required_level) * 5
-            else:
-                score += device_level * 5
-
-        # Use case match
-        if use_case and use_case in attrs.get("use_cases", []):
-            score += 15
-
-        # Rating contribution
-        score += (device.get("rating", 0) * 5)
-
-        # Price value - cheaper is better (within budget)
-        price_score = max(0, (price_max - device["price_monthly"]) / 5)
-        score += price_score
-
-        scored_devices.append({"device": device, "score": score})
-
-    # Sort by score descending
-    scored_devices.sort(key=lambda x: -x["score"])
-
-    # Return top devices with their scores
-    top_devices = [item["device"] for item in scored_devices[:5]]
+    # Vectorized over the whole catalog when it is large enough (see device_scoring)
+    match_count, top_devices = CATALOG.top_scored_devices(battery_pref, camera_pref, price_max, brand, use_case, limit=5)
 
     return {
         "search_criteria": arguments,
         "results_count": len(top_devices),
         "devices": top_devices,
-        "message": f"Found {len(scored_devices)} devices, showing top {len(top_devices)} matches",
+        "message": f"Found {match_count} devices, showing top {len(top_devices)} matches",
         "scoring_used": True,
         "_visual": {
             "type": "product_grid",
@@ -363,7 +333,7 @@ async def get_device_details(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Get full details for a specific device."""
     device_id = arguments.get("device_id")
 
-    device = next((d for d in MOCK_DEVICES if d["id"] == device_id), None)
+    device = CATALOG.device(device_id)
     if not device:
         return {"error": "Device not found"}
 
@@ -400,7 +370,7 @@ async def compare_devices(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Compare multiple devices side-by-side."""
     device_ids = arguments.get("device_ids", [])
 
-    devices = [d for d in MOCK_DEVICES if d["id"] in device_ids]
+    devices = CATALOG.devices_by_ids(device_ids)
 
     comparison = {
         "devices": devices,
@@ -436,28 +406,37 @@ async def get_similar_devices(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Find alternative devices at different price points."""
     device_id = arguments.get("device_id")
 
-    current = next((d for d in MOCK_DEVICES if d["id"] == device_id), None)
+    current = CATALOG.device(device_id)
     if not current:
         return {"error": "Device not found"}
 
     current_price = current["price_monthly"]
 
-    # Find cheaper, similar price, and premium alternatives
-    cheaper = [d for d in MOCK_DEVICES if d["price_monthly"] < current_price - 5]
-    premium = [d for d in MOCK_DEVICES if d["price_monthly"] > current_price + 5]
-    similar = [d for d in MOCK_DEVICES if abs(d["price_monthly"] - current_price) <= 5 and d["id"] != device_id]
+    # Find cheaper, similar price, and premium alternatives via the price index. The index
+    # bisects with the same `< p - 5` / `> p + 5` comparisons; for "similar" it only narrows
+    # the rows and the original abs() test decides, so float rounding can't move a boundary
+    cheaper = CATALOG.devices_by_price(max_monthly=current_price - 5, max_inclusive=False)
+    premium = CATALOG.devices_by_price(min_monthly=current_price + 5, min_inclusive=False)
+    similar = [
+        d for d in CATALOG.devices_by_price(current_price - 6, current_price + 6)
+        if abs(d["price_monthly"] - current_price) <= 5 and d["id"] != device_id
+    ]
 
-    all_alternatives = (
-        sorted(cheaper, key=lambda d: -d["rating"])[:2] +
-        sorted(premium, key=lambda d: d["price_monthly"])[:2] +
-        sorted(similar, key=lambda d: -d["rating"])[:2]
-    )
+    # Best rated first; ties keep catalog order like a stable sort over the full list did
+    def by_rating(d):
+        return (-d["rating"], CATALOG.device_position(d["id"]))
+
+    cheaper_options = heapq.nsmallest(2, cheaper, key=by_rating)
+    premium_options = premium[:2]  # Already ordered by price
+    similar_options = heapq.nsmallest(2, similar, key=by_rating)
+
+    all_alternatives = cheaper_options + premium_options + similar_options
 
     return {
         "current_device": current,
-        "cheaper_options": sorted(cheaper, key=lambda d: -d["rating"])[:2],
-        "premium_options": sorted(premium, key=lambda d: d["price_monthly"])[:2],
-        "similar_price": sorted(similar, key=lambda d: -d["rating"])[:2],
+        "cheaper_options": cheaper_options,
+        "premium_options": premium_options,
+        "similar_price": similar_options,
         "_visual": {
             "type": "product_grid",
             "title": f"Alternatives to {current['name']}",
@@ -472,11 +451,11 @@ async def recommend_plan_for_device(arguments: Dict[str, Any]) -> Dict[str, Any]
     data_usage = arguments.get("estimated_data_usage_gb", 50)
     international = arguments.get("needs_international", False)
 
-    device = next((d for d in MOCK_DEVICES if d["id"] == device_id), None)
+    device = CATALOG.device(device_id)
 
-    # Filter plans based on needs
+    # Filter plans based on needs (iterating in price order keeps the result sorted)
     suitable_plans = []
-    for plan in MOCK_PLANS:
+    for plan in CATALOG.plans_by_price():
         # Data requirement
         if plan["type"] == "capped":
             plan_data = int(plan["data"].replace("GB", ""))
@@ -489,9 +468,6 @@ async def recommend_plan_for_device(arguments: Dict[str, Any]) -> Dict[str, Any]
 
         suitable_plans.append(plan)
 
-    # Sort by price
-    suitable_plans.sort(key=lambda p: p["price_monthly"])
-
     # Calculate total monthly cost
     recommendations = []
     if device and suitable_plans:
@@ -521,10 +497,10 @@ async def get_compatible_accessories(arguments: Dict[str, Any]) -> Dict[str, Any
     """Get accessories compatible with a device (upsell opportunity)."""
     device_id = arguments.get("device_id")
 
-    accessories = MOCK_ACCESSORIES.get(device_id, MOCK_ACCESSORIES["default"])
+    accessories = CATALOG.accessories_for_device(device_id)
 
     # Get device name for context
-    device = next((d for d in MOCK_DEVICES if d["id"] == device_id), None)
+    device = CATALOG.device(device_id)
     device_name = device["name"] if device else "this device"
 
     # Group accessories by type for better presentation
@@ -551,19 +527,16 @@ async def calculate_total_cost(arguments: Dict[str, Any]) -> Dict[str, Any]:
     accessory_ids = arguments.get("accessory_ids", [])
     contract_months = arguments.get("contract_months", 24)
 
-    device = next((d for d in MOCK_DEVICES if d["id"] == device_id), None)
-    plan = next((p for p in MOCK_PLANS if p["id"] == plan_id), None)
+    device = CATALOG.device(device_id)
+    plan = CATALOG.plan(plan_id)
 
     if not device or not plan:
         return {"error": "Invalid device or plan ID"}
 
-    # Calculate accessories cost
-    all_accessories = []
-    for acc_list in MOCK_ACCESSORIES.values():
-        all_accessories.extend(acc_list)
-
+    # Calculate accessories cost: every catalog accessory whose id was requested, as it always was
+    requested = set(accessory_ids)
     accessories_cost = sum(
-        acc["price"] for acc in all_accessories if acc["id"] in accessory_ids
+        acc["price"] for acc_list in CATALOG.accessories.values() for acc in acc_list if acc["id"] in requested
     )
 
     # Cost breakdown
@@ -610,21 +583,23 @@ async def calculate_total_cost(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 async def check_stock_availability(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Check device stock at local stores."""
+    rng = SIMULATION.rng(arguments)
+    await SIMULATION.delay("check_stock_availability", arguments)
     device_id = arguments.get("device_id")
     postcode = arguments.get("postcode", "SW1A 1AA")
 
-    device = next((d for d in MOCK_DEVICES if d["id"] == device_id), None)
+    device = CATALOG.device(device_id)
     if not device:
         return {"error": "Device not found"}
 
     # Mock store availability
     stores = [
-        {"name": "Contoso Oxford Street", "distance_miles": 0.5, "stock": random.choice([0, 2, 5, 10])},
-        {"name": "Contoso Westfield", "distance_miles": 2.3, "stock": random.choice([0, 1, 8])},
-        {"name": "Contoso Covent Garden", "distance_miles": 1.1, "stock": random.choice([3, 7, 12])}
+        {"name": "Contoso Oxford Street", "distance_miles": 0.5, "stock": rng.choice([0, 2, 5, 10])},
+        {"name": "Contoso Westfield", "distance_miles": 2.3, "stock": rng.choice([0, 1, 8])},
+        {"name": "Contoso Covent Garden", "distance_miles": 1.1, "stock": rng.choice([3, 7, 12])}
     ]
 
-    online_stock = random.choice(["In stock", "Low stock - 3 remaining", "Out of stock"])
+    online_stock = rng.choice(["In stock", "Low stock - 3 remaining", "Out of stock"])
 
     return {
         "device": device["name"],
@@ -638,12 +613,13 @@ async def check_stock_availability(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 async def check_upgrade_eligibility(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Check if customer is eligible for upgrade (MOCKED)."""
-    await asyncio.sleep(0.5)  # Simulate API call
+    rng = SIMULATION.rng(arguments)
+    await SIMULATION.delay("check_upgrade_eligibility", arguments)  # Simulate API call
 
     account_number = arguments.get("account_number", "MOCK")
 
-    eligible = random.choice([True, True, False])  # 66% eligible
-    months_remaining = 0 if eligible else random.randint(1, 12)
+    eligible = rng.choice([True, True, False])  # 66% eligible
+    months_remaining = 0 if eligible else rng.randint(1, 12)
 
     return {
         "account_number": account_number,
@@ -663,45 +639,49 @@ async def check_upgrade_eligibility(arguments: Dict[str, Any]) -> Dict[str, Any]
 
 async def get_customer_usage(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Get customer's historical usage to recommend appropriate plan (MOCKED)."""
-    await asyncio.sleep(0.5)
+    rng = SIMULATION.rng(arguments)
+    await SIMULATION.delay("get_customer_usage", arguments)
 
     return {
         "account_number": arguments.get("account_number"),
         "average_monthly_usage": {
-            "data_gb": random.randint(10, 80),
-            "minutes": random.randint(100, 800),
-            "texts": random.randint(50, 500)
+            "data_gb": rng.randint(10, 80),
+            "minutes": rng.randint(100, 800),
+            "texts": rng.randint(50, 500)
         },
         "peak_usage_month": {
-            "data_gb": random.randint(60, 120),
+            "data_gb": rng.randint(60, 120),
             "month": "August 2024"
         },
-        "current_plan": random.choice(["Essential 50GB", "Unlimited Lite"]),
+        "current_plan": rng.choice(["Essential 50GB", "Unlimited Lite"]),
         "recommendation": "Based on your usage, consider upgrading to 100GB plan"
     }
 
 
 async def check_coverage(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Check network coverage at customer's location."""
+    rng = SIMULATION.rng(arguments)
+    await SIMULATION.delay("check_coverage", arguments)
     postcode = arguments.get("postcode")
     service_type = arguments.get("service_type", "5g")  # "4g", "5g", "broadband"
 
     # Mock coverage data
-    coverage_quality = random.choice(["Excellent", "Good", "Fair"])
+    coverage_quality = rng.choice(["Excellent", "Good", "Fair"])
 
     return {
         "postcode": postcode,
         "service_type": service_type.upper(),
         "coverage": coverage_quality,
-        "signal_strength": random.randint(3, 5),
-        "max_speed_mbps": random.randint(50, 300) if service_type == "5g" else random.randint(20, 80),
-        "indoor_coverage": random.choice([True, True, False]),
-        "nearby_towers": random.randint(2, 8)
+        "signal_strength": rng.randint(3, 5),
+        "max_speed_mbps": rng.randint(50, 300) if service_type == "5g" else rng.randint(20, 80),
+        "indoor_coverage": rng.choice([True, True, False]),
+        "nearby_towers": rng.randint(2, 8)
     }
 
 
 async def run_credit_check(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Run credit check for contract approval. Requires customer details."""
+    rng = SIMULATION.rng(arguments)
     # Require customer information
     customer_name = arguments.get("customer_name")
     address = arguments.get("address")
@@ -719,15 +699,15 @@ async def run_credit_check(arguments: Dict[str, Any]) -> Dict[str, Any]:
         }
 
     # Simulate different outcomes
-    await asyncio.sleep(2)  # Simulate processing time
+    await SIMULATION.delay("run_credit_check", arguments)  # Simulate processing time
 
-    outcome = random.choices(
+    outcome = rng.choices(
         ['approved', 'approved', 'approved', 'review_required', 'declined'],
         weights=[0.7, 0.15, 0.1, 0.04, 0.01]
     )[0]
 
     if outcome == 'approved':
-        deposit = random.choice([0, 0, 0, 99]) if random.random() > 0.7 else 0
+        deposit = rng.choice([0, 0, 0, 99]) if rng.random() > 0.7 else 0
         return {
             "customer_name": customer_name,
             "status": "approved",
@@ -792,7 +772,7 @@ async def run_credit_check(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 async def verify_identity(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Verify customer identity (MOCKED)."""
-    await asyncio.sleep(1.5)
+    await SIMULATION.delay("verify_identity", arguments)
 
     return {
         "verified": True,
@@ -804,6 +784,7 @@ async def verify_identity(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 async def check_trade_in_value(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Estimate trade-in value for customer's old device."""
+    rng = SIMULATION.rng(arguments)
     device_model = arguments.get("device_model", "")
     condition = arguments.get("condition", "good")  # excellent, good, fair, poor
 
@@ -814,7 +795,7 @@ async def check_trade_in_value(arguments: Dict[str, Any]) -> Dict[str, Any]:
         }
 
     # Simulate processing
-    await asyncio.sleep(1)
+    await SIMULATION.delay("check_trade_in_value", arguments)
 
     # Mock trade-in values based on device model and condition
     base_values = {
@@ -857,7 +838,7 @@ async def check_trade_in_value(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
     # Bonus offer (random chance)
     bonus_offer = None
-    if random.random() > 0.6:
+    if rng.random() > 0.6:
         bonus_offer = f"Trade in today and get an extra £50 off your new phone!"
 
     # Build response with visual
@@ -880,7 +861,7 @@ async def check_trade_in_value(arguments: Dict[str, Any]) -> Dict[str, Any]:
                         "original_price": base_value,
                         "factors": {
                             "screen_condition": "Good" if condition != "poor" else "Cracked",
-                            "battery_health": f"{random.randint(75, 95)}%" if condition in ["excellent", "good"] else f"{random.randint(50, 70)}%",
+                            "battery_health": f"{rng.randint(75, 95)}%" if condition in ["excellent", "good"] else f"{rng.randint(50, 70)}%",
                             "physical_damage": "None" if condition == "excellent" else "Minor scratches" if condition == "good" else "Visible wear"
                         },
                         "bonus_offer": bonus_offer,
@@ -899,6 +880,86 @@ async def check_trade_in_value(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 
 # Cart Management Tools
+#
+# Each cart keeps its lines keyed by cart item id together with the resolved item
+# details and running totals, so adds/removes are O(1) and a summary is a plain read:
+#   {"items": {cart_item_id: {..., "detail": {...} | None, "upfront": n, "monthly": n}},
+#    "totals": {"upfront": n, "monthly": n}, "next_id": n, "created_at": iso}
+
+def _resolve_cart_line(item_type: str, item_id: str, cart_item_id: str) -> Dict[str, Any]:
+    """Look the item up once and record what it contributes to the cart totals."""
+    detail, upfront, monthly = None, 0, 0
+    if item_type == "device":
+        device = CATALOG.device(item_id)
+        if device:
+            detail, upfront, monthly = {**device, "cart_item_id": cart_item_id}, device["price_upfront"], device["price_monthly"]
+    elif item_type == "plan":
+        plan = CATALOG.plan(item_id)
+        if plan:
+            detail, monthly = {**plan, "cart_item_id": cart_item_id}, plan["price_monthly"]
+    elif item_type == "accessory":
+        acc = CATALOG.accessory(item_id)
+        if acc:
+            detail, upfront = {**acc, "cart_item_id": cart_item_id}, acc["price"]
+    return {"detail": detail, "upfront": upfront, "monthly": monthly}
+
+
+def _upgrade_cart(cart: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert, in place, a cart saved before lines were keyed by id (a list of items, no totals).
+
+    Such carts can still be in a SqliteCartStore database; they are rewritten in the
+    new shape on their next update. Old carts could reuse an id after a removal, so
+    duplicates get a fresh one.
+    """
+    if isinstance(cart.get("items"), dict):
+        return cart
+    old_items = cart.get("items") or []
+    suffixes = [int(item["id"].rsplit("_", 1)[-1]) for item in old_items if str(item.get("id", "")).rsplit("_", 1)[-1].isdigit()]
+    next_id = max(suffixes, default=-1) + 1
+
+    lines: Dict[str, Any] = {}
+    totals = {"upfront": 0, "monthly": 0}
+    for item in old_items:
+        cart_item_id = item.get("id")
+        if not cart_item_id or cart_item_id in lines:
+            cart_item_id, next_id = f"cart_{next_id}", next_id + 1
+        line = _resolve_cart_line(item.get("type"), item.get("item_id"), cart_item_id)
+        lines[cart_item_id] = {**item, "id": cart_item_id, **line}
+        totals["upfront"] += line["upfront"]
+        totals["monthly"] += line["monthly"]
+
+    cart["items"] = lines
+    cart["totals"] = totals
+    cart["next_id"] = next_id
+    cart.setdefault("created_at", datetime.now().isoformat())
+    return cart
+
+
+def _cart_view(cart: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolved items and totals of a cart, read straight from the maintained state."""
+    _upgrade_cart(cart)
+    items_details = [line["detail"] for line in cart["items"].values() if line["detail"] is not None]
+    total_upfront = cart["totals"]["upfront"]
+    total_monthly = cart["totals"]["monthly"]
+    return {
+        "items": items_details,
+        "upfront": total_upfront,
+        "monthly": total_monthly,
+        "total_24m": (total_monthly * 24) + total_upfront
+    }
+
+
+def _cart_preview(view: Dict[str, Any], title: str) -> Dict[str, Any]:
+    return {
+        "type": "cart_preview",
+        "title": title,
+        "items": view["items"],
+        "summary": {
+            "monthly": view["monthly"],
+            "total_24m": view["total_24m"]
+        }
+    }
+
 
 async def add_to_cart(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Add item to shopping cart."""
@@ -907,36 +968,31 @@ async def add_to_cart(arguments: Dict[str, Any]) -> Dict[str, Any]:
     item_id = arguments.get("item_id")
     config = arguments.get("config", {})  # color, storage, etc.
 
-    if session_id not in SHOPPING_CART:
-        SHOPPING_CART[session_id] = {"items": [], "created_at": datetime.now()}
-
-    cart_item = {
-        "id": f"cart_{len(SHOPPING_CART[session_id]['items'])}",
-        "type": item_type,
-        "item_id": item_id,
-        "config": config,
-        "added_at": datetime.now().isoformat()
-    }
-
-    SHOPPING_CART[session_id]["items"].append(cart_item)
+    def add_item(cart):
+        _upgrade_cart(cart)
+        cart_item_id = f"cart_{cart['next_id']}"
+        line = _resolve_cart_line(item_type, item_id, cart_item_id)
+        cart["items"][cart_item_id] = {
+            "id": cart_item_id,
+            "type": item_type,
+            "item_id": item_id,
+            "config": config,
+            "added_at": datetime.now().isoformat(),
+            **line
+        }
+        cart["next_id"] += 1
+        cart["totals"]["upfront"] += line["upfront"]
+        cart["totals"]["monthly"] += line["monthly"]
+        return cart_item_id, len(cart["items"]), _cart_view(cart)
 
-    # Get full cart summary for visual
-    cart_summary = await get_cart_summary({"session_id": session_id})
+    cart_item_id, cart_count, view = CART_STORE.update(session_id, add_item)
 
     return {
         "success": True,
-        "cart_item_id": cart_item["id"],
-        "cart_count": len(SHOPPING_CART[session_id]["items"]),
+        "cart_item_id": cart_item_id,
+        "cart_count": cart_count,
         "message": f"Added {item_type} to cart",
-        "_visual": {
-            "type": "cart_preview",
-            "title": "Shopping Cart",
-            "items": cart_summary.get("items", []),
-            "summary": {
-                "monthly": cart_summary.get("total_monthly", 0),
-                "total_24m": cart_summary.get("total_24m", 0)
-            }
-        }
+        "_visual": _cart_preview(view, "Shopping Cart")
     }
 
 
@@ -945,28 +1001,23 @@ async def remove_from_cart(arguments: Dict[str, Any]) -> Dict[str, Any]:
     session_id = arguments.get("session_id", "default")
     cart_item_id = arguments.get("cart_item_id")
 
-    if session_id in SHOPPING_CART:
-        SHOPPING_CART[session_id]["items"] = [
-            item for item in SHOPPING_CART[session_id]["items"]
-            if item["id"] != cart_item_id
-        ]
+    def remove_item(cart):
+        _upgrade_cart(cart)
+        line = cart["items"].pop(cart_item_id, None)
+        if line is not None:
+            cart["totals"]["upfront"] -= line["upfront"]
+            cart["totals"]["monthly"] -= line["monthly"]
+        return len(cart["items"]), _cart_view(cart)
 
-    # Get updated cart summary for visual
-    cart_summary = await get_cart_summary({"session_id": session_id})
+    cart_count, view = CART_STORE.update(session_id, remove_item, create=False) or (0, None)
+    if view is None:
+        view = {"items": [], "upfront": 0, "monthly": 0, "total_24m": 0}
 
     return {
         "success": True,
-        "cart_count": len(SHOPPING_CART.get(session_id, {}).get("items", [])),
+        "cart_count": cart_count,
         "message": "Item removed from cart",
-        "_visual": {
-            "type": "cart_preview",
-            "title": "Shopping Cart",
-            "items": cart_summary.get("items", []),
-            "summary": {
-                "monthly": cart_summary.get("total_monthly", 0),
-                "total_24m": cart_summary.get("total_24m", 0)
-            }
-        }
+        "_visual": _cart_preview(view, "Shopping Cart")
     }
 
 
@@ -974,52 +1025,21 @@ async def get_cart_summary(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Get complete cart with pricing."""
     session_id = arguments.get("session_id", "default")
 
-    if session_id not in SHOPPING_CART:
+    cart = CART_STORE.get(session_id)
+    if cart is None:
         return {"items": [], "total_upfront": 0, "total_monthly": 0}
 
-    cart = SHOPPING_CART[session_id]
-    items_details = []
-    total_upfront = 0
-    total_monthly = 0
-
-    for item in cart["items"]:
-        if item["type"] == "device":
-            device = next((d for d in MOCK_DEVICES if d["id"] == item["item_id"]), None)
-            if device:
-                items_details.append({**device, "cart_item_id": item["id"]})
-                total_upfront += device["price_upfront"]
-                total_monthly += device["price_monthly"]
-        elif item["type"] == "plan":
-            plan = next((p for p in MOCK_PLANS if p["id"] == item["item_id"]), None)
-            if plan:
-                items_details.append({**plan, "cart_item_id": item["id"]})
-                total_monthly += plan["price_monthly"]
-        elif item["type"] == "accessory":
-            # Find accessory in any list
-            for acc_list in MOCK_ACCESSORIES.values():
-                acc = next((a for a in acc_list if a["id"] == item["item_id"]), None)
-                if acc:
-                    items_details.append({**acc, "cart_item_id": item["id"]})
-                    total_upfront += acc["price"]
-                    break
+    view = _cart_view(cart)
 
     return {
-        "items": items_details,
+        "items": view["items"],
         "summary": {
-            "upfront_total": total_upfront,
-            "monthly_total": total_monthly,
-            "contract_value_24m": (total_monthly * 24) + total_upfront
+            "upfront_total": view["upfront"],
+            "monthly_total": view["monthly"],
+            "contract_value_24m": view["total_24m"]
         },
-        "item_count": len(items_details),
-        "_visual": {
-            "type": "cart_preview",
-            "title": "Your Cart",
-            "items": items_details,
-            "summary": {
-                "monthly": total_monthly,
-                "total_24m": (total_monthly * 24) + total_upfront
-            }
-        }
+        "item_count": len(view["items"]),
+        "_visual": _cart_preview(view, "Your Cart")
     }
 
 
@@ -1060,24 +1080,26 @@ async def apply_promo_code(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 async def process_payment(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Process checkout and payment (MOCKED - Always succeeds)."""
-    await asyncio.sleep(2)  # Simulate payment processing
+    rng = SIMULATION.rng(arguments)
+    await SIMULATION.delay("process_payment", arguments)  # Simulate payment processing
 
     payment_method = arguments.get("payment_method", "card")
     session_id = arguments.get("session_id", "default")
 
-    # Get cart details for order summary
-    cart_summary = await get_cart_summary({"session_id": session_id})
+    # Get cart details for order summary (totals are maintained by the cart itself)
+    cart = CART_STORE.get(session_id)
+    cart_view = _cart_view(cart) if cart is not None else {"items": [], "upfront": 0, "monthly": 0, "total_24m": 0}
 
-    order_id = f"VF-{random.randint(100000, 999999)}"
-    delivery_date = (datetime.now() + timedelta(days=random.randint(1, 3))).strftime("%A, %B %d")
+    order_id = f"VF-{rng.randint(100000, 999999)}"
+    delivery_date = (datetime.now() + timedelta(days=rng.randint(1, 3))).strftime("%A, %B %d")
 
     # Create stunning multi-section order confirmation
-    cart_items = cart_summary.get("items", [])
+    cart_items = cart_view["items"]
 
     return {
         "success": True,
         "order_id": order_id,
-        "confirmation_number": f"CONF-{random.randint(1000000, 9999999)}",
+        "confirmation_number": f"CONF-{rng.randint(1000000, 9999999)}",
         "payment_status": "completed",
         "delivery_estimate": delivery_date,
         "message": "Order confirmed! You'll receive a confirmation email shortly.",
@@ -1110,9 +1132,9 @@ async def process_payment(arguments: Dict[str, Any]) -> Dict[str, Any]:
                             {"label": item.get("name", "Item"), "amount": item.get("price_monthly", item.get("price", 0)), "type": "monthly" if "price_monthly" in item else "upfront"}
                             for item in cart_items
                         ],
-                        "total_upfront": cart_summary.get("total_upfront", 0),
-                        "total_monthly": cart_summary.get("total_monthly", 0),
-                        "total_24m": cart_summary.get("total_24m", 0)
+                        "total_upfront": cart_view["upfront"],
+                        "total_monthly": cart_view["monthly"],
+                        "total_24m": cart_view["total_24m"]
                     },
                     "style": "minimal"
                 },
@@ -1137,9 +1159,9 @@ async def get_available_plans(arguments: Dict[str, Any]) -> Dict[str, Any]:
     plan_type = arguments.get("plan_type")  # "unlimited", "capped", "all"
 
     if plan_type and plan_type != "all":
-        filtered = [p for p in MOCK_PLANS if p["type"] == plan_type]
+        filtered = [p for p in CATALOG.plans if p["type"] == plan_type]
     else:
-        filtered = MOCK_PLANS
+        filtered = CATALOG.plans
 
     return {
         "plans": filtered,
@@ -1187,31 +1209,33 @@ async def get_active_promotions(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 async def schedule_store_appointment(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Schedule in-store appointment (MOCKED)."""
+    rng = SIMULATION.rng(arguments)
     store_name = arguments.get("store_name", "Contoso Oxford Street")
     preferred_date = arguments.get("preferred_date")
     preferred_time = arguments.get("preferred_time")
 
     return {
         "confirmed": True,
-        "appointment_id": f"APT-{random.randint(10000, 99999)}",
+        "appointment_id": f"APT-{rng.randint(10000, 99999)}",
         "store": store_name,
         "date": preferred_date or (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d"),
         "time": preferred_time or "14:00",
-        "staff_member": random.choice(["Sarah", "James", "Emma", "Mohammed"]),
+        "staff_member": rng.choice(["Sarah", "James", "Emma", "Mohammed"]),
         "message": "Appointment confirmed! You'll receive a reminder SMS."
     }
 
 
 async def transfer_to_human_agent(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Transfer to human sales agent."""
+    rng = SIMULATION.rng(arguments)
     reason = arguments.get("reason", "customer_request")
     context = arguments.get("context", {})
 
     return {
         "transfer_initiated": True,
-        "estimated_wait_time_minutes": random.randint(2, 8),
+        "estimated_wait_time_minutes": rng.randint(2, 8),
         "agent_type": "sales_specialist",
-        "reference_number": f"TRF-{random.randint(100000, 999999)}",
+        "reference_number": f"TRF-{rng.randint(100000, 999999)}",
         "message": "Connecting you to a sales specialist. Please hold..."
     }
 
@@ -1230,21 +1254,103 @@ async def customise_webpage(arguments: Dict[str, Any]) -> Dict[str, Any]:
 
 async def send_quote_email(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Email quote to customer (MOCKED)."""
+    rng = SIMULATION.rng(arguments)
     email = arguments.get("email")
     cart_summary = arguments.get("cart_summary", {})
 
     return {
         "sent": True,
         "email": email,
-        "quote_id": f"QT-{random.randint(100000, 999999)}",
+        "quote_id": f"QT-{rng.randint(100000, 999999)}",
         "valid_until": (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d"),
         "message": f"Quote sent to {email}. Valid for 7 days."
     }
 
 
+# =============================================================================
+# MODEL VIEWS
+# =============================================================================
+# What the Realtime model gets back from tools whose result carries bulky display
+# data (image URLs, full device records); other tools only lose their _visual
+# block (see tool_runtime.model_output). Results may be cached: never mutate them.
+
+def _device_brief(device: Dict[str, Any]) -> Dict[str, Any]:
+    attributes = device.get("attributes", {})
+    return {
+        "id": device["id"],
+        "name": device["name"],
+        "brand": device["brand"],
+        "price_monthly": device["price_monthly"],
+        "price_upfront": device["price_upfront"],
+        "rating": device.get("rating"),
+        "battery_life": attributes.get("battery_life"),
+        "camera_quality": attributes.get("camera_quality"),
+        "storage_options": attributes.get("storage_options"),
+        "5g": attributes.get("5g"),
+    }
+
+
+def _item_brief(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: item[key] for key in ("cart_item_id", "id", "name", "type", "price", "price_monthly", "price_upfront", "in_stock") if key in item}
+
+
+def _search_devices_model_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "results_count": result["results_count"],
+        "message": result["message"],
+        "devices": [_device_brief(d) for d in result["devices"]],
+    }
+
+
+def _device_details_model_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in result.items() if key not in ("_visual", "image_url")}
+
+
+def _compare_devices_model_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "devices": [_device_brief(d) for d in result["devices"]],
+        "comparison_matrix": result["comparison_matrix"],
+        "best_for": result["best_for"],
+    }
+
+
+def _similar_devices_model_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "current_device": _device_brief(result["current_device"]),
+        "cheaper_options": [_device_brief(d) for d in result["cheaper_options"]],
+        "premium_options": [_device_brief(d) for d in result["premium_options"]],
+        "similar_price": [_device_brief(d) for d in result["similar_price"]],
+    }
+
+
+def _accessories_model_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    recommended = result["recommended"]
+    return {
+        "device_id": result["device_id"],
+        "accessories": [_item_brief(a) for a in result["accessories"]],
+        "recommended": _item_brief(recommended) if recommended else None,
+        "bundle_discount": result["bundle_discount"],
+    }
+
+
+def _cart_summary_model_view(result: Dict[str, Any]) -> Dict[str, Any]:
+    if "summary" not in result:  # Empty cart, already compact
+        return result
+    return {
+        "items": [_item_brief(item) for item in result["items"]],
+        "summary": result.get("summary"),
+        "item_count": result["item_count"],
+    }
+
+
 # =============================================================================
 # TOOLS REGISTRY
 # =============================================================================
+# Optional per-tool keys next to "definition" and "executor":
+#   "policy":     execution bounds (tool_runtime.ToolPolicy)
+#   "cache":      result memoization (tool_runtime.ResultCache)
+#   "model_view": result -> what the Realtime model gets (default: result without _visual)
+#   "output":     JSON encoding and byte budget of that view (tool_runtime.OutputEncoder)
 
 TOOLS_REGISTRY = {
     # Device Discovery & Recommendation
@@ -1282,7 +1388,8 @@ TOOLS_REGISTRY = {
                 }
             }
         },
-        "executor": search_devices_by_attributes
+        "executor": search_devices_by_attributes,
+        "model_view": _search_devices_model_view
     },
 
     "get_device_details": {
@@ -1301,7 +1408,9 @@ TOOLS_REGISTRY = {
                 "required": ["device_id"]
             }
         },
-        "executor": get_device_details
+        "executor": get_device_details,
+        "cache": {"ttl_seconds": 300, "max_entries": 512},
+        "model_view": _device_details_model_view
     },
 
     "compare_devices": {
@@ -1321,7 +1430,9 @@ TOOLS_REGISTRY = {
                 "required": ["device_ids"]
             }
         },
-        "executor": compare_devices
+        "executor": compare_devices,
+        "cache": {"ttl_seconds": 300, "max_entries": 512},
+        "model_view": _compare_devices_model_view
     },
 
     "get_similar_devices": {
@@ -1340,7 +1451,9 @@ TOOLS_REGISTRY = {
                 "required": ["device_id"]
             }
         },
-        "executor": get_similar_devices
+        "executor": get_similar_devices,
+        "cache": {"ttl_seconds": 300, "max_entries": 512},
+        "model_view": _similar_devices_model_view
     },
 
     "recommend_plan_for_device": {
@@ -1386,7 +1499,9 @@ TOOLS_REGISTRY = {
                 "required": ["device_id"]
             }
         },
-        "executor": get_compatible_accessories
+        "executor": get_compatible_accessories,
+        "cache": {"ttl_seconds": 300, "max_entries": 512},
+        "model_view": _accessories_model_view
     },
 
     "calculate_total_cost": {
@@ -1462,7 +1577,8 @@ TOOLS_REGISTRY = {
                 "required": ["account_number"]
             }
         },
-        "executor": check_upgrade_eligibility
+        "executor": check_upgrade_eligibility,
+        "policy": {"timeout_seconds": 3, "max_concurrency": 50, "on_full": "reject"}
     },
 
     "get_customer_usage": {
@@ -1481,7 +1597,8 @@ TOOLS_REGISTRY = {
                 "required": ["account_number"]
             }
         },
-        "executor": get_customer_usage
+        "executor": get_customer_usage,
+        "policy": {"timeout_seconds": 3, "max_concurrency": 50, "on_full": "reject"}
     },
 
     "check_coverage": {
@@ -1536,7 +1653,8 @@ TOOLS_REGISTRY = {
                 "required": ["customer_name", "address", "postcode"]
             }
         },
-        "executor": run_credit_check
+        "executor": run_credit_check,
+        "policy": {"timeout_seconds": 6, "max_concurrency": 20, "on_full": "queue", "max_queue": 40}
     },
 
     "verify_identity": {
@@ -1560,7 +1678,8 @@ TOOLS_REGISTRY = {
                 "required": ["id_type", "id_number"]
             }
         },
-        "executor": verify_identity
+        "executor": verify_identity,
+        "policy": {"timeout_seconds": 5, "max_concurrency": 20, "on_full": "queue", "max_queue": 40}
     },
 
     "check_trade_in_value": {
@@ -1584,7 +1703,8 @@ TOOLS_REGISTRY = {
                 "required": ["device_model"]
             }
         },
-        "executor": check_trade_in_value
+        "executor": check_trade_in_value,
+        "policy": {"timeout_seconds": 4, "max_concurrency": 50, "on_full": "reject"}
     },
 
     # Cart Management
@@ -1646,7 +1766,8 @@ TOOLS_REGISTRY = {
                 }
             }
         },
-        "executor": get_cart_summary
+        "executor": get_cart_summary,
+        "model_view": _cart_summary_model_view
     },
 
     "apply_promo_code": {
@@ -1693,7 +1814,8 @@ TOOLS_REGISTRY = {
                 "required": ["payment_method"]
             }
         },
-        "executor": process_payment
+        "executor": process_payment,
+        "policy": {"timeout_seconds": 8, "max_concurrency": 20, "on_full": "queue", "max_queue": 40}
     },
 
     "get_available_plans": {
@@ -1712,7 +1834,8 @@ TOOLS_REGISTRY = {
                 }
             }
         },
-        "executor": get_available_plans
+        "executor": get_available_plans,
+        "cache": {"ttl_seconds": 300, "max_entries": 16}
     },
 
     "get_active_promotions": {
@@ -1731,7 +1854,8 @@ TOOLS_REGISTRY = {
                 }
             }
         },
-        "executor": get_active_promotions
+        "executor": get_active_promotions,
+        "cache": {"ttl_seconds": 300, "max_entries": 16}
     },
 
     # Support & Engagement
@@ -0,0 +1,112 @@
+"""Fake ACS media streaming client for benchmarking ``/api/realtime-acs``.
+
+Behaves like an ACS call connected to the bridge: sends ``AudioMetadata`` and then
+one ``AudioData`` frame every 20 ms (PCM16 24 kHz, stamped with its send time, see
+``fake_realtime_server.stamp_frames``) while reading the model's audio back and
+measuring how long each frame took from the fake Realtime server to the caller.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from fake_realtime_server import FRAME_MS, read_stamps, stamp_frames
+
+
+class CallResult:
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.connect_ms: Optional[float] = None
+        self.first_audio_ms: Optional[float] = None
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.stop_audio = 0
+        self.output_latency_ms: List[float] = []
+        self.error: Optional[str] = None
+
+
+class FakeAcsCall:
+    def __init__(self, url: str, duration_s: float, call_id: Optional[str] = None):
+        self.url = url
+        self.duration_s = duration_s
+        self.result = CallResult(call_id or uuid.uuid4().hex)
+
+    async def run(self, session: aiohttp.ClientSession) -> CallResult:
+        result = self.result
+        started = time.perf_counter()
+        try:
+            async with session.ws_connect(self.url, headers={"x-ms-call-connection-id": result.call_id}, max_msg_size=0) as ws:
+                result.connect_ms = (time.perf_counter() - started) * 1000
+                await ws.send_json({
+                    "kind": "AudioMetadata",
+                    "audioMetadata": {"subscriptionId": result.call_id, "encoding": "PCM", "sampleRate": 24000, "channels": 1, "length": 960},
+                })
+                receiver = asyncio.create_task(self._receive(ws, started))
+                try:
+                    await self._send_audio(ws)
+                finally:
+                    receiver.cancel()
+                    await asyncio.gather(receiver, return_exceptions=True)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        return result
+
+    async def _send_audio(self, ws: aiohttp.ClientWebSocketResponse):
+        # Real time pacing without drift: frame n goes out at start + n * 20 ms
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        frames = int(self.duration_s * 1000 / FRAME_MS)
+        for n in range(frames):
+            delay = start + n * FRAME_MS / 1000 - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if ws.closed:
+                raise ConnectionResetError("bridge closed the call")
+            await ws.send_str(json.dumps({"kind": "AudioData", "audioData": {"data": stamp_frames(1), "silent": False}}))
+            self.result.frames_sent += 1
+
+    async def _receive(self, ws: aiohttp.ClientWebSocketResponse, started: float):
+        result = self.result
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            data = json.loads(msg.data)
+            kind = data.get("kind")
+            if kind == "AudioData":
+                now = time.time_ns()
+                if result.first_audio_ms is None:
+                    result.first_audio_ms = (time.perf_counter() - started) * 1000
+                stamps = read_stamps(data["audioData"]["data"])
+                result.frames_received += len(stamps)
+                result.output_latency_ms.extend((now - stamp) / 1e6 for stamp in stamps)
+            elif kind == "StopAudio":
+                result.stop_audio += 1
+
+
+async def run_calls(url: str, calls: int, duration_s: float, ramp_s: float = 0.0) -> List[CallResult]:
+    """Run ``calls`` concurrent fake calls, starting them evenly over ``ramp_s`` seconds."""
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def start(i: int) -> CallResult:
+            if ramp_s:
+                await asyncio.sleep(ramp_s * i / calls)
+            return await FakeAcsCall(url, duration_s).run(session)
+
+        return list(await asyncio.gather(*(start(i) for i in range(calls))))
+
+
+def summarize_calls(results: List[CallResult]) -> Dict[str, Any]:
+    errors = [r.error for r in results if r.error]
+    return {
+        "calls": len(results),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "frames_sent": sum(r.frames_sent for r in results),
+        "frames_received": sum(r.frames_received for r in results),
+        "stop_audio": sum(r.stop_audio for r in results),
+    }
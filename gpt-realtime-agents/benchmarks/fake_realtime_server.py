@@ -0,0 +1,325 @@
+"""Stand-in for the Azure OpenAI Realtime WebSocket API, for offline benchmarks of the ACS bridge.
+
+Speaks the subset of the protocol that ``audio_backend/acs/rtmt.py`` handles:
+``session.created``/``session.updated``, audio deltas at a configurable rate,
+transcripts, function-call items with arguments, ``response.done``, server VAD
+events between turns, and ``conversation.item.truncate``/``response.cancel``.
+
+Every 20 ms frame of audio the server sends starts with its send time (see
+``stamp_frames``), and it reads the same stamp back from the audio the fake ACS
+client sends, so latency can be measured through the bridge in both directions.
+
+Run standalone to point a real backend at it:
+
+    python benchmarks/fake_realtime_server.py --port 8765 --scenario tool
+    AZURE_OPENAI_ENDPOINT_WS=http://127.0.0.1:8765 AZURE_OPENAI_API_KEY=fake ...
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import struct
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from aiohttp import WSMsgType, web
+
+# PCM16 mono at 24 kHz
+FRAME_MS = 20
+FRAME_BYTES = 960
+STAMP = struct.Struct("<Q")  # time.time_ns() when the frame was produced
+
+
+def stamp_frames(frames: int, stamp_ns: Optional[int] = None) -> str:
+    """Base64 PCM of ``frames`` silent 20 ms frames, each starting with ``stamp_ns``."""
+    stamp_ns = stamp_ns or time.time_ns()
+    buf = bytearray(frames * FRAME_BYTES)
+    for i in range(frames):
+        STAMP.pack_into(buf, i * FRAME_BYTES, stamp_ns)
+    return base64.b64encode(bytes(buf)).decode("ascii")
+
+
+def read_stamps(audio: str) -> List[int]:
+    """Stamps of every 20 ms frame in base64 PCM produced by ``stamp_frames``."""
+    raw = base64.b64decode(audio)
+    stamps = []
+    for offset in range(0, len(raw) - STAMP.size + 1, FRAME_BYTES):
+        stamp = STAMP.unpack_from(raw, offset)[0]
+        if stamp:
+            stamps.append(stamp)
+    return stamps
+
+
+class Scenario:
+    """What the fake model does on every connection.
+
+    Each of ``turns`` turns optionally starts with a function call (``tool_name``)
+    and then speaks ``response_ms`` of audio in ``chunk_ms`` deltas, one every
+    ``delta_interval_ms``. Between turns the server reports the caller speaking
+    (speech_started/stopped) and answers on its own, like server VAD does. With
+    ``barge_in_after_ms`` the caller interrupts each answer after that much audio.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        turns: int = 3,
+        response_ms: int = 2000,
+        chunk_ms: int = 100,
+        delta_interval_ms: Optional[float] = None,
+        first_audio_delay_ms: float = 300,
+        jitter_ms: float = 0,
+        turn_gap_ms: float = 1000,
+        tool_name: Optional[str] = None,
+        tool_arguments: Optional[Dict[str, Any]] = None,
+        barge_in_after_ms: Optional[int] = None,
+    ):
+        self.name = name
+        self.turns = turns
+        self.response_ms = response_ms
+        self.chunk_ms = chunk_ms
+        self.delta_interval_ms = chunk_ms if delta_interval_ms is None else delta_interval_ms
+        self.first_audio_delay_ms = first_audio_delay_ms
+        self.jitter_ms = jitter_ms
+        self.turn_gap_ms = turn_gap_ms
+        self.tool_name = tool_name
+        self.tool_arguments = tool_arguments or {}
+        self.barge_in_after_ms = barge_in_after_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+SCENARIOS = {
+    "talk": Scenario("talk"),
+    "tool": Scenario("tool", tool_name="benchmark_lookup", tool_arguments={"query": "phones under $30"}),
+    "barge_in": Scenario("barge_in", barge_in_after_ms=600),
+    # Model generating faster than real time, as the service usually does
+    "burst": Scenario("burst", response_ms=4000, delta_interval_ms=25),
+}
+
+
+class ServerStats:
+    def __init__(self):
+        self.connections = 0
+        self.active = 0
+        self.max_active = 0
+        self.frames_in = 0
+        self.frames_out = 0
+        self.input_latency_ms: List[float] = []
+        self.tool_roundtrip_ms: List[float] = []
+        self.truncates = 0
+        self.cancels = 0
+
+
+class FakeRealtimeServer:
+    def __init__(self, scenario: Scenario, seed: Optional[int] = None):
+        self.scenario = scenario
+        self.stats = ServerStats()
+        self._random = random.Random(seed)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/openai/v1/realtime", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, int]:
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner, runner.addresses[0][1]
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self.stats.connections += 1
+        self.stats.active += 1
+        self.stats.max_active = max(self.stats.max_active, self.stats.active)
+
+        conversation = _Conversation(self, ws)
+        await ws.send_json({"type": "session.created", "session": {"id": f"sess_{uuid.uuid4().hex[:12]}"}})
+        driver = asyncio.create_task(conversation.run())
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                conversation.on_client_event(json.loads(msg.data))
+        finally:
+            driver.cancel()
+            await asyncio.gather(driver, return_exceptions=True)
+            self.stats.active -= 1
+        return ws
+
+
+class _Conversation:
+    """State of one fake model session."""
+
+    def __init__(self, server: FakeRealtimeServer, ws: web.WebSocketResponse):
+        self.server = server
+        self.scenario = server.scenario
+        self.stats = server.stats
+        self.ws = ws
+        self.response_requested = asyncio.Event()
+        self.tool_output = asyncio.Event()
+        self.cancelled = False
+
+    def on_client_event(self, event: Dict[str, Any]):
+        event_type = event.get("type")
+        if event_type == "input_audio_buffer.append":
+            now = time.time_ns()
+            stamps = read_stamps(event.get("audio", ""))
+            self.stats.frames_in += len(stamps)
+            self.stats.input_latency_ms.extend((now - stamp) / 1e6 for stamp in stamps)
+        elif event_type == "session.update":
+            asyncio.ensure_future(self.ws.send_json({"type": "session.updated", "session": event.get("session", {})}))
+        elif event_type == "response.create":
+            self.response_requested.set()
+        elif event_type == "conversation.item.create":
+            if event.get("item", {}).get("type") == "function_call_output":
+                self.tool_output.set()
+        elif event_type == "conversation.item.truncate":
+            self.stats.truncates += 1
+        elif event_type == "response.cancel":
+            self.stats.cancels += 1
+            self.cancelled = True
+
+    def _delay(self, ms: float) -> float:
+        jitter = self.scenario.jitter_ms
+        if jitter:
+            ms += self.server._random.uniform(-jitter, jitter)
+        return max(ms, 0) / 1000
+
+    async def run(self):
+        try:
+            # rtmt asks for the greeting as soon as the session is configured
+            await self.response_requested.wait()
+            for turn in range(self.scenario.turns):
+                self.response_requested.clear()
+                if self.scenario.tool_name:
+                    await self._function_call_response()
+                    await self.response_requested.wait()
+                    self.response_requested.clear()
+                await self._audio_response()
+                if turn < self.scenario.turns - 1:
+                    await asyncio.sleep(self._delay(self.scenario.turn_gap_ms))
+                    await self._caller_turn()
+        except (ConnectionResetError, RuntimeError):
+            # The bridge hung up mid-turn
+            pass
+
+    async def _caller_turn(self):
+        item_id = f"item_{uuid.uuid4().hex[:12]}"
+        await self.ws.send_json({"type": "input_audio_buffer.speech_started", "item_id": item_id, "audio_start_ms": 0})
+        await asyncio.sleep(0.3)
+        await self.ws.send_json({"type": "input_audio_buffer.speech_stopped", "item_id": item_id, "audio_end_ms": 300})
+        await self.ws.send_json({"type": "input_audio_buffer.committed", "item_id": item_id})
+        await self.ws.send_json({"type": "conversation.item.input_audio_transcription.completed", "item_id": item_id, "transcript": "Benchmark caller turn."})
+
+    async def _function_call_response(self):
+        response_id = f"resp_{uuid.uuid4().hex[:12]}"
+        call_id = f"call_{uuid.uuid4().hex[:12]}"
+        item = {
+            "id": f"item_{uuid.uuid4().hex[:12]}",
+            "type": "function_call",
+            "call_id": call_id,
+            "name": self.scenario.tool_name,
+            "arguments": json.dumps(self.scenario.tool_arguments),
+        }
+        await self.ws.send_json({"type": "response.created", "response": {"id": response_id}})
+        await asyncio.sleep(self._delay(self.scenario.first_audio_delay_ms))
+        await self.ws.send_json({"type": "conversation.item.added", "previous_item_id": None, "item": item})
+        await self.ws.send_json({"type": "response.function_call_arguments.done", "response_id": response_id, "call_id": call_id, "arguments": item["arguments"]})
+        await self.ws.send_json({"type": "response.output_item.done", "response_id": response_id, "output_index": 0, "item": item})
+
+        self.tool_output.clear()
+        started = time.perf_counter()
+        await self.ws.send_json({"type": "response.done", "response": {"id": response_id, "status": "completed", "output": [item]}})
+        await self.tool_output.wait()
+        self.stats.tool_roundtrip_ms.append((time.perf_counter() - started) * 1000)
+
+    async def _audio_response(self):
+        scenario = self.scenario
+        response_id = f"resp_{uuid.uuid4().hex[:12]}"
+        item_id = f"item_{uuid.uuid4().hex[:12]}"
+        self.cancelled = False
+
+        await self.ws.send_json({"type": "response.created", "response": {"id": response_id}})
+        await self.ws.send_json({"type": "response.output_item.added", "response_id": response_id, "output_index": 0,
+                                 "item": {"id": item_id, "type": "message", "role": "assistant"}})
+        await asyncio.sleep(self._delay(scenario.first_audio_delay_ms))
+
+        frames_per_chunk = max(scenario.chunk_ms // FRAME_MS, 1)
+        sent_ms = 0
+        barged_in = False
+        while sent_ms < scenario.response_ms and not self.cancelled:
+            if scenario.barge_in_after_ms is not None and not barged_in and sent_ms >= scenario.barge_in_after_ms:
+                barged_in = True
+                await self.ws.send_json({"type": "input_audio_buffer.speech_started", "item_id": f"item_{uuid.uuid4().hex[:12]}", "audio_start_ms": 0})
+            await self.ws.send_json({
+                "type": "response.output_audio.delta",
+                "response_id": response_id,
+                "item_id": item_id,
+                "output_index": 0,
+                "content_index": 0,
+                "delta": stamp_frames(frames_per_chunk),
+            })
+            self.stats.frames_out += frames_per_chunk
+            sent_ms += frames_per_chunk * FRAME_MS
+            await asyncio.sleep(self._delay(scenario.delta_interval_ms))
+
+        status = "cancelled" if self.cancelled else "completed"
+        await self.ws.send_json({"type": "response.output_audio_transcript.done", "response_id": response_id, "item_id": item_id, "transcript": "Benchmark answer."})
+        await self.ws.send_json({"type": "response.output_audio.done", "response_id": response_id, "item_id": item_id})
+        await self.ws.send_json({"type": "response.done", "response": {"id": response_id, "status": status,
+                                 "output": [{"id": item_id, "type": "message", "role": "assistant"}]}})
+
+
+def scenario_from_args(args: argparse.Namespace) -> Scenario:
+    base = SCENARIOS[args.scenario]
+    overrides = {
+        key: getattr(args, key)
+        for key in ("turns", "response_ms", "chunk_ms", "delta_interval_ms", "first_audio_delay_ms", "jitter_ms", "turn_gap_ms")
+        if getattr(args, key, None) is not None
+    }
+    return Scenario(**{**base.to_dict(), **overrides})
+
+
+def add_scenario_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="talk")
+    parser.add_argument("--turns", type=int)
+    parser.add_argument("--response-ms", type=int, help="audio per answer")
+    parser.add_argument("--chunk-ms", type=int, help="audio per delta (multiple of 20)")
+    parser.add_argument("--delta-interval-ms", type=float, help="time between deltas (default: real time)")
+    parser.add_argument("--first-audio-delay-ms", type=float, help="model latency before the first delta")
+    parser.add_argument("--jitter-ms", type=float, help="uniform +/- jitter added to every delay")
+    parser.add_argument("--turn-gap-ms", type=float)
+
+
+async def _serve(args: argparse.Namespace):
+    server = FakeRealtimeServer(scenario_from_args(args), seed=args.seed)
+    runner, port = await server.start(args.host, args.port)
+    print(f"Fake Realtime API ({server.scenario.name}) listening on ws://{args.host}:{port}/openai/v1/realtime")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int)
+    add_scenario_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
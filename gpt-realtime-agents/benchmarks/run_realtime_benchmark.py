@@ -0,0 +1,200 @@
+"""Offline throughput/latency benchmark of the ACS <-> Realtime bridge (RTMiddleTier).
+
+Starts the fake Realtime server and, unless ``--bridge-url`` points at a running
+backend, an in-process bridge serving ``/api/realtime-acs`` the way backend_acs.py
+does. Then runs fake ACS calls at each concurrency level in ``--calls`` and prints
+one JSON report:
+
+- throughput in audio frames/s per direction
+- per-frame latency percentiles, caller -> model and model -> caller
+- connect time, time to first audio, tool round trip
+- ``max_concurrent_calls``: the highest level with no errors and p99 latency
+  within ``--slo-p99-ms`` in both directions (and, for ``--scenario barge_in``,
+  at least one truncated answer)
+
+Example:
+
+    python benchmarks/run_realtime_benchmark.py --calls 1,25,50,100 --duration 10 --scenario tool
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+AUDIO_BACKEND_DIR = BENCHMARKS_DIR.parent / "audio_backend"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from aiohttp import web
+
+from fake_acs_client import run_calls, summarize_calls
+from fake_realtime_server import FakeRealtimeServer, ServerStats, add_scenario_arguments, scenario_from_args
+
+
+def percentiles(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 3)
+
+    return {"count": len(ordered), "p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": round(ordered[-1], 3)}
+
+
+async def start_bridge(endpoint: str, args: argparse.Namespace):
+    """RTMiddleTier behind an aiohttp route, configured like backend_acs.py."""
+    sys.path.insert(0, str(AUDIO_BACKEND_DIR / "acs"))
+    sys.path.insert(0, str(AUDIO_BACKEND_DIR))
+    from azure.core.credentials import AzureKeyCredential
+    from event_log import EventLog
+    from rtmt import RTMiddleTier
+    from tools import Tool
+
+    rtmt = RTMiddleTier(endpoint, "benchmark", AzureKeyCredential("benchmark"))
+    rtmt.events = EventLog(level=logging.getLevelName(args.log_level))
+    rtmt.audio_coalesce_ms = args.coalesce_ms
+    rtmt.queue_overflow = args.queue_overflow
+
+    async def benchmark_lookup(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(args.tool_latency_ms / 1000)
+        return {"results": [{"id": "bench-1", "name": "Benchmark phone", "monthly": 29.0}], "query": arguments.get("query")}
+
+    rtmt.tools["benchmark_lookup"] = Tool(target=benchmark_lookup, schema={
+        "type": "function",
+        "name": "benchmark_lookup",
+        "description": "Benchmark stand-in tool.",
+        "parameters": {"type": "object", "properties": {"query": {"type": "string"}}},
+    })
+    await rtmt.start(pool_size=args.pool_size)
+
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        await rtmt.forward_messages(ws, True)
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/api/realtime-acs", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner, f"ws://127.0.0.1:{runner.addresses[0][1]}/api/realtime-acs", rtmt
+
+
+async def run_level(server: FakeRealtimeServer, url: str, calls: int, args: argparse.Namespace) -> Dict[str, Any]:
+    server.stats = ServerStats()
+    started = time.perf_counter()
+    results = await run_calls(url, calls, args.duration, args.ramp_s)
+    elapsed = time.perf_counter() - started
+    stats = server.stats
+
+    summary = summarize_calls(results)
+    to_caller = percentiles([ms for r in results for ms in r.output_latency_ms])
+    to_model = percentiles(stats.input_latency_ms)
+    # Every interrupted answer must be truncated, or the caller keeps hearing it after StopAudio
+    barge_ins_truncated = server.scenario.barge_in_after_ms is None or stats.truncates > 0
+    passed = (
+        summary["errors"] == 0
+        and barge_ins_truncated
+        and to_caller.get("p99", 0) <= args.slo_p99_ms
+        and to_model.get("p99", 0) <= args.slo_p99_ms
+    )
+    return {
+        **summary,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_frames_per_s": {
+            "to_model": round(stats.frames_in / elapsed, 1),
+            "to_caller": round(summary["frames_received"] / elapsed, 1),
+        },
+        "frames_lost_to_caller": stats.frames_out - summary["frames_received"],
+        "latency_ms": {"to_model": to_model, "to_caller": to_caller},
+        "connect_ms": percentiles([r.connect_ms for r in results if r.connect_ms is not None]),
+        "first_audio_ms": percentiles([r.first_audio_ms for r in results if r.first_audio_ms is not None]),
+        "tool_roundtrip_ms": percentiles(stats.tool_roundtrip_ms),
+        "truncates": stats.truncates,
+        "cancels": stats.cancels,
+        "barge_ins_truncated": barge_ins_truncated,
+        "max_model_connections": stats.max_active,
+        "passed": passed,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    server = FakeRealtimeServer(scenario_from_args(args), seed=args.seed)
+    server_runner, port = await server.start()
+    bridge_runner = rtmt = None
+    url = args.bridge_url
+    if url is None:
+        bridge_runner, url, rtmt = await start_bridge(f"http://127.0.0.1:{port}", args)
+    else:
+        print(f"Using external bridge {url}; point its AZURE_OPENAI_ENDPOINT_WS at http://127.0.0.1:{port}", file=sys.stderr)
+
+    levels = []
+    max_concurrent: Optional[int] = None
+    try:
+        for calls in args.calls:
+            print(f"Running {calls} concurrent calls for {args.duration}s...", file=sys.stderr)
+            level = await run_level(server, url, calls, args)
+            levels.append(level)
+            if level["passed"]:
+                max_concurrent = calls
+            elif not args.keep_going:
+                break
+    finally:
+        if rtmt is not None:
+            await rtmt.close()
+        if bridge_runner is not None:
+            await bridge_runner.cleanup()
+        await server_runner.cleanup()
+
+    return {
+        "scenario": server.scenario.to_dict(),
+        "config": {
+            "duration_s": args.duration,
+            "slo_p99_ms": args.slo_p99_ms,
+            "bridge": args.bridge_url or "in-process",
+            "pool_size": args.pool_size,
+            "coalesce_ms": args.coalesce_ms,
+            "queue_overflow": args.queue_overflow,
+            "tool_latency_ms": args.tool_latency_ms,
+        },
+        "levels": levels,
+        "max_concurrent_calls": max_concurrent,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=lambda s: [int(c) for c in s.split(",")], default=[1, 10, 50], help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of audio per call")
+    parser.add_argument("--ramp-s", type=float, default=1.0, help="spread call starts over this many seconds")
+    parser.add_argument("--slo-p99-ms", type=float, default=150.0, help="p99 frame latency for a level to pass")
+    parser.add_argument("--keep-going", action="store_true", help="run all levels even after one fails")
+    parser.add_argument("--bridge-url", help="benchmark a running backend instead of an in-process bridge")
+    parser.add_argument("--pool-size", type=int, default=0, help="in-process bridge: pre-opened realtime connections")
+    parser.add_argument("--coalesce-ms", type=float, default=0, help="in-process bridge: ACS audio coalescing budget")
+    parser.add_argument("--queue-overflow", default="drop_oldest", help="in-process bridge: bridge queue overflow policy")
+    parser.add_argument("--tool-latency-ms", type=float, default=50, help="in-process bridge: benchmark_lookup latency")
+    parser.add_argument("--log-level", default="WARNING", help="in-process bridge: event log threshold")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    add_scenario_arguments(parser)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Benchmark the tools_registry executors against synthetic catalogs of growing size.
+
+For each catalog size the script generates devices, plans and accessories, loads
+them with ``tools_registry.reload_catalog``, fills a cart, and runs each executor
+under a seeded simulation profile (``fast`` by default: no simulated back-office
+delays, reproducible outcomes; see audio_backend/simulation.py). Per executor it reports
+latency percentiles (timed without tracing) and, from a separate traced pass,
+the memory allocated per call. The JSON report is written with sorted keys so
+two runs can be diffed directly.
+
+Example:
+
+    python benchmarks/tools_benchmark.py --sizes 10,1000,100000 --output before.json
+
+The 1,000,000 item catalog needs a few GB of memory.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "audio_backend"))
+
+import device_scoring
+import tools_registry
+from simulation import SimulationProfile
+
+BRANDS = ["Apple", "Samsung", "Google", "OnePlus", "Xiaomi", "Motorola", "Nokia", "Sony"]
+QUALITY = ["excellent", "very_good", "good"]
+USE_CASES = ["photography", "gaming", "business", "everyday", "content_creation", "ai_features", "budget", "fast_charging"]
+STORAGE_OPTIONS = [[64, 128], [128, 256], [128, 256, 512], [256, 512, 1024]]
+ACCESSORY_TYPES = ["case", "charger", "earbuds", "screen_protector"]
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+DEFAULT_TOOLS = ["search_devices_by_attributes", "get_similar_devices", "calculate_total_cost", "get_cart_summary", "add_to_cart"]
+BACK_OFFICE_TOOLS = ["check_upgrade_eligibility", "run_credit_check", "check_trade_in_value", "process_payment"]
+SIMULATIONS = {"fast": SimulationProfile.fast, "realistic": SimulationProfile.realistic, "staging": SimulationProfile.staging}
+
+
+# =============================================================================
+# SYNTHETIC CATALOG
+# =============================================================================
+
+def synthetic_catalog(size: int, seed: int = 0):
+    """Devices, plans and accessories with ``size`` items each, shaped like the mock data."""
+    rng = random.Random(seed)
+    devices = []
+    for i in range(size):
+        brand = rng.choice(BRANDS)
+        devices.append({
+            "id": f"device-{i:07d}",
+            "name": f"{brand} Phone {i}",
+            "brand": brand,
+            "price_upfront": rng.randrange(0, 1000, 10),
+            "price_monthly": rng.randint(10, 80),
+            "image_url": f"https://example.com/devices/{i}.jpg",
+            "attributes": {
+                "battery_life": rng.choice(QUALITY),
+                "camera_quality": rng.choice(QUALITY),
+                "storage_options": rng.choice(STORAGE_OPTIONS),
+                "screen_size": round(rng.uniform(5.4, 6.9), 1),
+                "5g": rng.random() < 0.8,
+                "use_cases": rng.sample(USE_CASES, rng.randint(1, 4)),
+            },
+            "rating": round(rng.uniform(3.5, 5.0), 1),
+            "reviews_count": rng.randint(0, 5000),
+        })
+
+    plans = []
+    for i in range(size):
+        unlimited = rng.random() < 0.3
+        plans.append({
+            "id": f"plan-{i:07d}",
+            "name": f"Plan {i}",
+            "type": "unlimited" if unlimited else "capped",
+            "data": "Unlimited" if unlimited else f"{rng.choice([10, 20, 50, 100])}GB",
+            "minutes": "Unlimited",
+            "texts": "Unlimited",
+            "international_roaming": rng.random() < 0.3,
+            "5g": rng.random() < 0.7,
+            "price_monthly": rng.randint(5, 40),
+            "highlights": ["Synthetic plan"],
+        })
+
+    # ``size`` accessories spread over the devices in groups of four, plus the default list
+    accessories: Dict[str, List[Dict[str, Any]]] = {"default": []}
+    for i in range(size):
+        accessory = {
+            "id": f"accessory-{i:07d}",
+            "name": f"Accessory {i}",
+            "type": ACCESSORY_TYPES[i % len(ACCESSORY_TYPES)],
+            "price": rng.randint(5, 250),
+            "in_stock": rng.random() < 0.9,
+            "image_url": f"https://example.com/accessories/{i}.jpg",
+        }
+        if i < 3:
+            accessories["default"].append(accessory)
+        else:
+            accessories.setdefault(devices[(i // 4) % size]["id"], []).append(accessory)
+
+    return devices, plans, accessories
+
+
+# =============================================================================
+# BENCHMARK CASES
+# =============================================================================
+
+def argument_sets(size: int, session_id: str, seed: int) -> Dict[str, List[Dict[str, Any]]]:
+    """A few argument variants per executor, cycled through during the timed runs."""
+    rng = random.Random(seed)
+    device_ids = [f"device-{rng.randrange(size):07d}" for _ in range(8)]
+    plan_ids = [f"plan-{rng.randrange(size):07d}" for _ in range(8)]
+    accessory_ids = [f"accessory-{rng.randrange(size):07d}" for _ in range(8)]
+    return {
+        "search_devices_by_attributes": [
+            {"battery_life": "excellent", "price_max_monthly": 50},
+            {"camera_quality": "excellent", "use_case": "photography"},
+            {"brand": "Samsung", "battery_life": "very_good", "price_max_monthly": 40},
+            {"use_case": "gaming", "camera_quality": "good", "brand": "Google"},
+        ],
+        "get_similar_devices": [{"device_id": device_id} for device_id in device_ids],
+        "calculate_total_cost": [
+            {"device_id": device_id, "plan_id": plan_id, "accessory_ids": accessory_ids[:n]}
+            for n, (device_id, plan_id) in enumerate(zip(device_ids, plan_ids))
+        ],
+        "get_cart_summary": [{"session_id": session_id}],
+        "add_to_cart": [{"session_id": f"{session_id}-add", "item_type": "device", "item_id": device_id} for device_id in device_ids],
+        "check_upgrade_eligibility": [{"account_number": f"ACC-{n}", "session_id": session_id} for n in range(4)],
+        "run_credit_check": [
+            {"customer_name": "Alex Doe", "address": "1 High Street", "postcode": "SW1A 1AA", "session_id": session_id},
+        ],
+        "check_trade_in_value": [
+            {"device_model": "iPhone 13", "condition": "good", "session_id": session_id},
+            {"device_model": "Pixel 8 Pro", "condition": "excellent", "session_id": session_id},
+        ],
+        "process_payment": [{"payment_method": "card", "session_id": session_id}],
+    }
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def measure(executor: Callable, variants: List[Dict[str, Any]], iterations: int, max_seconds: float, alloc_iterations: int) -> Dict[str, Any]:
+    for arguments in variants:  # warm-up
+        await executor(dict(arguments))
+
+    # ``iterations`` calls, or fewer (at least 5) once ``max_seconds`` is used up
+    timings = []
+    deadline = time.perf_counter() + max_seconds
+    while len(timings) < iterations and (len(timings) < 5 or time.perf_counter() < deadline):
+        arguments = dict(variants[len(timings) % len(variants)])
+        started = time.perf_counter_ns()
+        await executor(arguments)
+        timings.append((time.perf_counter_ns() - started) / 1000)
+    timings.sort()
+
+    # Separate pass under tracemalloc: tracing slows allocation-heavy code down a lot
+    peaks, retained = [], 0
+    tracemalloc.start()
+    try:
+        for i in range(alloc_iterations):
+            arguments = dict(variants[i % len(variants)])
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await executor(arguments)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained += max(current - before, 0)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+
+    return {
+        "iterations": len(timings),
+        "p50_us": round(percentile(timings, 0.50), 1),
+        "p99_us": round(percentile(timings, 0.99), 1),
+        "mean_us": round(statistics.fmean(timings), 1),
+        "alloc_peak_kb_p50": round(percentile(peaks, 0.50) / 1024, 1) if peaks else None,
+        "alloc_peak_kb_max": round(peaks[-1] / 1024, 1) if peaks else None,
+        "alloc_retained_kb_per_call": round(retained / len(peaks) / 1024, 2) if peaks else None,
+    }
+
+
+async def fill_cart(session_id: str, size: int, items: int, seed: int):
+    rng = random.Random(seed + 1)
+    tools_registry.CART_STORE.delete(session_id)
+    for i in range(items):
+        item_type = ("device", "plan", "accessory")[i % 3]
+        await tools_registry.add_to_cart({"session_id": session_id, "item_type": item_type, "item_id": f"{item_type}-{rng.randrange(size):07d}"})
+
+
+async def run_size(size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    tracemalloc.start()
+    devices, plans, accessories = synthetic_catalog(size, args.seed)
+    catalog_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    tools_registry.reload_catalog(devices, plans, accessories)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    session_id = f"benchmark-{size}"
+    cart_items = min(size, args.max_cart_items)
+    await fill_cart(session_id, size, cart_items, args.seed)
+
+    variants = argument_sets(size, session_id, args.seed)
+    tools = {}
+    for name in args.tools:
+        executor = tools_registry.TOOLS_REGISTRY[name]["executor"]
+        print(f"  {name}", file=sys.stderr)
+        tools[name] = await measure(executor, variants[name], args.iterations, args.max_seconds, args.alloc_iterations)
+
+    tools_registry.CART_STORE.delete(session_id)
+    tools_registry.CART_STORE.delete(f"{session_id}-add")
+    return {
+        "size": size,
+        "cart_items": cart_items,
+        "catalog_mb": round(catalog_bytes / 2**20, 1),
+        "index_build_ms": round(build_ms, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "tools": tools,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    simulation = SIMULATIONS[args.simulation](seed=args.seed)
+    tools_registry.configure_simulation(simulation)
+    results = []
+    for size in args.sizes:
+        print(f"Catalog size {size}...", file=sys.stderr)
+        results.append(await run_size(size, args))
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": device_scoring.np is not None,
+            "cart_store": type(tools_registry.CART_STORE).__name__,
+        },
+        "config": {
+            "seed": args.seed,
+            "simulation": simulation.describe(),
+            "iterations": args.iterations,
+            "max_seconds": args.max_seconds,
+            "alloc_iterations": args.alloc_iterations,
+        },
+        "sizes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=DEFAULT_SIZES, help="comma-separated catalog sizes")
+    parser.add_argument("--tools", type=lambda s: s.split(","), default=DEFAULT_TOOLS, help=f"comma-separated executors to run, also: {','.join(BACK_OFFICE_TOOLS)}")
+    parser.add_argument("--iterations", type=int, default=1000, help="timed calls per executor and size")
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="stop timing an executor early after this long")
+    parser.add_argument("--alloc-iterations", type=int, default=20, help="traced calls per executor for allocation figures")
+    parser.add_argument("--max-cart-items", type=int, default=1000, help="cart size is min(catalog size, this)")
+    parser.add_argument("--simulation", choices=sorted(SIMULATIONS), default="fast", help="latency profile of the mocked back-office tools")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="tools_benchmark.json", help="JSON report path ('-' for stdout)")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.tools if name not in DEFAULT_TOOLS + BACK_OFFICE_TOOLS]
+    if unknown:
+        parser.error(f"no benchmark arguments for {unknown}; choose from {DEFAULT_TOOLS + BACK_OFFICE_TOOLS}")
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
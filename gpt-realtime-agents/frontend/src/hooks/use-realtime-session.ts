@@ -253,31 +253,16 @@ export function useRealtimeSession({ onMessage, onStateChange, onProductsDiscove
 
       // Extract cart updates
       if (onCartUpdated) {
-        if (functionName === 'add_to_cart' && result.output.cart_count) {
-          // When item added, fetch full cart summary
-          try {
-            const cartResponse = await fetch(`${CONFIG.backendBaseUrl}/function-call`, {
-              method: "POST",
-              headers: { "Content-Type": "application/json" },
-              body: JSON.stringify({
-                name: "get_cart_summary",
-                call_id: "cart_refresh",
-                arguments: { session_id: "default" }
-              }),
-            });
-            if (cartResponse.ok) {
-              const cartResult = await cartResponse.json();
-              onCartUpdated(cartResult.output);
-            }
-          } catch (e) {
-            console.error("Failed to fetch cart", e);
-          }
+        if ((functionName === 'add_to_cart' || functionName === 'remove_from_cart') && result.output._visual?.items) {
+          // Cart tools already return the refreshed cart lines, no extra get_cart_summary round-trip needed
+          onCartUpdated({ items: result.output._visual.items });
         } else if (functionName === 'get_cart_summary') {
           onCartUpdated(result.output);
         }
       }
 
-      sendFunctionCallOutput(dataChannel, callId, result.output);
+      // The model only needs the compact view; the full output (with _visual) is for the UI above
+      sendFunctionCallOutput(dataChannel, callId, result.model_output ?? result.output);
       logMessage(`Provided output for ${functionName}`);
     } catch (error: any) {
       console.error(`Function ${functionName} failed`, error);
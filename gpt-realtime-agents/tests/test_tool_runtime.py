@@ -0,0 +1,100 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "audio_backend"))
+
+from tool_runtime import IdempotencyCache, OutputEncoder
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def test_encode_is_compact_and_drops_nulls():
+    encoder = OutputEncoder(abbreviate={"description": "desc"})
+    text = encoder.encode({"a": None, "items": [1, None, {"description": "x", "b": None}], "ok": True})
+    assert text == '{"items":[1,{"desc":"x"}],"ok":true}'
+    assert encoder.stats()["truncated"] == 0
+
+
+def test_truncates_longest_list_first():
+    output = {"devices": [{"id": f"device-{i}", "name": f"Phone {i}"} for i in range(50)], "summary": "fifty devices"}
+    encoder = OutputEncoder(max_bytes=400)
+    text = encoder.encode(output)
+    decoded = json.loads(text)
+    assert _size(text) <= 400
+    assert decoded["_truncated"] is True
+    assert 0 < len(decoded["devices"]) < 50
+    assert decoded["summary"] == "fifty devices"
+    assert len(output["devices"]) == 50  # the caller's result is left alone
+    assert encoder.stats()["truncated"] == 1
+
+
+def test_truncates_long_strings_when_lists_are_gone():
+    encoder = OutputEncoder(max_bytes=200)
+    text = encoder.encode({"description": "x" * 1000, "tags": ["a", "b"]})
+    decoded = json.loads(text)
+    assert _size(text) <= 200
+    assert decoded["_truncated"] is True
+    assert decoded["description"].startswith("x") and decoded["description"].endswith("…")
+
+
+def test_fallback_never_exceeds_budget():
+    output = {"key_" + str(i): i for i in range(100)}  # no lists or long strings to shrink
+    for max_bytes in (120, 50, 1):
+        encoder = OutputEncoder(max_bytes=max_bytes)
+        text = encoder.encode(output)
+        assert json.loads(text)["_truncated"] is True
+        assert _size(text) <= encoder.max_bytes
+    assert OutputEncoder(max_bytes=1).max_bytes == OutputEncoder.MIN_BYTES
+
+
+def test_cancelling_the_only_caller_cancels_the_tool():
+    cache = IdempotencyCache()
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def slow_tool() -> Dict[str, Any]:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return {"ok": True}
+
+    async def scenario():
+        caller = asyncio.ensure_future(cache.run("call-1", "slow_tool", {}, slow_tool))
+        await started.wait()
+        caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert cache.stats()["entries"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_one_of_two_callers_keeps_the_tool_running():
+    cache = IdempotencyCache()
+    started, release = asyncio.Event(), asyncio.Event()
+    runs = []
+
+    async def tool() -> Dict[str, Any]:
+        runs.append(1)
+        started.set()
+        await release.wait()
+        return {"ok": True}
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.run("call-1", "tool", {}, tool))
+        await started.wait()
+        second = asyncio.ensure_future(cache.run("call-1", "tool", {}, tool))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await second == {"ok": True}
+        assert runs == [1]
+
+    asyncio.run(scenario())